@@ -8,9 +8,9 @@ class ActionRouter:
     Routes intents to appropriate action modules and coordinates responses.
     """
 
-    def __init__(self, db_client, smtp_config):
+    def __init__(self, db_client, smtp_config, facility_index=None):
         self.reminder_manager = ReminderManager(db_client)
-        self.relationship_cueing = RelationshipCueing(db_client)
+        self.relationship_cueing = RelationshipCueing(db_client, facility_index=facility_index)
         self.emergency_handler = EmergencyHandler(db_client, smtp_config)
         self.tts = TTSOutput()
 
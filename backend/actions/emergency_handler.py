@@ -2,6 +2,7 @@ from datetime import datetime
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from backend.nlp.lexicon import EMERGENCY_KEYWORDS, scan
 
 class EmergencyHandler:
     """
@@ -17,18 +18,10 @@ class EmergencyHandler:
         Detect if user input indicates an emergency.
         Returns: (is_emergency, severity_level)
         """
-        emergency_keywords = {
-            'critical': ['help', 'emergency', 'urgent', 'ambulance', 'hospital', 'pain', 'hurt', 'fallen', 'fall'],
-            'high': ['scared', 'afraid', 'confused', 'lost', 'dizzy', 'cant breathe', 'chest'],
-            'medium': ['worried', 'nervous', 'uncomfortable', 'unwell', 'sick']
-        }
-
-        text_lower = transcript.lower()
-
-        for severity, keywords in emergency_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    return True, severity
+        severities = scan(transcript).values('emergency')
+        for severity, _ in EMERGENCY_KEYWORDS:
+            if severity in severities:
+                return True, severity
 
         if emotion in ['stressed', 'distressed']:
             return True, 'medium'
@@ -1,14 +1,18 @@
 from datetime import datetime
-import face_recognition
-import numpy as np
+from backend.face_recognition.gallery_cache import FaceGalleryCache
+from backend.face_recognition.embedding_format import to_db_value, from_db_value
+from backend.face_recognition.enrollment import build_prototype
 
 class RelationshipCueing:
     """
     Provides relationship-aware identity cues for recognized faces.
     """
 
-    def __init__(self, db_client):
+    def __init__(self, db_client, gallery_ttl=60.0, max_exemplars=4, facility_index=None):
         self.db = db_client
+        self.gallery_cache = FaceGalleryCache(db_client, ttl=gallery_ttl)
+        self.max_exemplars = max_exemplars
+        self.facility_index = facility_index
 
     def identify_person(self, face_encoding, patient_id):
         """
@@ -16,37 +20,71 @@ class RelationshipCueing:
         Returns: (person_info, cue_message)
         """
         try:
-            result = self.db.table('family_members').select('*').eq('patient_id', patient_id).execute()
+            gallery = self.gallery_cache.get(patient_id)
 
-            if not result.data:
+            if not len(gallery):
                 return None, "I don't recognize this person yet."
 
-            best_match = None
-            best_distance = 1.0
-
-            for person in result.data:
-                if not person.get('face_encoding'):
-                    continue
-
-                stored_encoding = np.array(person['face_encoding'])
-                distance = face_recognition.face_distance([stored_encoding], face_encoding)[0]
-
-                if distance < best_distance and distance < 0.6:
-                    best_distance = distance
-                    best_match = person
+            best_match, best_distance = self.gallery_cache.match(
+                face_encoding, patient_id, tolerance=0.6, gallery=gallery
+            )
 
             if not best_match:
                 return None, "I don't recognize this person. Would you like to add them?"
 
-            self.log_interaction(patient_id, best_match['id'])
-
             cue_message = self.build_cue_message(best_match)
+            self.log_interaction(patient_id, best_match['id'])
             return best_match, cue_message
 
         except Exception as e:
             print(f"Error identifying person: {e}")
             return None, "I'm having trouble recognizing faces right now."
 
+    def identify_people(self, face_encodings, patient_id, one_to_one=True):
+        """
+        Identify every face in a frame against the patient's family members at once.
+        Returns: list of (person_info, distance, cue_message), one per face encoding
+        """
+        try:
+            matches = self.gallery_cache.match_many(face_encodings, patient_id, tolerance=0.6, one_to_one=one_to_one)
+
+            results = []
+            for person, distance in matches:
+                if person is None:
+                    results.append((None, distance, "I don't recognize this person. Would you like to add them?"))
+                    continue
+                cue_message = self.build_cue_message(person)
+                self.log_interaction(patient_id, person['id'])
+                results.append((person, distance, cue_message))
+            return results
+
+        except Exception as e:
+            print(f"Error identifying people: {e}")
+            return [(None, None, "I'm having trouble recognizing faces right now.") for _ in face_encodings]
+
+    def identify_people_in_facility(self, face_encodings, tolerance=0.6):
+        """
+        Identify faces seen by a shared camera against every resident's family members.
+        Returns: list of (person_info, distance, cue_message), one per face encoding
+        """
+        if self.facility_index is None:
+            return [(None, None, "Facility recognition is not enabled.") for _ in face_encodings]
+
+        try:
+            results = []
+            for person, distance in self.facility_index.search(face_encodings, tolerance=tolerance):
+                if person is None:
+                    results.append((None, distance, "I don't recognize this visitor."))
+                    continue
+                cue_message = self.build_cue_message(person)
+                self.log_interaction(person['patient_id'], person['id'])
+                results.append((person, distance, cue_message))
+            return results
+
+        except Exception as e:
+            print(f"Error identifying people in facility: {e}")
+            return [(None, None, "I'm having trouble recognizing faces right now.") for _ in face_encodings]
+
     def build_cue_message(self, person):
         """
         Build a relationship-aware cue message.
@@ -93,9 +131,13 @@ class RelationshipCueing:
             self.db.table('interactions').insert(interaction_data).execute()
 
             self.db.table('family_members').update({
-                'last_interaction': datetime.now().isoformat()
+                'last_interaction': interaction_data['timestamp']
             }).eq('id', family_member_id).execute()
 
+            self.gallery_cache.touch(patient_id, family_member_id, interaction_data['timestamp'])
+            if self.facility_index is not None:
+                self.facility_index.touch(family_member_id, interaction_data['timestamp'])
+
         except Exception as e:
             print(f"Error logging interaction: {e}")
 
@@ -109,18 +151,66 @@ class RelationshipCueing:
                 'patient_id': patient_id,
                 'name': name,
                 'relationship': relationship,
-                'face_encoding': face_encoding.tolist() if isinstance(face_encoding, np.ndarray) else face_encoding,
+                'face_embedding': self._prototype_value(face_encoding) if face_encoding is not None else None,
                 'photo_url': photo_url,
                 'notes': notes,
                 'created_at': datetime.now().isoformat()
             }
 
             result = self.db.table('family_members').insert(member_data).execute()
+            self.gallery_cache.invalidate(patient_id)
+            if self.facility_index is not None and result.data:
+                self.facility_index.upsert(result.data[0])
             return True, f"Added {name} as your {relationship}."
         except Exception as e:
             print(f"Error adding family member: {e}")
             return False, "Could not add this person. Please try again."
 
+    def add_face_samples(self, patient_id, family_member_id, face_encodings):
+        """
+        Fold additional enrollment samples into a family member's face prototype.
+        Returns: success boolean and message
+        """
+        try:
+            result = self.db.table('family_members').select('name, face_embedding, face_encoding').eq('id', family_member_id).eq('patient_id', patient_id).execute()
+            if not result.data:
+                return False, "I couldn't find that person."
+
+            person = result.data[0]
+            previous, metadata = from_db_value(person.get('face_embedding') or person.get('face_encoding'), with_metadata=True)
+            previous_samples = metadata.get('samples', len(previous) if previous is not None else 0)
+
+            updated = self.db.table('family_members').update({
+                'face_embedding': self._prototype_value(face_encodings, previous, previous_samples)
+            }).eq('id', family_member_id).execute()
+
+            self.gallery_cache.invalidate(patient_id)
+            if self.facility_index is not None and updated.data:
+                self.facility_index.upsert(updated.data[0])
+            return True, f"Added {len(face_encodings)} more photos of {person['name']}."
+        except Exception as e:
+            print(f"Error adding face samples: {e}")
+            return False, "Could not add these photos. Please try again."
+
+    def remove_family_member(self, patient_id, family_member_id):
+        """
+        Remove a family member from the system.
+        Returns: success boolean and message
+        """
+        try:
+            self.db.table('family_members').delete().eq('id', family_member_id).eq('patient_id', patient_id).execute()
+            self.gallery_cache.invalidate(patient_id)
+            if self.facility_index is not None:
+                self.facility_index.remove(family_member_id)
+            return True, "Removed this person."
+        except Exception as e:
+            print(f"Error removing family member: {e}")
+            return False, "Could not remove this person. Please try again."
+
+    def _prototype_value(self, face_encodings, previous=None, previous_samples=0):
+        prototype, samples = build_prototype(face_encodings, previous, previous_samples, self.max_exemplars)
+        return to_db_value(prototype, metadata={'samples': samples})
+
     def get_family_members(self, patient_id):
         """
         Get all family members for a patient.
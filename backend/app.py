@@ -1,17 +1,27 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from supabase import create_client
+import atexit
 import os
+import tempfile
 from dotenv import load_dotenv
-import base64
-import numpy as np
 import face_recognition
 
+from backend.batching import DynamicBatcher
 from backend.voice_interaction.voice_capture import VoiceCapture
+from backend.voice_interaction.streaming import StreamingSessions, StreamingTranscriber
+from backend.voice_interaction.audio_io import decode_audio_bytes, retain_audio
 from backend.emotion_recognition.voice_stress_analysis import VoiceEmotionAnalyzer
-from backend.nlp.intent_classifier import IntentClassifier
+from backend.emotion_recognition.streaming import StreamingEmotionTracker
+from backend.nlp.intent_classifier import INTENT_MODES, IntentClassifier
 from backend.nlp.entity_extractor import EntityExtractor
+from backend.nlp.utterance_cache import UtteranceCache
 from backend.actions.action_router import ActionRouter
+from backend.face_recognition.detection import DetectionConfig, detect_faces
+from backend.face_recognition.image_io import decode_image, decode_data_url, data_url_bytes, scale_locations
+from backend.face_recognition.frame_cache import FrameResultCache, thumbnail
+from backend.face_recognition.enrollment import select_best_frames, encode_samples
+from backend.face_recognition.facility_index import FacilityFaceIndex
 
 load_dotenv()
 
@@ -29,11 +39,189 @@ SMTP_CONFIG = {
     'password': os.getenv('SENDER_PASSWORD')
 }
 
-voice_capture = VoiceCapture()
-emotion_analyzer = VoiceEmotionAnalyzer()
-intent_classifier = IntentClassifier()
+ASR_ENGINES = ('whisper', 'vosk', 'cascade')
+voice_capture = VoiceCapture(
+    model_size=os.getenv('WHISPER_MODEL', 'base'),
+    language=os.getenv('WHISPER_LANGUAGE') or None,
+    engine=os.getenv('ASR_ENGINE', 'whisper'),
+    vosk_model_path=os.getenv('VOSK_MODEL_PATH', 'models/vosk-model-small-en-us-0.15'),
+    min_confidence=float(os.getenv('ASR_MIN_CONFIDENCE', 0.75))
+)
+emotion_analyzer = VoiceEmotionAnalyzer(workers=int(os.getenv('EMOTION_BATCH_WORKERS', 0)) or None)
+intent_classifier = IntentClassifier(
+    quantized_path=os.getenv('INTENT_QUANTIZED_MODEL', 'models/intent_classifier_int8.pt'),
+    rule_threshold=float(os.getenv('INTENT_RULE_THRESHOLD', 0.75))
+)
+INTENT_MODE = os.getenv('INTENT_MODE', 'cascade')
 entity_extractor = EntityExtractor()
-action_router = ActionRouter(supabase, SMTP_CONFIG)
+facility_index = FacilityFaceIndex.open(
+    supabase,
+    os.getenv('FACILITY_INDEX_PATH', 'data/index/facility'),
+    backend=os.getenv('FACILITY_INDEX_BACKEND', 'auto')
+)
+atexit.register(lambda: facility_index.save())
+action_router = ActionRouter(supabase, SMTP_CONFIG, facility_index=facility_index)
+detection_config = DetectionConfig.from_env()
+transcription_batcher = DynamicBatcher(
+    lambda requests: voice_capture.transcribe_batch(
+        [audio for audio, _ in requests],
+        [engine for _, engine in requests]
+    ),
+    max_batch_size=int(os.getenv('WHISPER_BATCH_SIZE', 8)),
+    max_wait=float(os.getenv('WHISPER_BATCH_WAIT_MS', 30)) / 1000,
+    name='whisper-batcher'
+)
+intent_batcher = DynamicBatcher(
+    intent_classifier.predict_batch,
+    max_batch_size=int(os.getenv('INTENT_BATCH_SIZE', 16)),
+    max_wait=float(os.getenv('INTENT_BATCH_WAIT_MS', 5)) / 1000,
+    name='intent-batcher'
+)
+stream_sessions = StreamingSessions(
+    lambda **options: StreamingTranscriber(
+        lambda audio, partial=False: transcription_batcher((audio, None)),
+        **options
+    ),
+    ttl=float(os.getenv('VOICE_STREAM_TTL', 120))
+)
+emotion_sessions = StreamingSessions(
+    lambda **options: StreamingEmotionTracker(emotion_analyzer, on_stress=alert_on_stress, **options),
+    ttl=float(os.getenv('VOICE_STREAM_TTL', 120))
+)
+AUDIO_RETENTION = os.getenv('VOICE_AUDIO_RETENTION', '').lower() in ('1', 'true', 'yes', 'on')
+AUDIO_DIR = os.getenv('VOICE_AUDIO_DIR', 'data/audio')
+frame_cache = FrameResultCache(
+    maxsize=int(os.getenv('FACE_CACHE_SIZE', 512)),
+    ttl=float(os.getenv('FACE_CACHE_TTL', 10)),
+    max_distance=int(os.getenv('FACE_CACHE_MAX_DISTANCE', 6)),
+    max_frame_distance=int(os.getenv('FACE_CACHE_MAX_FRAME_DISTANCE', 12))
+)
+utterance_cache = UtteranceCache(
+    maxsize=int(os.getenv('UTTERANCE_CACHE_SIZE', 1024)),
+    ttl=float(os.getenv('UTTERANCE_CACHE_TTL', 0)) or None,
+    per_patient=os.getenv('UTTERANCE_CACHE_SCOPE', 'global') == 'patient'
+)
+
+def request_params():
+    """
+    Collect request fields from the JSON body, multipart form or query string.
+    Returns: dict
+    """
+    if request.is_json:
+        return request.get_json() or {}
+    params = request.args.to_dict()
+    params.update(request.form.to_dict())
+    return params
+
+def is_enabled(value, default=True):
+    """Interpret a JSON boolean or a form/query string flag."""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() not in ('0', 'false', 'no', 'off')
+    return bool(value)
+
+def read_request_audio():
+    """
+    Decode the multipart 'audio' upload in memory, keeping a copy on disk only
+    when VOICE_AUDIO_RETENTION is enabled.
+    Returns: (16 kHz float32 samples, retained path or None), or (None, None) if no file was sent
+    """
+    if 'audio' not in request.files:
+        return None, None
+    upload = request.files['audio']
+    audio_bytes = upload.read()
+    audio_path = retain_audio(audio_bytes, AUDIO_DIR, upload.filename) if AUDIO_RETENTION else None
+    return decode_audio_bytes(audio_bytes, os.path.splitext(upload.filename or '')[1]), audio_path
+
+def read_asr_engine(params):
+    """
+    Per-request ASR engine override from the 'asr_engine' field. The engine
+    is loaded here, in the request thread, so a missing model fails this
+    request instead of the shared transcription batch it would join.
+    Raises ValueError for an unknown name and RuntimeError if the engine
+    cannot be loaded.
+    Returns: engine name or None for the deployment default
+    """
+    engine = params.get('asr_engine')
+    if engine and engine not in ASR_ENGINES:
+        raise ValueError(f"asr_engine must be one of {', '.join(ASR_ENGINES)}")
+    try:
+        voice_capture.get_engine(engine or None)
+    except Exception as e:
+        raise RuntimeError(f"ASR engine '{engine or voice_capture.default_engine}' is unavailable: {e}") from e
+    return engine or None
+
+def read_intent_mode(params):
+    """
+    Per-request intent classification mode from the 'mode' field.
+    Returns: one of INTENT_MODES, INTENT_MODE when not given
+    """
+    mode = params.get('mode') or INTENT_MODE
+    if mode not in INTENT_MODES:
+        raise ValueError(f"mode must be one of {', '.join(INTENT_MODES)}")
+    return mode
+
+def read_request_bytes(params):
+    """
+    Read the encoded upload from a multipart 'image' file, a raw image/* or
+    octet-stream body, or a base64 data URL in the JSON 'image' field.
+    Returns: bytes, or None if no image was sent
+    """
+    if 'image' in request.files:
+        return request.files['image'].read()
+    if request.mimetype.startswith('image/') or request.mimetype == 'application/octet-stream':
+        return request.get_data(cache=False)
+
+    image_data = params.get('image')
+    if not image_data:
+        return None
+    return data_url_bytes(image_data)
+
+def read_request_image(params, min_pixels=None, with_factor=False):
+    """
+    Decode the uploaded image (see read_request_bytes).
+    Returns: (rgb_image, provided) where provided is False if no image was sent;
+    with_factor returns ((rgb_image, reduction factor), provided)
+    """
+    image_bytes = read_request_bytes(params)
+    if image_bytes is None:
+        return ((None, 1) if with_factor else None), False
+    return decode_image(image_bytes, min_pixels, with_factor), True
+
+def read_enrollment_samples(params):
+    """
+    Collect enrollment faces from a multipart 'video' clip (best frames are
+    auto-selected), several 'images' files or data URLs, or a single image.
+    Returns: (list of (rgb_image, face_location), provided)
+    """
+    if 'video' in request.files:
+        video = request.files['video']
+        suffix = os.path.splitext(video.filename or '')[1] or '.mp4'
+        with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+            video.save(tmp)
+            tmp.flush()
+            return select_best_frames(tmp.name, detection_config), True
+
+    if request.files.getlist('images'):
+        images = [decode_image(f.read(), detection_config.decode_pixels) for f in request.files.getlist('images')]
+    elif isinstance(params.get('images'), list):
+        images = [decode_data_url(d, detection_config.decode_pixels) for d in params['images']]
+    else:
+        rgb_image, provided = read_request_image(params, detection_config.decode_pixels)
+        if not provided:
+            return [], False
+        images = [rgb_image]
+
+    samples = []
+    for rgb_image in images:
+        if rgb_image is None:
+            continue
+        locations = detect_faces(rgb_image, detection_config)
+        if locations:
+            # Enrollment photos are of one person; take the largest face.
+            samples.append((rgb_image, max(locations, key=lambda l: (l[2] - l[0]) * (l[1] - l[3]))))
+    return samples, True
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -46,14 +234,18 @@ def transcribe_voice():
     Transcribe audio file to text
     """
     try:
-        if 'audio' not in request.files:
+        try:
+            engine = read_asr_engine(request_params())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 503
+
+        audio, audio_path = read_request_audio()
+        if audio is None:
             return jsonify({'error': 'No audio file provided'}), 400
 
-        audio_file = request.files['audio']
-        audio_path = f'data/audio/temp_{audio_file.filename}'
-        audio_file.save(audio_path)
-
-        transcript = voice_capture.transcribe_audio(audio_path)
+        transcript = transcription_batcher((audio, engine))
 
         return jsonify({
             'success': True,
@@ -64,35 +256,96 @@ def transcribe_voice():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/voice/batching/stats', methods=['GET'])
+def transcription_batching_stats():
+    """Queue depth and batch-size metrics for the transcription worker"""
+    cascade = voice_capture.engines.get('cascade')
+    return jsonify({
+        'success': True,
+        'stats': transcription_batcher.stats(),
+        'cascade': cascade.stats() if cascade else None
+    })
+
 @app.route('/api/emotion/analyze', methods=['POST'])
 def analyze_emotion():
     """
-    Analyze emotion from audio file
+    Analyze emotion from an uploaded audio file, or from a retained audio_path
     """
     try:
-        data = request.json
-        audio_path = data.get('audio_path')
+        audio, _ = read_request_audio()
+        data = request_params()
+        if audio is None:
+            audio = data.get('audio_path')
 
-        if not audio_path:
-            return jsonify({'error': 'No audio path provided'}), 400
+        if audio is None:
+            return jsonify({'error': 'No audio provided'}), 400
 
-        emotion = emotion_analyzer.predict_emotion(audio_path)
+        emotion, confidence = emotion_analyzer.predict_with_confidence(audio)
 
         result = supabase.table('mood_logs').insert({
             'patient_id': data.get('patient_id'),
             'emotion': emotion,
-            'confidence': 0.8,
+            'confidence': confidence,
             'context': data.get('context', '')
         }).execute()
 
         return jsonify({
             'success': True,
-            'emotion': emotion
+            'emotion': emotion,
+            'confidence': confidence
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/emotion/analyze-batch', methods=['POST'])
+def analyze_emotion_batch():
+    """
+    Score many clips in one call: several multipart 'audio' files, or a JSON
+    'clips' list of {audio_path, patient_id, context}. Every mood_logs row is
+    inserted in a single request with the model's own confidence.
+    """
+    try:
+        data = request_params()
+        if request.files.getlist('audio'):
+            uploads = request.files.getlist('audio')
+            audios = [
+                decode_audio_bytes(f.read(), os.path.splitext(f.filename or '')[1])
+                for f in uploads
+            ]
+            clips = [{'name': f.filename} for f in uploads]
+        else:
+            clips = data.get('clips') or []
+            audios = [clip.get('audio_path') for clip in clips]
+
+        if not audios or any(audio is None for audio in audios):
+            return jsonify({'error': 'Every clip needs audio'}), 400
+
+        predictions = emotion_analyzer.predict_batch(audios)
+
+        results = []
+        rows = []
+        for clip, prediction in zip(clips, predictions):
+            if prediction is None:
+                results.append(dict(clip, error='Could not analyze clip'))
+                continue
+            emotion, confidence, probabilities = prediction
+            results.append(dict(clip, emotion=emotion, confidence=confidence, probabilities=probabilities))
+            rows.append({
+                'patient_id': clip.get('patient_id', data.get('patient_id')),
+                'emotion': emotion,
+                'confidence': confidence,
+                'context': clip.get('context', data.get('context', ''))
+            })
+
+        if rows:
+            supabase.table('mood_logs').insert(rows).execute()
+
+        return jsonify({'success': True, 'results': results, 'logged': len(rows)})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/intent/classify', methods=['POST'])
 def classify_intent():
     """
@@ -100,19 +353,54 @@ def classify_intent():
     """
     try:
         data = request.json
-        text = data.get('text', '')
+        texts = data.get('texts')
+        try:
+            mode = read_intent_mode(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Offline jobs send a list and get one batched pass; single commands
+        # share forward passes with concurrent requests through the batcher.
+        if texts is not None:
+            if not isinstance(texts, list):
+                return jsonify({'error': 'texts must be a list of strings'}), 400
+            results = intent_classifier.classify_batch([str(text) for text in texts], mode)
+            return jsonify({
+                'success': True,
+                'results': [
+                    {'intent': intent, 'confidence': confidence, 'stage': stage}
+                    for intent, confidence, stage in results
+                ]
+            })
 
-        intent, confidence = intent_classifier.predict_with_confidence(text)
+        text = data.get('text', '')
+        (intent, confidence, stage), cached = utterance_cache.classify(
+            text,
+            mode,
+            lambda text: intent_classifier.classify(text, mode, intent_batcher),
+            patient_id=data.get('patient_id')
+        )
 
         return jsonify({
             'success': True,
             'intent': intent,
-            'confidence': confidence
+            'confidence': confidence,
+            'stage': stage,
+            'cached': cached
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/intent/batching/stats', methods=['GET'])
+def intent_batching_stats():
+    """Queue depth and batch-size metrics for the intent model, and how much traffic the rules decided"""
+    return jsonify({
+        'success': True,
+        'stats': intent_batcher.stats(),
+        'stages': intent_classifier.stage_stats()
+    })
+
 @app.route('/api/entities/extract', methods=['POST'])
 def extract_entities():
     """
@@ -122,61 +410,229 @@ def extract_entities():
         data = request.json
         text = data.get('text', '')
 
-        entities = entity_extractor.extract_all(text)
+        entities, cached = utterance_cache.extract(text, entity_extractor, data.get('patient_id'))
 
         return jsonify({
             'success': True,
-            'entities': entities
+            'entities': entities,
+            'cached': cached
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/nlp/cache/stats', methods=['GET'])
+def utterance_cache_stats():
+    """Hit/miss counters for the repeated-utterance intent and entity caches"""
+    return jsonify({'success': True, 'stats': utterance_cache.stats()})
+
 @app.route('/api/voice/process', methods=['POST'])
 def process_voice():
     """
     Complete voice processing pipeline: transcription -> emotion -> intent -> action
     """
     try:
-        if 'audio' not in request.files:
+        try:
+            engine = read_asr_engine(request_params())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 503
+
+        # Decoded once; transcription and emotion analysis share the buffer.
+        audio, _ = read_request_audio()
+        if audio is None:
             return jsonify({'error': 'No audio file provided'}), 400
 
-        audio_file = request.files['audio']
-        audio_path = f'data/audio/temp_{audio_file.filename}'
-        audio_file.save(audio_path)
-
         patient_id = request.form.get('patient_id')
 
-        transcript = voice_capture.transcribe_audio(audio_path)
-        emotion = emotion_analyzer.predict_emotion(audio_path)
-        intent, confidence = intent_classifier.predict_with_confidence(transcript)
-        entities = entity_extractor.extract_all(transcript)
+        transcript = transcription_batcher((audio, engine))
+        emotion = emotion_analyzer.predict_emotion(audio)
+
+        return jsonify(dict(run_voice_pipeline(transcript, emotion, patient_id), success=True))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        success, response, action_taken = action_router.route_action(
-            intent,
-            entities,
-            emotion,
-            patient_id
+def run_voice_pipeline(transcript, emotion, patient_id):
+    """
+    Run intent and entity extraction on a transcript, route the action and log it.
+    Returns: dict with transcript, emotion, intent, intent_stage, response and action_taken
+    """
+    (intent, confidence, stage), _ = utterance_cache.classify(
+        transcript,
+        INTENT_MODE,
+        lambda text: intent_classifier.classify(text, INTENT_MODE, intent_batcher),
+        patient_id=patient_id
+    )
+    entities, _ = utterance_cache.extract(transcript, entity_extractor, patient_id)
+
+    success, response, action_taken = action_router.route_action(
+        intent,
+        entities,
+        emotion,
+        patient_id
+    )
+
+    supabase.table('activity_log').insert({
+        'patient_id': patient_id,
+        'activity_type': 'voice_command',
+        'description': f'{intent}: {transcript}',
+        'metadata': {
+            'emotion': emotion,
+            'intent': intent,
+            'confidence': confidence,
+            'intent_stage': stage
+        }
+    }).execute()
+
+    return {
+        'transcript': transcript,
+        'emotion': emotion,
+        'intent': intent,
+        'intent_stage': stage,
+        'response': response,
+        'action_taken': action_taken
+    }
+
+def stream_results(session, finals):
+    """Feed each final transcript of a streaming session through the voice pipeline."""
+    results = []
+    for transcript, audio in finals:
+        emotion = emotion_analyzer.predict_emotion(audio)
+        results.append(run_voice_pipeline(transcript, emotion, session.context.get('patient_id')))
+    return results
+
+@app.route('/api/voice/stream', methods=['POST'])
+def start_voice_stream():
+    """
+    Open a streaming transcription session. Chunks of little-endian 16-bit PCM
+    are then POSTed to /api/voice/stream/<session_id>/chunk.
+    """
+    try:
+        data = request_params()
+        session_id = stream_sessions.start(
+            context={'patient_id': data.get('patient_id')},
+            sample_rate=int(data.get('sample_rate', 16000)),
+            channels=int(data.get('channels', 1)),
+            partial_interval=float(data.get('partial_interval', 1.0))
         )
+        return jsonify({'success': True, 'session_id': session_id})
 
-        supabase.table('activity_log').insert({
-            'patient_id': patient_id,
-            'activity_type': 'voice_command',
-            'description': f'{intent}: {transcript}',
-            'metadata': {
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/voice/stream/<session_id>/chunk', methods=['POST'])
+def stream_voice_chunk(session_id):
+    """
+    Append PCM audio to a session. Returns the current partial transcript and
+    the pipeline result for every utterance that ended within this chunk.
+    """
+    try:
+        session = stream_sessions.get(session_id)
+        if session is None:
+            return jsonify({'error': 'Unknown or expired session'}), 404
+
+        update = session.feed(request.get_data(cache=False))
+        return jsonify({
+            'success': True,
+            'partial': update['partial'],
+            'results': stream_results(session, update['finals'])
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/voice/stream/<session_id>/finish', methods=['POST'])
+def finish_voice_stream(session_id):
+    """
+    Close a session, transcribing any utterance still in progress.
+    """
+    try:
+        session = stream_sessions.close(session_id)
+        if session is None:
+            return jsonify({'error': 'Unknown or expired session'}), 404
+
+        return jsonify({
+            'success': True,
+            'results': stream_results(session, session.finish())
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def alert_on_stress(tracker, window):
+    """Raise a caregiver alert as soon as a streamed window sounds stressed."""
+    action_router.emergency_handler.trigger_alert(
+        tracker.context.get('patient_id'),
+        'medium',
+        f"Vocal stress detected ({window['probabilities']['stressed']:.0%}) "
+        f"{window['start']:.0f}-{window['end']:.0f}s into a conversation"
+    )
+
+@app.route('/api/emotion/stream', methods=['POST'])
+def start_emotion_stream():
+    """
+    Open a streaming emotion session. Chunks of little-endian 16-bit PCM are
+    then POSTed to /api/emotion/stream/<session_id>/chunk.
+    """
+    try:
+        data = request_params()
+        session_id = emotion_sessions.start(
+            context={'patient_id': data.get('patient_id')},
+            sample_rate=int(data.get('sample_rate', 16000)),
+            channels=int(data.get('channels', 1)),
+            window=float(data.get('window', 3.0)),
+            hop=float(data.get('hop', 1.0)),
+            stress_threshold=float(data.get('stress_threshold', 0.6))
+        )
+        return jsonify({'success': True, 'session_id': session_id})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/emotion/stream/<session_id>/chunk', methods=['POST'])
+def stream_emotion_chunk(session_id):
+    """
+    Append PCM audio to an emotion session. Returns every window completed by
+    this chunk; a caregiver alert has already been raised for any window with
+    stress_triggered set.
+    """
+    try:
+        session = emotion_sessions.get(session_id)
+        if session is None:
+            return jsonify({'error': 'Unknown or expired session'}), 404
+
+        return jsonify({'success': True, 'windows': session.feed_pcm(request.get_data(cache=False))})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/emotion/stream/<session_id>/finish', methods=['POST'])
+def finish_emotion_stream(session_id):
+    """
+    Close an emotion session and log the smoothed overall mood.
+    """
+    try:
+        session = emotion_sessions.close(session_id)
+        if session is None:
+            return jsonify({'error': 'Unknown or expired session'}), 404
+
+        windows = session.finish()
+        if session.smoothed:
+            emotion = max(session.smoothed, key=session.smoothed.get)
+            supabase.table('mood_logs').insert({
+                'patient_id': session.context.get('patient_id'),
                 'emotion': emotion,
-                'intent': intent,
-                'confidence': confidence
-            }
-        }).execute()
+                'confidence': session.smoothed[emotion],
+                'context': 'streamed conversation'
+            }).execute()
 
         return jsonify({
             'success': True,
-            'transcript': transcript,
-            'emotion': emotion,
-            'intent': intent,
-            'response': response,
-            'action_taken': action_taken
+            'windows': windows,
+            'summary': session.smoothed,
+            'stress_alerts': session.triggers
         })
 
     except Exception as e:
@@ -185,22 +641,38 @@ def process_voice():
 @app.route('/api/face/recognize', methods=['POST'])
 def recognize_face():
     """
-    Recognize face from image and provide relationship cue
+    Recognize every face in an image and provide relationship cues.
+    Accepts a base64 data URL in JSON, a multipart 'image' file, or a raw image body
+    with patient_id in the query string.
     """
     try:
-        data = request.json
+        data = request_params()
         patient_id = data.get('patient_id')
-        image_data = data.get('image')
 
-        if not image_data:
-            return jsonify({'error': 'No image provided'}), 400
+        try:
+            config = detection_config.override(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        image_bytes = base64.b64decode(image_data.split(',')[1])
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        image_bytes = read_request_bytes(data)
+        if image_bytes is None:
+            return jsonify({'error': 'No image provided'}), 400
 
-        face_locations = face_recognition.face_locations(rgb_image)
+        # The same faces in the same places, recognized with the same options,
+        # reuse the previous result before the full decode and face detection.
+        one_to_one = is_enabled(data.get('one_to_one'))
+        cache_options = (one_to_one, config.model, config.upsample, config.max_pixels, config.decode_pixels)
+        thumb = thumbnail(image_bytes)
+        if thumb is not None:
+            cached = frame_cache.lookup(patient_id, cache_options, thumb)
+            if cached is not None:
+                return jsonify(dict(cached, cached=True))
+
+        rgb_image, factor = decode_image(image_bytes, config.decode_pixels, with_factor=True)
+        if rgb_image is None:
+            return jsonify({'error': 'Could not decode image'}), 400
+
+        face_locations = detect_faces(rgb_image, config)
         if not face_locations:
             return jsonify({'success': False, 'message': 'No face detected'})
 
@@ -208,21 +680,107 @@ def recognize_face():
         if not face_encodings:
             return jsonify({'success': False, 'message': 'Could not encode face'})
 
-        person, cue_message = action_router.relationship_cueing.identify_person(
-            face_encodings[0],
-            patient_id
+        matches = action_router.relationship_cueing.identify_people(
+            face_encodings,
+            patient_id,
+            one_to_one=one_to_one
         )
 
+        faces = [
+            {
+                'person': person,
+                'message': cue_message,
+                'distance': distance,
+                'face_location': face_location
+            }
+            # Boxes are reported in the uploaded image's coordinates, not the reduced decode's.
+            for (person, distance, cue_message), face_location in zip(
+                matches, scale_locations(face_locations, factor)
+            )
+        ]
+
+        result = {
+            'success': True,
+            'person': faces[0]['person'],
+            'message': faces[0]['message'],
+            'face_location': faces[0]['face_location'],
+            'faces': faces
+        }
+        if thumb is not None:
+            frame_cache.store(patient_id, cache_options, thumb, face_locations, rgb_image.shape, result)
+
+        return jsonify(dict(result, cached=False))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/face/cache/stats', methods=['GET'])
+def face_cache_stats():
+    """Hit/miss counters for the recognition frame cache"""
+    return jsonify({'success': True, 'stats': frame_cache.stats()})
+
+@app.route('/api/facility/face/recognize', methods=['POST'])
+def recognize_face_in_facility():
+    """
+    Recognize every face seen by a shared camera against all residents' family members.
+    Accepts the same image formats as /api/face/recognize.
+    """
+    try:
+        data = request_params()
+
+        try:
+            config = detection_config.override(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        (rgb_image, factor), provided = read_request_image(data, config.decode_pixels, with_factor=True)
+        if not provided:
+            return jsonify({'error': 'No image provided'}), 400
+        if rgb_image is None:
+            return jsonify({'error': 'Could not decode image'}), 400
+
+        face_locations = detect_faces(rgb_image, config)
+        if not face_locations:
+            return jsonify({'success': False, 'message': 'No face detected'})
+
+        face_encodings = face_recognition.face_encodings(rgb_image, face_locations)
+        matches = action_router.relationship_cueing.identify_people_in_facility(face_encodings)
+
         return jsonify({
             'success': True,
-            'person': person,
-            'message': cue_message,
-            'face_location': face_locations[0]
+            'faces': [
+                {
+                    'person': person,
+                    'patient_id': person['patient_id'] if person else None,
+                    'message': cue_message,
+                    'distance': distance,
+                    'face_location': face_location
+                }
+                for (person, distance, cue_message), face_location in zip(
+                    matches, scale_locations(face_locations, factor)
+                )
+            ]
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/facility/index/rebuild', methods=['POST'])
+def rebuild_facility_index():
+    """Rebuild the facility face index from the database"""
+    try:
+        global facility_index
+        facility_index = FacilityFaceIndex.build(
+            supabase,
+            backend=request_params().get('backend', os.getenv('FACILITY_INDEX_BACKEND', 'auto')),
+            path=facility_index.path
+        )
+        facility_index.save()
+        action_router.relationship_cueing.facility_index = facility_index
+        return jsonify({'success': True, 'vectors': len(facility_index.index), 'members': len(facility_index.members)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/reminders', methods=['GET', 'POST'])
 def manage_reminders():
     """
@@ -275,24 +833,17 @@ def manage_family_members():
             return jsonify({'success': True, 'members': members})
 
         elif request.method == 'POST':
-            data = request.json
+            data = request_params()
             patient_id = data.get('patient_id')
             name = data.get('name')
             relationship = data.get('relationship')
             photo_url = data.get('photo_url')
             notes = data.get('notes')
 
-            image_data = data.get('image')
-            if image_data:
-                image_bytes = base64.b64decode(image_data.split(',')[1])
-                nparr = np.frombuffer(image_bytes, np.uint8)
-                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-                face_encodings = face_recognition.face_encodings(rgb_image)
-                if face_encodings:
-                    face_encoding = face_encodings[0]
-                else:
+            samples, provided = read_enrollment_samples(data)
+            if provided:
+                face_encoding = encode_samples(samples)
+                if not face_encoding:
                     return jsonify({'error': 'No face detected in image'}), 400
             else:
                 face_encoding = None
@@ -305,12 +856,56 @@ def manage_family_members():
                 photo_url,
                 notes
             )
+            if success:
+                frame_cache.invalidate(patient_id)
 
             return jsonify({'success': success, 'message': message})
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/family-members/<member_id>', methods=['DELETE'])
+def remove_family_member(member_id):
+    """Remove a family member"""
+    try:
+        patient_id = request.args.get('patient_id')
+        success, message = action_router.relationship_cueing.remove_family_member(
+            patient_id,
+            member_id
+        )
+        if success:
+            frame_cache.invalidate(patient_id)
+        return jsonify({'success': success, 'message': message})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/family-members/<member_id>/samples', methods=['POST'])
+def add_family_member_samples(member_id):
+    """
+    Enroll more photos or a short video clip for an existing family member
+    """
+    try:
+        data = request_params()
+        samples, provided = read_enrollment_samples(data)
+        if not provided:
+            return jsonify({'error': 'No image or video provided'}), 400
+
+        face_encodings = encode_samples(samples)
+        if not face_encodings:
+            return jsonify({'error': 'No face detected in the upload'}), 400
+
+        success, message = action_router.relationship_cueing.add_face_samples(
+            data.get('patient_id'),
+            member_id,
+            face_encodings
+        )
+        if success:
+            frame_cache.invalidate(data.get('patient_id'))
+        return jsonify({'success': success, 'message': message, 'samples': len(face_encodings)})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/alerts', methods=['GET'])
 def get_alerts():
     """Get alerts for a patient"""
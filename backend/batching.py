@@ -0,0 +1,103 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class DynamicBatcher:
+    """
+    Collects requests from many threads into batches for a single worker.
+    A batch is dispatched once max_batch_size items are waiting or the oldest
+    item has waited max_wait seconds. Each caller gets its own result back
+    through a Future.
+    """
+
+    def __init__(self, process_batch, max_batch_size=8, max_wait=0.02, name='batcher'):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self.failures = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.total_busy = 0.0
+        self.batch_sizes = Counter()
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        """
+        Queue one item for the next batch.
+        Returns: concurrent.futures.Future resolving to the item's result
+        """
+        future = Future()
+        self.queue.put((item, future, time.monotonic()))
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return future
+
+    def __call__(self, item, timeout=None):
+        """
+        Submit an item and block until its result is ready.
+        Returns: result for item
+        """
+        return self.submit(item).result(timeout)
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            try:
+                results = self.process_batch([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                print(f"Batch processing error: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                with self._lock:
+                    self.failures += len(batch)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.batch_sizes[len(batch)] += 1
+                self.total_wait += sum(started - queued for _, _, queued in batch)
+                self.total_busy += time.monotonic() - started
+
+    def stats(self):
+        """
+        Returns: dict with queue depth, batch-size distribution and timing
+        """
+        with self._lock:
+            return {
+                'queue_depth': self.queue.qsize(),
+                'max_queue_depth': self.max_queue_depth,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self.batches,
+                'items': self.items,
+                'failures': self.failures,
+                'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+                'batch_sizes': {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                'mean_queue_wait_ms': 1000 * self.total_wait / self.items if self.items else 0.0,
+                'mean_batch_ms': 1000 * self.total_busy / self.batches if self.batches else 0.0
+            }
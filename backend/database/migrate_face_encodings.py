@@ -0,0 +1,61 @@
+"""
+Convert legacy jsonb `family_members.face_encoding` lists into the binary
+`face_embedding` column.
+
+Usage: python -m backend.database.migrate_face_encodings [--dtype float16] [--clear-legacy]
+"""
+import argparse
+import os
+from dotenv import load_dotenv
+from supabase import create_client
+
+from backend.face_recognition.embedding_format import from_db_value, to_db_value
+
+
+def migrate(db, dtype='float32', clear_legacy=False, batch_size=500):
+    """
+    Rewrite every row that has a legacy encoding but no binary embedding.
+    Returns: (migrated count, failed count)
+    """
+    migrated = 0
+    failed = 0
+
+    while True:
+        # Converted rows drop out of the filter, so only rows that failed are skipped.
+        result = db.table('family_members').select('id, face_encoding').is_('face_embedding', 'null').not_.is_('face_encoding', 'null').order('id').range(failed, failed + batch_size - 1).execute()
+        rows = result.data or []
+        if not rows:
+            break
+
+        for row in rows:
+            try:
+                encoding = from_db_value(row['face_encoding'])
+                update = {'face_embedding': to_db_value(encoding, dtype=dtype)}
+                if clear_legacy:
+                    update['face_encoding'] = None
+                db.table('family_members').update(update).eq('id', row['id']).execute()
+                migrated += 1
+            except Exception as e:
+                print(f"Error migrating family member {row['id']}: {e}")
+                failed += 1
+
+        if len(rows) < batch_size:
+            break
+
+    return migrated, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dtype', choices=['float32', 'float16'], default='float32')
+    parser.add_argument('--clear-legacy', action='store_true', help='null out face_encoding after conversion')
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = create_client(os.getenv('VITE_SUPABASE_URL'), os.getenv('VITE_SUPABASE_ANON_KEY'))
+    migrated, failed = migrate(db, dtype=args.dtype, clear_legacy=args.clear_legacy)
+    print(f"Migrated {migrated} family members ({failed} failed).")
+
+
+if __name__ == '__main__':
+    main()
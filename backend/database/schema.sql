@@ -29,7 +29,8 @@
   - `patient_id` (uuid, foreign key)
   - `name` (text)
   - `relationship` (text)
-  - `face_encoding` (jsonb) - stores face recognition embeddings
+  - `face_encoding` (jsonb) - legacy face recognition embeddings as a list of floats
+  - `face_embedding` (bytea) - face recognition embeddings in the versioned binary format
   - `photo_url` (text, optional)
   - `notes` (text, optional)
   - `last_interaction` (timestamptz, optional)
@@ -146,12 +147,15 @@ CREATE TABLE IF NOT EXISTS family_members (
   name text NOT NULL,
   relationship text NOT NULL,
   face_encoding jsonb,
+  face_embedding bytea,
   photo_url text,
   notes text,
   last_interaction timestamptz,
   created_at timestamptz DEFAULT now()
 );
 
+ALTER TABLE family_members ADD COLUMN IF NOT EXISTS face_embedding bytea;
+
 ALTER TABLE family_members ENABLE ROW LEVEL SECURITY;
 
 CREATE POLICY "Authenticated users can read family_members"
@@ -0,0 +1,212 @@
+import argparse
+import json
+import struct
+import numpy as np
+
+# Layout: fixed header, JSON manifest, then each array aligned to
+# DATA_ALIGNMENT bytes. The manifest records every array's dtype, shape and
+# offset so the whole file can be memory-mapped and sliced without copying.
+MAGIC = b'SERF'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBxxxI')
+DATA_ALIGNMENT = 64
+
+
+class CompiledModelError(ValueError):
+    """
+    Raised when a file is not a readable compiled emotion model.
+    """
+
+
+def _align(offset):
+    return -(-offset // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+
+def write_arrays(path, arrays, metadata):
+    """
+    Write named arrays plus JSON metadata into one memory-mappable file.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    manifest = {'metadata': metadata, 'arrays': {}}
+
+    for name, array in arrays.items():
+        manifest['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': 0}
+
+    # Offsets depend on the manifest length, which depends on the offsets;
+    # iterate until the layout is stable.
+    manifest_bytes = b''
+    while True:
+        offset = _align(HEADER.size + len(manifest_bytes))
+        for name, array in arrays.items():
+            manifest['arrays'][name]['offset'] = offset
+            offset = _align(offset + array.nbytes)
+        encoded = json.dumps(manifest, separators=(',', ':')).encode('utf-8')
+        if encoded == manifest_bytes:
+            break
+        manifest_bytes = encoded
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(manifest_bytes)))
+        f.write(manifest_bytes)
+        for name, array in arrays.items():
+            f.write(b'\0' * (manifest['arrays'][name]['offset'] - f.tell()))
+            f.write(array.tobytes())
+
+
+def read_arrays(path, mmap=True):
+    """
+    Open a file written by write_arrays.
+    Returns: (dict of name -> read-only array view, metadata dict)
+    """
+    buffer = np.memmap(path, dtype=np.uint8, mode='r') if mmap else np.fromfile(path, dtype=np.uint8)
+    if len(buffer) < HEADER.size:
+        raise CompiledModelError(f"{path} is too short to be a compiled model")
+    magic, version, manifest_len = HEADER.unpack(buffer[:HEADER.size].tobytes())
+    if magic != MAGIC:
+        raise CompiledModelError(f"{path} is not a compiled emotion model")
+    if version != FORMAT_VERSION:
+        raise CompiledModelError(f"Unsupported compiled model version {version}")
+
+    manifest = json.loads(buffer[HEADER.size:HEADER.size + manifest_len].tobytes())
+    arrays = {}
+    for name, spec in manifest['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=spec['offset']).reshape(spec['shape'])
+    return arrays, manifest['metadata']
+
+
+def export_model(model, scaler, path, emotions):
+    """
+    Flatten a fitted RandomForestClassifier and StandardScaler into a compiled
+    model file. All trees share one node table; leaves point at themselves
+    with an always-true split so every tree can be walked for max_depth steps
+    in lockstep. Leaf values are stored already normalised the way
+    DecisionTreeClassifier.predict_proba normalises them.
+    """
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        leaf = tree.children_left == -1
+        node_ids = np.arange(n) + offset
+
+        features.append(np.where(leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(leaf, np.inf, tree.threshold).astype(np.float64))
+        lefts.append(np.where(leaf, node_ids, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(leaf, node_ids, tree.children_right + offset).astype(np.int32))
+
+        proba = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(proba / normalizer)
+
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        'scaler_mean': np.asarray(scaler.mean_, dtype=np.float64),
+        'scaler_scale': np.asarray(scaler.scale_, dtype=np.float64),
+        'classes': np.asarray(model.classes_, dtype=np.int64),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'value': np.concatenate(values),
+    }
+    metadata = {
+        'emotions': list(emotions),
+        'feature_version': getattr(model, 'feature_version', 1),
+        'max_depth': int(max_depth),
+        'n_trees': len(roots),
+    }
+    write_arrays(path, arrays, metadata)
+
+
+class CompiledScaler:
+    """
+    StandardScaler.transform over the exported mean and scale.
+    """
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+class CompiledForest:
+    """
+    Vectorised random-forest predictor over a compiled model file. All trees
+    are walked together, one level per step; features are compared as
+    float32 against float64 thresholds and per-tree probabilities are summed
+    in tree order, exactly as scikit-learn does, so labels and probabilities
+    match the original model bit for bit.
+    """
+
+    def __init__(self, arrays, metadata):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.classes_ = arrays['classes']
+        self.scaler = CompiledScaler(arrays['scaler_mean'], arrays['scaler_scale'])
+        self.emotions = metadata['emotions']
+        self.feature_version = metadata['feature_version']
+        self.max_depth = metadata['max_depth']
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        arrays, metadata = read_arrays(path, mmap=mmap)
+        return cls(arrays, metadata)
+
+    def apply(self, X):
+        """
+        Leaf node of every tree for every row of scaled features.
+        Returns: (n_samples, n_trees) int array of node ids
+        """
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        proba = np.zeros((len(leaves), self.value.shape[1]), dtype=np.float64)
+        for tree in range(leaves.shape[1]):
+            proba += self.value[leaves[:, tree]]
+        proba /= leaves.shape[1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def main():
+    import joblib
+    parser = argparse.ArgumentParser(description="Compile a trained emotion model for fast loading")
+    parser.add_argument('--model', default='ser_model.pkl')
+    parser.add_argument('--scaler', default='ser_scaler.pkl')
+    parser.add_argument('--out', default='ser_model.forest')
+    args = parser.parse_args()
+
+    from backend.emotion_recognition.train_model import EMOTIONS
+    export_model(joblib.load(args.model), joblib.load(args.scaler), args.out, EMOTIONS)
+    print(f"Compiled model written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import functools
+import librosa
+import numpy as np
+
+# Bump whenever the feature definition changes; models trained on another
+# version must be retrained.
+FEATURE_VERSION = 2
+
+SAMPLE_RATE = 16000
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 13
+
+# Pitch is tracked at 8 kHz, which is plenty for a 65-400 Hz speaking voice.
+PITCH_RATE = 8000
+PITCH_FMIN = 65.0
+PITCH_FMAX = 400.0
+PITCH_WINDOW = 256
+PITCH_HOP = 128
+YIN_THRESHOLD = 0.15
+
+
+def load_audio(audio_path):
+    """
+    Decode an audio file to 16 kHz mono float32.
+    Returns: numpy array
+    """
+    y, _ = librosa.load(audio_path, sr=SAMPLE_RATE)
+    return y
+
+
+@functools.lru_cache(maxsize=4)
+def _mel_basis(sr):
+    return librosa.filters.mel(sr=sr, n_fft=N_FFT)
+
+
+@functools.lru_cache(maxsize=4)
+def _lowpass(factor, taps=31):
+    n = np.arange(taps) - (taps - 1) / 2
+    h = np.sinc(0.8 * n / factor) * np.hamming(taps)
+    return (h / h.sum()).astype(np.float32)
+
+
+def decimate(y, factor):
+    """
+    Low-pass filter and keep every factor-th sample.
+    Returns: float32 numpy array
+    """
+    if factor <= 1:
+        return y
+    return np.convolve(y, _lowpass(factor), mode='same')[::factor]
+
+
+def yin_pitch(y, sr=PITCH_RATE, fmin=PITCH_FMIN, fmax=PITCH_FMAX, window=PITCH_WINDOW,
+              hop=PITCH_HOP, threshold=YIN_THRESHOLD):
+    """
+    Frame-wise YIN fundamental frequency estimate, vectorised over frames.
+    A frame is voiced when its cumulative mean normalised difference dips
+    below threshold inside the [fmin, fmax] lag range.
+    Returns: (f0 per frame in Hz, voiced mask)
+    """
+    tau_min = int(sr / fmax)
+    tau_max = int(np.ceil(sr / fmin))
+    frame_length = window + tau_max + 1
+    if len(y) < frame_length:
+        y = np.pad(y, (0, frame_length - len(y)))
+    frames = np.lib.stride_tricks.sliding_window_view(y, frame_length)[::hop].astype(np.float64)
+
+    # r(tau) = sum_j x[j] * x[j + tau] over the first `window` samples, via FFT.
+    n_fft = 1 << int(np.ceil(np.log2(2 * frame_length)))
+    spectrum = np.fft.rfft(frames, n_fft, axis=1)
+    head = np.fft.rfft(frames[:, :window], n_fft, axis=1)
+    r = np.fft.irfft(spectrum * np.conj(head), n_fft, axis=1)[:, :tau_max + 1]
+
+    energy = np.cumsum(np.square(frames), axis=1)
+    energy = np.concatenate([np.zeros((len(frames), 1)), energy], axis=1)
+    taus = np.arange(tau_max + 1)
+    shifted = energy[:, taus + window] - energy[:, taus]
+    diff = np.maximum(shifted[:, :1] + shifted - 2 * r, 0.0)
+
+    cmnd = np.ones_like(diff)
+    cumulative = np.cumsum(diff[:, 1:], axis=1)
+    cmnd[:, 1:] = diff[:, 1:] * taus[1:] / np.maximum(cumulative, 1e-12)
+
+    # First dip below threshold that is a local minimum within the lag range.
+    search = cmnd[:, tau_min:tau_max]
+    is_dip = (search[:, :-1] < threshold) & (search[:, :-1] <= search[:, 1:])
+    voiced = is_dip.any(axis=1) & (shifted[:, 0] > 1e-6)
+    tau = np.argmax(is_dip, axis=1) + tau_min
+
+    # Parabolic interpolation around the chosen lag.
+    rows = np.arange(len(frames))
+    left = cmnd[rows, np.maximum(tau - 1, 0)]
+    centre = cmnd[rows, tau]
+    right = cmnd[rows, np.minimum(tau + 1, tau_max)]
+    denominator = left - 2 * centre + right
+    offset = np.where(np.abs(denominator) > 1e-12, 0.5 * (left - right) / np.where(denominator == 0, 1, denominator), 0.0)
+    f0 = sr / (tau + np.clip(offset, -1, 1))
+    return np.where(voiced, f0, 0.0), voiced
+
+
+def feature_sums(y, sr=SAMPLE_RATE):
+    """
+    Additive per-frame statistics of one block of audio: one power spectrogram
+    gives the MFCC and RMS sums, YIN on decimated audio gives the voiced pitch
+    sum. Sums of consecutive blocks combine by addition, which lets a stream
+    be summarised window by window without keeping the audio.
+    Returns: float64 numpy array [mfcc sums..., frames, pitch sum, voiced frames, energy sum]
+    """
+    y = np.asarray(y, dtype=np.float32)
+    power = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH)) ** 2
+
+    mfccs = librosa.feature.mfcc(S=librosa.power_to_db(_mel_basis(sr) @ power), n_mfcc=N_MFCC)
+
+    # RMS from the same spectrogram (Parseval), matching librosa.feature.rms(S=...).
+    rms = np.sqrt(2 * np.sum(power[1:-1], axis=0) + power[0] + power[-1]) / N_FFT
+
+    f0, voiced = yin_pitch(decimate(y, sr // PITCH_RATE), sr=sr // (sr // PITCH_RATE))
+
+    return np.hstack([mfccs.sum(axis=1), mfccs.shape[1], f0[voiced].sum(), voiced.sum(), rms.sum()])
+
+
+def features_from_sums(sums):
+    """
+    Turn (possibly combined) feature_sums into the model's feature vector.
+    Returns: 1-D float numpy array of length N_MFCC + 2
+    """
+    mfcc_sums, frames, pitch_sum, voiced, energy_sum = (
+        sums[:N_MFCC], sums[N_MFCC], sums[N_MFCC + 1], sums[N_MFCC + 2], sums[N_MFCC + 3]
+    )
+    frames = max(frames, 1)
+    pitch_mean = pitch_sum / voiced if voiced else 0.0
+    return np.hstack([mfcc_sums / frames, pitch_mean, energy_sum / frames])
+
+
+def extract_features(y, sr=SAMPLE_RATE):
+    """
+    Emotion features of a whole clip: 13 MFCC means, mean voiced pitch and
+    mean RMS energy. Shared by training and inference so both always see
+    identical features.
+    Returns: 1-D float numpy array of length N_MFCC + 2
+    """
+    return features_from_sums(feature_sums(y, sr))
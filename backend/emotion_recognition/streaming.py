@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+from backend.emotion_recognition.features import SAMPLE_RATE, feature_sums, features_from_sums
+from backend.voice_interaction.audio_io import PcmStream
+
+
+class StreamingEmotionTracker:
+    """
+    Emotion time series over an audio stream of any length. Audio is cut into
+    hop-sized blocks; each block is reduced to additive feature sums as soon as
+    it is complete, and a window is the sum of its last few blocks, so memory
+    stays bounded by one block of samples plus one window of sums. Window
+    probabilities are smoothed with an exponential moving average, and
+    on_stress fires as soon as a single window's 'stressed' probability
+    reaches stress_threshold (re-arming once it falls below rearm_threshold).
+    """
+
+    def __init__(self, analyzer, window=3.0, hop=1.0, smoothing=0.4, stress_threshold=0.6,
+                 rearm_threshold=None, on_stress=None, sample_rate=SAMPLE_RATE, channels=1, context=None):
+        self.analyzer = analyzer
+        self.block_size = int(hop * SAMPLE_RATE)
+        self.blocks = deque(maxlen=max(1, int(round(window / hop))))
+        self.smoothing = smoothing
+        self.stress_threshold = stress_threshold
+        self.rearm_threshold = stress_threshold * 0.75 if rearm_threshold is None else rearm_threshold
+        self.on_stress = on_stress
+        self.context = context or {}
+        self.pcm = PcmStream(sample_rate, channels)
+        self.buffer = np.empty(self.block_size, dtype=np.float32)
+        self.filled = 0
+        self.position = 0
+        self.smoothed = None
+        self.armed = True
+        self.windows = 0
+        self.triggers = 0
+        self.last_active = time.monotonic()
+        self._lock = threading.Lock()
+
+    def feed_pcm(self, pcm_bytes):
+        """
+        Process a chunk of raw little-endian 16-bit PCM.
+        Returns: list of window results completed by this chunk
+        """
+        return self.feed(self.pcm.decode(pcm_bytes))
+
+    def feed(self, samples):
+        """
+        Process 16 kHz float32 samples.
+        Returns: list of window results completed by these samples
+        """
+        with self._lock:
+            self.last_active = time.monotonic()
+            results = []
+            offset = 0
+            while offset < len(samples):
+                take = min(self.block_size - self.filled, len(samples) - offset)
+                self.buffer[self.filled:self.filled + take] = samples[offset:offset + take]
+                self.filled += take
+                offset += take
+                if self.filled == self.block_size:
+                    self._close_block(self.buffer)
+                    if len(self.blocks) == self.blocks.maxlen:
+                        results.append(self._window())
+            return results
+
+    def finish(self):
+        """
+        End of stream: fold in the final partial block (if at least a quarter
+        of a hop long) and report a last window if none was reported yet or
+        new audio arrived since the last one.
+        Returns: list of window results
+        """
+        with self._lock:
+            new_audio = self.filled >= self.block_size // 4
+            if new_audio:
+                self._close_block(self.buffer[:self.filled])
+            self.filled = 0
+            if self.blocks and (new_audio or not self.windows):
+                return [self._window()]
+            return []
+
+    def _close_block(self, samples):
+        self.blocks.append((feature_sums(samples), len(samples)))
+        self.position += len(samples)
+        self.filled = 0
+
+    def _window(self):
+        features = features_from_sums(np.sum([sums for sums, _ in self.blocks], axis=0))
+        probabilities = self.analyzer.emotion_probabilities(features.reshape(1, -1))[0]
+
+        if self.smoothed is None:
+            self.smoothed = dict(probabilities)
+        else:
+            self.smoothed = {
+                emotion: self.smoothing * p + (1 - self.smoothing) * self.smoothed.get(emotion, 0.0)
+                for emotion, p in probabilities.items()
+            }
+
+        stressed = probabilities.get('stressed', 0.0)
+        triggered = False
+        if self.armed and stressed >= self.stress_threshold:
+            self.armed = False
+            triggered = True
+        elif not self.armed and stressed < self.rearm_threshold:
+            self.armed = True
+
+        end = self.position / SAMPLE_RATE
+        result = {
+            'start': end - sum(n for _, n in self.blocks) / SAMPLE_RATE,
+            'end': end,
+            'emotion': max(self.smoothed, key=self.smoothed.get),
+            'probabilities': probabilities,
+            'smoothed': dict(self.smoothed),
+            'stress_triggered': triggered
+        }
+        self.windows += 1
+        if triggered:
+            self.triggers += 1
+            if self.on_stress:
+                self.on_stress(self, result)
+        return result
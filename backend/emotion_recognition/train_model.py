@@ -1,58 +1,190 @@
 # emotion_detection/train_model.py
+import argparse
+import hashlib
 import os
-import librosa
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
 import joblib
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from backend.emotion_recognition.compiled_forest import export_model
+from backend.emotion_recognition.features import FEATURE_VERSION, extract_features, load_audio
+
 # Define emotions and paths
 EMOTIONS = ['neutral', 'calm', 'stressed', 'sad']
 DATA_PATH = os.path.join(os.path.dirname(__file__), "sample_data")
+CACHE_NAME = '.feature_cache.npz'
+COMPILED_PATH = 'ser_model.forest'
 
 
-def extract_features_from_folder(folder_path):
-    features_list = []
-    labels_list = []
+def list_samples(folder_path):
+    """
+    Find the WAV files under <folder>/<emotion>/.
+    Returns: list of (path, label index)
+    """
+    samples = []
     for idx, emotion in enumerate(EMOTIONS):
         emotion_folder = os.path.join(folder_path, emotion)
         if not os.path.exists(emotion_folder):
             continue
-        for file in os.listdir(emotion_folder):
+        for file in sorted(os.listdir(emotion_folder)):
             if file.endswith('.wav'):
-                audio_path = os.path.join(emotion_folder, file)
-                y, sr = librosa.load(audio_path, sr=16000)
-                mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-                mfccs_mean = np.mean(mfccs.T, axis=0)
-                pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-                pitch_mean = np.mean(pitches[pitches > 0]) if np.any(pitches > 0) else 0
-                energy = np.mean(librosa.feature.rms(y=y))
-                features = np.hstack([mfccs_mean, pitch_mean, energy])
-                features_list.append(features)
-                labels_list.append(idx)
-    return np.array(features_list), np.array(labels_list)
-
-# Load data
-X, y = extract_features_from_folder(DATA_PATH)
-print(f"Extracted {X.shape[0]} samples with {X.shape[1]} features each.")
-
-# Scale features
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-# Train/test split
-X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
-
-# Train Random Forest classifier
-clf = RandomForestClassifier(n_estimators=100, random_state=42)
-clf.fit(X_train, y_train)
-
-# Evaluate
-accuracy = clf.score(X_test, y_test)
-print(f"Validation Accuracy: {accuracy*100:.2f}%")
-
-# Save model and scaler
-joblib.dump(clf, 'ser_model.pkl')
-joblib.dump(scaler, 'ser_scaler.pkl')
-print("Model and scaler saved as 'ser_model.pkl' and 'ser_scaler.pkl'.")
+                samples.append((os.path.join(emotion_folder, file), idx))
+    return samples
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_file_features(audio_path):
+    return extract_features(load_audio(audio_path))
+
+
+def load_feature_cache(cache_path):
+    """
+    Load cached feature rows, discarding the cache if it was written by a
+    different feature extractor version.
+    Returns: dict of file digest -> feature row
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with np.load(cache_path) as cache:
+            if int(cache['feature_version']) != FEATURE_VERSION:
+                print(f"Feature cache is version {int(cache['feature_version'])}, extractor is {FEATURE_VERSION}; rebuilding")
+                return {}
+            return dict(zip(cache['digests'].tolist(), cache['features']))
+    except Exception as e:
+        print(f"Error reading feature cache {cache_path}: {e}")
+        return {}
+
+
+def save_feature_cache(cache_path, cache):
+    tmp_path = cache_path + '.tmp.npz'
+    digests = sorted(cache)
+    np.savez(
+        tmp_path,
+        feature_version=np.int32(FEATURE_VERSION),
+        digests=np.array(digests, dtype='U64'),
+        features=np.array([cache[d] for d in digests], dtype=np.float64).reshape(len(digests), -1)
+    )
+    os.replace(tmp_path, cache_path)
+
+
+def build_feature_matrix(folder_path, cache_path=None, workers=None):
+    """
+    Features for every sample in folder_path. Files whose content hash is
+    already in the cache are not decoded again; the rest are extracted in a
+    process pool and added to the cache.
+    Returns: (X, y, summary dict)
+    """
+    samples = list_samples(folder_path)
+    digests = [file_digest(path) for path, _ in samples]
+    cache = load_feature_cache(cache_path)
+
+    missing = sorted({d: path for (path, _), d in zip(samples, digests) if d not in cache}.items())
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for (digest, path), features in zip(missing, pool.map(extract_file_features, [p for _, p in missing], chunksize=4)):
+                cache[digest] = features
+        if cache_path:
+            save_feature_cache(cache_path, {d: cache[d] for d in set(digests)})
+
+    X = np.array([cache[d] for d in digests])
+    y = np.array([label for _, label in samples])
+    return X, y, {'samples': len(samples), 'extracted': len(missing), 'cached': len(set(digests)) - len(missing)}
+
+
+def make_classifier(n_estimators=100, n_jobs=None, random_state=42):
+    return RandomForestClassifier(n_estimators=n_estimators, n_jobs=n_jobs, random_state=random_state)
+
+
+def cross_validate(X, y, folds=5, n_estimators=100, n_jobs=None, random_state=42):
+    """
+    Stratified k-fold accuracy, with the scaler fitted inside each fold.
+    Returns: array of per-fold accuracies
+    """
+    pipeline = make_pipeline(StandardScaler(), make_classifier(n_estimators, n_jobs, random_state))
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state)
+    return cross_val_score(pipeline, X, y, cv=splitter)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the voice emotion classifier")
+    parser.add_argument('--data', default=DATA_PATH, help='folder with one sub-folder of WAVs per emotion')
+    parser.add_argument('--cache', help=f'feature cache path (default <data>/{CACHE_NAME})')
+    parser.add_argument('--no-cache', action='store_true', help='extract everything and do not write a cache')
+    parser.add_argument('--workers', type=int, help='feature extraction processes (default: CPU count)')
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--n-jobs', type=int, default=None, help='RandomForestClassifier n_jobs')
+    parser.add_argument('--cv', type=int, default=0, help='run k-fold cross-validation before the final fit')
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--model-out', default='ser_model.pkl')
+    parser.add_argument('--scaler-out', default='ser_scaler.pkl')
+    parser.add_argument('--compiled-out', default=COMPILED_PATH,
+                        help="compiled model for fast loading ('' to skip)")
+    args = parser.parse_args()
+
+    cache_path = None if args.no_cache else (args.cache or os.path.join(args.data, CACHE_NAME))
+
+    # Load data
+    start = time.perf_counter()
+    X, y, summary = build_feature_matrix(args.data, cache_path, args.workers)
+    if not len(X):
+        print(f"No training samples found under {args.data}")
+        return
+    print(f"Extracted {X.shape[0]} samples with {X.shape[1]} features each "
+          f"({summary['extracted']} extracted, {summary['cached']} from cache, {time.perf_counter() - start:.1f}s).")
+
+    if args.cv:
+        scores = cross_validate(X, y, args.cv, args.n_estimators, args.n_jobs, args.seed)
+        print(f"{args.cv}-fold CV accuracy: {scores.mean()*100:.2f}% ± {scores.std()*100:.2f}%")
+
+    # Scale features
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    # Train/test split
+    if args.test_size > 0:
+        X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=args.test_size, random_state=args.seed)
+    else:
+        X_train, y_train = X_scaled, y
+
+    # Train Random Forest classifier
+    start = time.perf_counter()
+    clf = make_classifier(args.n_estimators, args.n_jobs, args.seed)
+    clf.fit(X_train, y_train)
+    print(f"Fitted {args.n_estimators} trees in {time.perf_counter() - start:.1f}s.")
+
+    # Evaluate
+    if args.test_size > 0:
+        accuracy = clf.score(X_test, y_test)
+        print(f"Validation Accuracy: {accuracy*100:.2f}%")
+
+    # Save model and scaler; the analyzer checks the feature version on load
+    clf.feature_version = FEATURE_VERSION
+    clf.n_jobs = None  # single-clip inference gains nothing from a worker pool
+    joblib.dump(clf, args.model_out)
+    joblib.dump(scaler, args.scaler_out)
+    print(f"Model and scaler saved as '{args.model_out}' and '{args.scaler_out}'.")
+    if args.compiled_out:
+        export_model(clf, scaler, args.compiled_out, EMOTIONS)
+        print(f"Compiled model saved as '{args.compiled_out}'.")
+    elif os.path.exists(COMPILED_PATH):
+        print(f"'{COMPILED_PATH}' was not regenerated; the analyzer ignores it while it is older than the pickles.")
+
+
+if __name__ == '__main__':
+    main()
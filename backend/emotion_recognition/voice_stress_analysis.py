@@ -1,38 +1,127 @@
 # emotion_detection/voice_stress_analysis.py
-import librosa
-import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor
 import joblib
+import numpy as np
+from backend.emotion_recognition.compiled_forest import CompiledForest
+from backend.emotion_recognition.features import FEATURE_VERSION, extract_features, load_audio
+
+
+def clip_features(audio):
+    """
+    Feature row for one clip (path or samples); None if it cannot be read.
+    """
+    try:
+        return extract_features(load_audio(audio) if isinstance(audio, str) else audio)
+    except Exception as e:
+        print(f"Error extracting emotion features: {e}")
+        return None
+
+
+def is_stale(compiled_path, *sources):
+    """
+    Whether a compiled export is older than any of the files it was built from.
+    Returns: bool
+    """
+    built = os.path.getmtime(compiled_path)
+    return any(os.path.exists(source) and os.path.getmtime(source) > built for source in sources)
+
 
 class VoiceEmotionAnalyzer:
     """
     Analyze the emotion of an audio clip using a pre-trained ML model.
     """
 
-    def __init__(self, model_path='ser_model.pkl', scaler_path='ser_scaler.pkl'):
-        self.model = joblib.load(model_path)
-        self.scaler = joblib.load(scaler_path)
+    def __init__(self, model_path='ser_model.pkl', scaler_path='ser_scaler.pkl', compiled_path='ser_model.forest',
+                 workers=None):
         self.emotions = ['neutral', 'calm', 'stressed', 'sad']
 
-    def extract_features(self, audio_path):
+        # One pool for the analyzer's lifetime. Threads rather than processes:
+        # forking a server that holds model threads can deadlock, and spawned
+        # workers would re-import the app. Feature extraction is vectorised
+        # numpy, which releases the GIL for the heavy array work.
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='emotion-features') \
+            if self.workers > 1 else None
+
+        # The compiled export is memory-mapped and needs no scikit-learn import.
+        # It is skipped if the pickles were retrained after it was written.
+        use_compiled = compiled_path and os.path.exists(compiled_path)
+        if use_compiled and is_stale(compiled_path, model_path, scaler_path):
+            print(f"Warning: {compiled_path} is older than {model_path}; loading the pickled model instead. "
+                  f"Re-export it with train_model.py")
+            use_compiled = False
+        if use_compiled:
+            self.model = CompiledForest.load(compiled_path)
+            self.scaler = self.model.scaler
+            self.emotions = self.model.emotions
+        else:
+            self.model = joblib.load(model_path)
+            self.scaler = joblib.load(scaler_path)
+
+        model_version = getattr(self.model, 'feature_version', 1)
+        if model_version != FEATURE_VERSION:
+            print(f"Warning: emotion model was trained on feature version {model_version}, "
+                  f"extractor is version {FEATURE_VERSION}; retrain with train_model.py")
+
+    def extract_features(self, audio):
         """
-        Extract MFCCs, pitch, and energy features from audio.
+        Extract MFCCs, pitch, and energy features from audio, given as a file
+        path or as 16 kHz mono float32 samples already decoded in memory.
         Returns a 1xN numpy array suitable for ML model.
         """
-        y, sr = librosa.load(audio_path, sr=16000)
-        # MFCCs
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-        mfccs_mean = np.mean(mfccs.T, axis=0)
-        # Pitch
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-        pitch_mean = np.mean(pitches[pitches > 0]) if np.any(pitches > 0) else 0
-        # Energy
-        energy = np.mean(librosa.feature.rms(y=y))
-        # Combine features
-        features = np.hstack([mfccs_mean, pitch_mean, energy])
-        return features.reshape(1, -1)
-
-    def predict_emotion(self, audio_path):
-        features = self.extract_features(audio_path)
+        y = load_audio(audio) if isinstance(audio, str) else audio
+        return extract_features(y).reshape(1, -1)
+
+    def emotion_probabilities(self, features):
+        """
+        Class probabilities for each row of a feature matrix.
+        Returns: list of {emotion: probability} dicts
+        """
+        proba = self.model.predict_proba(self.scaler.transform(features))
+        labels = [self.emotions[index] for index in self.model.classes_]
+        return [dict(zip(labels, row.tolist())) for row in proba]
+
+    def predict_emotion(self, audio):
+        features = self.extract_features(audio)
         features_scaled = self.scaler.transform(features)
         prediction_index = self.model.predict(features_scaled)[0]
         return self.emotions[prediction_index]
+
+    def predict_with_confidence(self, audio):
+        """
+        Returns: (emotion, probability of that emotion)
+        """
+        probabilities = self.emotion_probabilities(self.extract_features(audio))[0]
+        emotion = max(probabilities, key=probabilities.get)
+        return emotion, probabilities[emotion]
+
+    def predict_batch(self, audios):
+        """
+        Score many clips (paths or samples) at once: features are extracted on
+        the analyzer's worker pool, then scaled and classified as one stacked
+        matrix.
+        Returns: list of (emotion, confidence, probabilities) per clip, or None
+        for clips that could not be read
+        """
+        if len(audios) > 1 and self.pool is not None:
+            rows = list(self.pool.map(clip_features, audios))
+        else:
+            rows = [clip_features(audio) for audio in audios]
+
+        results = [None] * len(audios)
+        valid = [i for i, row in enumerate(rows) if row is not None]
+        if valid:
+            probabilities = self.emotion_probabilities(np.vstack([rows[i] for i in valid]))
+            for i, clip_probabilities in zip(valid, probabilities):
+                emotion = max(clip_probabilities, key=clip_probabilities.get)
+                results[i] = (emotion, clip_probabilities[emotion], clip_probabilities)
+        return results
+
+    def close(self):
+        """
+        Shut down the feature extraction pool.
+        """
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
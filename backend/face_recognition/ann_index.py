@@ -0,0 +1,370 @@
+import json
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# Galleries below this many vectors are searched exactly.
+AUTO_BRUTE_LIMIT = 20000
+
+
+def _sq_distances(queries, vectors, sq_norms):
+    sq = np.einsum('ij,ij->i', queries, queries)[:, None] + sq_norms[None, :]
+    sq -= 2.0 * queries @ vectors.T
+    np.maximum(sq, 0.0, out=sq)
+    return sq
+
+
+def _merge_top_k(labels, distances, k):
+    order = np.argsort(distances, kind='stable')[:k]
+    return labels[order], distances[order]
+
+
+def _pad(labels, distances, k):
+    if len(labels) < k:
+        labels = np.concatenate([labels, np.full(k - len(labels), -1, dtype=np.int64)])
+        distances = np.concatenate([distances, np.full(k - len(distances), np.inf, dtype=np.float32)])
+    return labels, distances
+
+
+class BruteForceIndex:
+    """
+    Exact nearest-neighbour search over a growable float32 matrix. Removal swaps
+    the last row into the freed slot so storage stays contiguous.
+    """
+
+    kind = 'brute'
+
+    def __init__(self, dim=128, capacity=1024):
+        self.dim = dim
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+        self.sq_norms = np.empty(capacity, dtype=np.float32)
+        self.labels = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+        self.slots = {}
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        if needed <= len(self.vectors):
+            return
+        capacity = max(needed, 2 * len(self.vectors))
+        for name in ('vectors', 'sq_norms', 'labels'):
+            old = getattr(self, name)
+            grown = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self.size] = old[:self.size]
+            setattr(self, name, grown)
+
+    def add(self, labels, vectors):
+        """
+        Insert vectors under integer labels, replacing any existing vector with the same label.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        labels = [int(label) for label in labels]
+        self.remove([label for label in labels if label in self.slots])
+
+        self._reserve(len(labels))
+        start, end = self.size, self.size + len(labels)
+        self.vectors[start:end] = vectors
+        self.sq_norms[start:end] = np.einsum('ij,ij->i', vectors, vectors)
+        self.labels[start:end] = labels
+        for offset, label in enumerate(labels):
+            self.slots[label] = start + offset
+        self.size = end
+
+    def remove(self, labels):
+        for label in labels:
+            slot = self.slots.pop(int(label), None)
+            if slot is None:
+                continue
+            last = self.size - 1
+            if slot != last:
+                self.vectors[slot] = self.vectors[last]
+                self.sq_norms[slot] = self.sq_norms[last]
+                self.labels[slot] = self.labels[last]
+                self.slots[int(self.labels[slot])] = slot
+            self.size = last
+
+    def search(self, queries, k=1, chunk_size=64):
+        """
+        Find the k nearest stored vectors for each query.
+        Returns: (labels, distances) arrays of shape (queries, k), padded with -1 / inf
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        out_labels = np.full((len(queries), k), -1, dtype=np.int64)
+        out_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        if not self.size:
+            return out_labels, out_distances
+
+        kk = min(k, self.size)
+        vectors, sq_norms, labels = self.vectors[:self.size], self.sq_norms[:self.size], self.labels[:self.size]
+        for start in range(0, len(queries), chunk_size):
+            sq = _sq_distances(queries[start:start + chunk_size], vectors, sq_norms)
+            part = np.argpartition(sq, kk - 1, axis=1)[:, :kk] if kk < self.size else np.tile(np.arange(self.size), (len(sq), 1))
+            part_sq = np.take_along_axis(sq, part, axis=1)
+            order = np.argsort(part_sq, axis=1)
+            rows = slice(start, start + len(sq))
+            out_labels[rows, :kk] = labels[np.take_along_axis(part, order, axis=1)]
+            out_distances[rows, :kk] = np.sqrt(np.take_along_axis(part_sq, order, axis=1))
+        return out_labels, out_distances
+
+    def state(self):
+        return {
+            'vectors': self.vectors[:self.size],
+            'labels': self.labels[:self.size],
+        }
+
+    @classmethod
+    def from_state(cls, state, params):
+        index = cls(dim=params['dim'], capacity=max(1024, len(state['labels'])))
+        index.add(state['labels'], state['vectors'])
+        return index
+
+    def params(self):
+        return {'dim': self.dim}
+
+
+class IVFIndex:
+    """
+    Inverted-file index: vectors are bucketed by their nearest k-means centroid
+    and a query only scans the nprobe closest buckets.
+    """
+
+    kind = 'ivf'
+
+    def __init__(self, dim=128, nlist=256, nprobe=8):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = None
+        self.trained_size = 0
+        self.lists = []
+        self.owner = {}
+
+    def __len__(self):
+        return len(self.owner)
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def train(self, vectors, iterations=10, max_samples=None, seed=0):
+        """
+        Fit bucket centroids with k-means on (a sample of) the vectors.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        rng = np.random.default_rng(seed)
+        max_samples = max_samples or 64 * self.nlist
+        if len(vectors) > max_samples:
+            vectors = vectors[rng.choice(len(vectors), max_samples, replace=False)]
+
+        nlist = min(self.nlist, len(vectors))
+        centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _sq_distances(vectors, centroids, np.einsum('ij,ij->i', centroids, centroids)).argmin(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            counts = np.bincount(assignment, minlength=nlist)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        existing = [(label, lst.vectors[lst.slots[label]]) for lst in self.lists for label in lst.slots]
+        self.trained_size = len(vectors)
+        self.centroids = centroids
+        self.centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+        self.lists = [BruteForceIndex(self.dim, capacity=64) for _ in range(nlist)]
+        self.owner = {}
+        if existing:
+            self.add([label for label, _ in existing], [vector for _, vector in existing])
+
+    def add(self, labels, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        labels = np.asarray([int(label) for label in labels], dtype=np.int64)
+        if not self.is_trained:
+            self.train(vectors)
+
+        self.remove([label for label in labels if int(label) in self.owner])
+        assignment = _sq_distances(vectors, self.centroids, self.centroid_norms).argmin(axis=1)
+        for bucket in np.unique(assignment):
+            mask = assignment == bucket
+            self.lists[bucket].add(labels[mask], vectors[mask])
+            for label in labels[mask]:
+                self.owner[int(label)] = int(bucket)
+
+        # An index trained while small gets too few buckets; refit once it has grown.
+        if len(self.centroids) < self.nlist and len(self.owner) > 4 * self.trained_size:
+            self.train(self.state()['vectors'])
+
+    def remove(self, labels):
+        for label in labels:
+            bucket = self.owner.pop(int(label), None)
+            if bucket is not None:
+                self.lists[bucket].remove([label])
+
+    def search(self, queries, k=1):
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        out_labels = np.full((len(queries), k), -1, dtype=np.int64)
+        out_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        if not self.is_trained or not self.owner:
+            return out_labels, out_distances
+
+        nprobe = min(self.nprobe, len(self.lists))
+        probes = np.argsort(_sq_distances(queries, self.centroids, self.centroid_norms), axis=1)[:, :nprobe]
+        for i, query in enumerate(queries):
+            found_labels = []
+            found_distances = []
+            for bucket in probes[i]:
+                if not len(self.lists[bucket]):
+                    continue
+                labels, distances = self.lists[bucket].search(query, k)
+                found_labels.append(labels[0])
+                found_distances.append(distances[0])
+            if found_labels:
+                labels, distances = _merge_top_k(np.concatenate(found_labels), np.concatenate(found_distances), k)
+                out_labels[i], out_distances[i] = _pad(labels, distances, k)
+        return out_labels, out_distances
+
+    def state(self):
+        state = {
+            'centroids': self.centroids if self.is_trained else np.empty((0, self.dim), dtype=np.float32),
+            'vectors': np.empty((0, self.dim), dtype=np.float32),
+            'labels': np.empty(0, dtype=np.int64),
+        }
+        if self.owner:
+            parts = [lst.state() for lst in self.lists if len(lst)]
+            state['vectors'] = np.concatenate([p['vectors'] for p in parts])
+            state['labels'] = np.concatenate([p['labels'] for p in parts])
+        return state
+
+    @classmethod
+    def from_state(cls, state, params):
+        index = cls(dim=params['dim'], nlist=params['nlist'], nprobe=params['nprobe'])
+        if len(state['centroids']):
+            index.centroids = np.asarray(state['centroids'], dtype=np.float32)
+            index.centroid_norms = np.einsum('ij,ij->i', index.centroids, index.centroids)
+            index.trained_size = len(state['labels'])
+            index.lists = [BruteForceIndex(index.dim, capacity=64) for _ in range(len(index.centroids))]
+            if len(state['labels']):
+                index.add(state['labels'], state['vectors'])
+        return index
+
+    def params(self):
+        return {'dim': self.dim, 'nlist': self.nlist, 'nprobe': self.nprobe}
+
+
+class HNSWIndex:
+    """
+    Graph-based approximate search through the optional hnswlib package.
+    """
+
+    kind = 'hnsw'
+
+    def __init__(self, dim=128, max_elements=10000, M=16, ef_construction=200, ef=64):
+        if hnswlib is None:
+            raise ImportError("hnswlib is not installed; use the 'ivf' or 'brute' backend")
+        self.dim = dim
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef = ef
+        self.index = hnswlib.Index(space='l2', dim=dim)
+        self.index.init_index(max_elements=max_elements, ef_construction=ef_construction, M=M, allow_replace_deleted=True)
+        self.index.set_ef(ef)
+        self.present = set()
+
+    def __len__(self):
+        return len(self.present)
+
+    def add(self, labels, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        labels = [int(label) for label in labels]
+        needed = len(self.present | set(labels))
+        if needed > self.index.get_max_elements():
+            self.index.resize_index(max(needed, 2 * self.index.get_max_elements()))
+        self.index.add_items(vectors, labels, replace_deleted=True)
+        self.present.update(labels)
+
+    def remove(self, labels):
+        for label in labels:
+            if int(label) in self.present:
+                self.index.mark_deleted(int(label))
+                self.present.discard(int(label))
+
+    def search(self, queries, k=1):
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        out_labels = np.full((len(queries), k), -1, dtype=np.int64)
+        out_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        kk = min(k, len(self.present))
+        if kk:
+            labels, sq = self.index.knn_query(queries, k=kk)
+            out_labels[:, :kk] = labels
+            out_distances[:, :kk] = np.sqrt(sq)
+        return out_labels, out_distances
+
+    def state(self):
+        labels = np.asarray(sorted(self.present), dtype=np.int64)
+        vectors = np.asarray(self.index.get_items(labels), dtype=np.float32).reshape(-1, self.dim) if len(labels) else np.empty((0, self.dim), dtype=np.float32)
+        return {'vectors': vectors, 'labels': labels}
+
+    @classmethod
+    def from_state(cls, state, params):
+        index = cls(dim=params['dim'], max_elements=max(1024, len(state['labels'])), M=params['M'],
+                    ef_construction=params['ef_construction'], ef=params['ef'])
+        if len(state['labels']):
+            index.add(state['labels'], state['vectors'])
+        return index
+
+    def params(self):
+        return {'dim': self.dim, 'M': self.M, 'ef_construction': self.ef_construction, 'ef': self.ef}
+
+
+BACKENDS = {
+    BruteForceIndex.kind: BruteForceIndex,
+    IVFIndex.kind: IVFIndex,
+    HNSWIndex.kind: HNSWIndex,
+}
+
+
+def create_index(backend='auto', dim=128, expected_size=0, **options):
+    """
+    Create an embedding index. 'auto' picks exact search for small galleries and
+    hnsw (if installed) or ivf for large ones.
+    Returns: index instance
+    """
+    if backend == 'auto':
+        if expected_size < AUTO_BRUTE_LIMIT:
+            backend = 'brute'
+        else:
+            backend = 'hnsw' if hnswlib is not None else 'ivf'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown index backend: {backend}")
+    if backend == 'ivf' and 'nlist' not in options:
+        options['nlist'] = int(max(16, min(4096, 4 * np.sqrt(max(expected_size, 1)))))
+    if backend == 'hnsw':
+        options.setdefault('max_elements', max(1024, expected_size))
+    return BACKENDS[backend](dim=dim, **options)
+
+
+def save_index(index, path):
+    """
+    Persist an index to a single .npz file. Graph indexes are stored as their
+    vectors and rebuilt on load.
+    """
+    state = index.state()
+    with open(path, 'wb') as f:
+        np.savez(f, kind=np.array(index.kind), params=np.array(json.dumps(index.params())), **state)
+
+
+def load_index(path):
+    """
+    Load an index written by save_index.
+    Returns: index instance
+    """
+    with np.load(path, allow_pickle=False) as data:
+        kind = str(data['kind'])
+        params = json.loads(str(data['params']))
+        state = {name: data[name] for name in data.files if name not in ('kind', 'params')}
+    return BACKENDS[kind].from_state(state, params)
@@ -0,0 +1,91 @@
+import os
+import cv2
+import face_recognition
+
+DETECTION_MODELS = ('hog', 'cnn')
+
+
+class DetectionConfig:
+    """
+    How faces are located in uploaded images: the pixel budget of the downscaled
+    copy used for detection, the dlib detector model and its upsample count, and
+    the minimum resolution uploads are decoded at for encoding.
+    """
+
+    def __init__(self, max_pixels=640 * 480, model='hog', upsample=1, decode_pixels=1600 * 1200):
+        if model not in DETECTION_MODELS:
+            raise ValueError(f"Unknown detection model: {model}")
+        if int(max_pixels) <= 0:
+            raise ValueError("max_pixels must be positive")
+        if not 0 <= int(upsample) <= 4:
+            raise ValueError("upsample must be between 0 and 4")
+        self.max_pixels = int(max_pixels)
+        self.model = model
+        self.upsample = int(upsample)
+        self.decode_pixels = max(int(decode_pixels), self.max_pixels)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Deployment defaults from FACE_DETECTION_PIXELS, FACE_DETECTION_MODEL,
+        FACE_DETECTION_UPSAMPLE and FACE_DECODE_PIXELS.
+        """
+        return cls(
+            max_pixels=int(os.getenv('FACE_DETECTION_PIXELS', 640 * 480)),
+            model=os.getenv('FACE_DETECTION_MODEL', 'hog'),
+            upsample=int(os.getenv('FACE_DETECTION_UPSAMPLE', 1)),
+            decode_pixels=int(os.getenv('FACE_DECODE_PIXELS', 1600 * 1200))
+        )
+
+    def override(self, params):
+        """
+        Apply per-request detection_pixels, detection_model and upsample values.
+        Returns: new DetectionConfig
+        """
+        params = params or {}
+        return DetectionConfig(
+            max_pixels=params.get('detection_pixels', self.max_pixels),
+            model=params.get('detection_model', self.model),
+            upsample=params.get('upsample', self.upsample),
+            decode_pixels=self.decode_pixels
+        )
+
+
+def detection_scale(shape, max_pixels):
+    """
+    Scale factor that brings an image of the given shape within the pixel budget.
+    Returns: float no greater than 1.0
+    """
+    height, width = shape[:2]
+    pixels = height * width
+    if pixels <= max_pixels:
+        return 1.0
+    return (max_pixels / pixels) ** 0.5
+
+
+def detect_faces(rgb_image, config):
+    """
+    Detect faces on a downscaled copy of the image and map the boxes back to the
+    original resolution so encoding can use full-detail crops.
+    Returns: list of (top, right, bottom, left) in original image coordinates
+    """
+    scale = detection_scale(rgb_image.shape, config.max_pixels)
+    if scale < 1.0:
+        small = cv2.resize(rgb_image, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    else:
+        small = rgb_image
+
+    locations = face_recognition.face_locations(small, number_of_times_to_upsample=config.upsample, model=config.model)
+    if scale == 1.0:
+        return locations
+
+    height, width = rgb_image.shape[:2]
+    return [
+        (
+            max(0, int(top / scale)),
+            min(width, int(round(right / scale))),
+            min(height, int(round(bottom / scale))),
+            max(0, int(left / scale))
+        )
+        for top, right, bottom, left in locations
+    ]
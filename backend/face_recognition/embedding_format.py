@@ -0,0 +1,166 @@
+import json
+import struct
+import numpy as np
+
+# Layout: fixed header, JSON metadata, padding to DATA_ALIGNMENT, then count x dim
+# little-endian floats in row-major order.
+MAGIC = b'FEMB'
+FORMAT_VERSION = 2
+# Version 1 stored the metadata length as u16, which overflows once a saved
+# gallery's name list passes 64 KiB; it is still read for existing rows.
+HEADERS = {
+    1: struct.Struct('<4sBBHII'),
+    2: struct.Struct('<4sBBxxIII'),
+}
+HEADER = HEADERS[FORMAT_VERSION]
+DATA_ALIGNMENT = 16
+DEFAULT_MODEL = 'dlib_face_recognition_resnet_model_v1'
+
+DTYPE_CODES = {
+    'float32': 1,
+    'float16': 2,
+}
+CODE_DTYPES = {
+    1: np.dtype('<f4'),
+    2: np.dtype('<f2'),
+}
+
+
+class EmbeddingFormatError(ValueError):
+    """
+    Raised when a blob is not a readable embedding record.
+    """
+
+
+def _data_offset(metadata_len, header=HEADER):
+    unpadded = header.size + metadata_len
+    return -(-unpadded // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+
+def pack_embeddings(encodings, model=DEFAULT_MODEL, dtype='float32', metadata=None):
+    """
+    Serialize one or more encodings into the versioned binary format.
+    Returns: bytes
+    """
+    if dtype not in DTYPE_CODES:
+        raise EmbeddingFormatError(f"Unsupported embedding dtype: {dtype}")
+
+    matrix = np.asarray(encodings, dtype=CODE_DTYPES[DTYPE_CODES[dtype]])
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1) if matrix.size else matrix.reshape(0, 0)
+    if matrix.ndim != 2:
+        raise EmbeddingFormatError("Embeddings must be a vector or a 2-D matrix")
+    count, dim = matrix.shape
+
+    meta = dict(metadata or {})
+    meta['model'] = model
+    meta_bytes = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+
+    offset = _data_offset(len(meta_bytes))
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, DTYPE_CODES[dtype], len(meta_bytes), dim, count)
+    padding = b'\0' * (offset - HEADER.size - len(meta_bytes))
+    return header + meta_bytes + padding + np.ascontiguousarray(matrix).tobytes()
+
+
+def read_header(buffer):
+    """
+    Parse the header and metadata of an embedding record.
+    Returns: (metadata dict, numpy dtype, count, dim, data offset)
+    """
+    header = _header_for(buffer)
+    if len(buffer) < header.size:
+        raise EmbeddingFormatError("Embedding record is truncated")
+
+    _, _, dtype_code, meta_len, dim, count = header.unpack_from(buffer, 0)
+    if dtype_code not in CODE_DTYPES:
+        raise EmbeddingFormatError(f"Unknown embedding dtype code: {dtype_code}")
+
+    metadata = json.loads(bytes(buffer[header.size:header.size + meta_len]).decode('utf-8'))
+    return metadata, CODE_DTYPES[dtype_code], count, dim, _data_offset(meta_len, header)
+
+
+def _header_for(buffer):
+    """
+    Header layout of a record, from its magic and version bytes.
+    Returns: struct.Struct
+    """
+    if len(buffer) < 5:
+        raise EmbeddingFormatError("Embedding record is truncated")
+    if bytes(buffer[:4]) != MAGIC:
+        raise EmbeddingFormatError("Not an embedding record")
+    version = buffer[4]
+    if version not in HEADERS:
+        raise EmbeddingFormatError(f"Unsupported embedding format version: {version}")
+    return HEADERS[version]
+
+
+def unpack_embeddings(blob):
+    """
+    Deserialize a binary embedding record.
+    Returns: (float32 matrix of shape (count, dim), metadata dict)
+    """
+    metadata, dtype, count, dim, offset = read_header(blob)
+    matrix = np.frombuffer(blob, dtype=dtype, count=count * dim, offset=offset).reshape(count, dim)
+    return matrix.astype(np.float32), metadata
+
+
+def to_db_value(encodings, model=DEFAULT_MODEL, dtype='float32', metadata=None):
+    """
+    Encode embeddings for a Postgres bytea column sent through PostgREST.
+    Returns: hex string in bytea escape form
+    """
+    return '\\x' + pack_embeddings(encodings, model=model, dtype=dtype, metadata=metadata).hex()
+
+
+def from_db_value(value, with_metadata=False):
+    """
+    Decode an embedding column value. Accepts bytea hex strings, raw bytes and
+    the legacy jsonb list of floats.
+    Returns: float32 matrix of shape (count, dim), or None when empty;
+    with_metadata returns (matrix, metadata dict) instead
+    """
+    matrix, metadata = None, {}
+    if value is None or (hasattr(value, '__len__') and len(value) == 0):
+        pass
+    elif isinstance(value, str) and value.startswith('\\x'):
+        matrix, metadata = unpack_embeddings(bytes.fromhex(value[2:]))
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        matrix, metadata = unpack_embeddings(bytes(value))
+    else:
+        matrix = np.asarray(json.loads(value) if isinstance(value, str) else value, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+
+    return (matrix, metadata) if with_metadata else matrix
+
+
+def save_embedding_file(filepath, encodings, metadata=None, model=DEFAULT_MODEL, dtype='float32'):
+    """
+    Write embeddings to disk in the binary format.
+    """
+    with open(filepath, 'wb') as f:
+        f.write(pack_embeddings(encodings, model=model, dtype=dtype, metadata=metadata))
+
+
+def open_embedding_file(filepath, mmap=True):
+    """
+    Open an embedding file. With mmap the matrix is a read-only numpy.memmap in the
+    stored dtype and rows are paged in on demand instead of reading the whole file.
+    Returns: (matrix of shape (count, dim), metadata dict)
+    """
+    with open(filepath, 'rb') as f:
+        head = f.read(5)
+        header = _header_for(head)
+        head += f.read(header.size - len(head))
+        if len(head) < header.size:
+            raise EmbeddingFormatError("Embedding file is truncated")
+        meta_len = header.unpack(head)[3]
+        metadata, dtype, count, dim, offset = read_header(head + f.read(meta_len))
+
+        if not mmap or count == 0:
+            f.seek(offset)
+            matrix = np.fromfile(f, dtype=dtype, count=count * dim).reshape(count, dim)
+            return matrix.astype(np.float32, copy=False), metadata
+
+    matrix = np.memmap(filepath, dtype=dtype, mode='r', offset=offset, shape=(count, dim))
+    return matrix, metadata
@@ -1,16 +1,29 @@
 # app/face_recognition/embeddings.py
 
 import face_recognition
+import hashlib
+import json
 import os
 import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from embedding_format import save_embedding_file, open_embedding_file, DEFAULT_MODEL
+
+DEFAULT_EMBEDDINGS_PATH = "data/embeddings/known_faces.emb"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+MANIFEST_VERSION = 1
+
+def name_from_filename(filename):
+    return ''.join([c for c in os.path.splitext(filename)[0] if not c.isdigit()]).lower()
 
 def load_known_faces(directory="data/faces"):
     known_encodings = []
     known_names = []
 
     for filename in os.listdir(directory):
-        if filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-            name = ''.join([c for c in os.path.splitext(filename)[0] if not c.isdigit()]).lower()
+        if filename.lower().endswith(IMAGE_EXTENSIONS):
+            name = name_from_filename(filename)
             path = os.path.join(directory, filename)
             image = face_recognition.load_image_file(path)
             encodings = face_recognition.face_encodings(image)
@@ -23,12 +36,141 @@ def load_known_faces(directory="data/faces"):
 
     return known_encodings, known_names
 
-def save_embeddings(encodings, names, filepath="data/embeddings/known_faces.pkl"):
-    with open(filepath, "wb") as f:
-        pickle.dump((encodings, names), f)
+def save_embeddings(encodings, names, filepath=DEFAULT_EMBEDDINGS_PATH, dtype="float32"):
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    matrix = np.asarray(encodings, dtype=np.float32).reshape(len(names), -1) if len(names) else np.empty((0, 128), dtype=np.float32)
+    save_embedding_file(filepath, matrix, metadata={"names": list(names)}, model=DEFAULT_MODEL, dtype=dtype)
 
-def load_embeddings(filepath="data/embeddings/known_faces.pkl"):
+def load_embeddings(filepath=DEFAULT_EMBEDDINGS_PATH, mmap=True):
     if not os.path.exists(filepath):
-        return [], []
-    with open(filepath, "rb") as f:
-        return pickle.load(f)
+        legacy_path = os.path.splitext(filepath)[0] + ".pkl"
+        if not os.path.exists(legacy_path):
+            return [], []
+        filepath = legacy_path
+    if filepath.endswith(".pkl"):
+        # Galleries written before the binary format; re-save to migrate.
+        with open(filepath, "rb") as f:
+            encodings, names = pickle.load(f)
+        return np.asarray(encodings, dtype=np.float32).reshape(len(names), -1), names
+    encodings, metadata = open_embedding_file(filepath, mmap=mmap)
+    return encodings, metadata.get("names", [])
+
+def manifest_path_for(filepath):
+    return os.path.splitext(filepath)[0] + ".manifest.json"
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def encode_image_file(path):
+    """
+    Encode the first face in an image file. Runs in worker processes.
+    Returns: (path, encoding or None, error or None, seconds)
+    """
+    start = time.perf_counter()
+    try:
+        image = face_recognition.load_image_file(path)
+        encodings = face_recognition.face_encodings(image)
+        encoding = np.asarray(encodings[0], dtype=np.float32) if encodings else None
+        return path, encoding, None, time.perf_counter() - start
+    except Exception as e:
+        return path, None, str(e), time.perf_counter() - start
+
+def _encode_all(paths, workers):
+    if workers == 1 or len(paths) < 2:
+        yield from map(encode_image_file, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(encode_image_file, paths)
+
+def _load_manifest(manifest_path, encodings):
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    files = manifest.get("files", {})
+    # A manifest that no longer lines up with the embedding file is discarded.
+    rows = [entry["row"] for entry in files.values() if entry.get("row") is not None]
+    if any(row >= len(encodings) for row in rows):
+        return {}
+    return files
+
+def update_known_faces(directory="data/faces", filepath=DEFAULT_EMBEDDINGS_PATH, workers=None, full=False):
+    """
+    Incrementally rebuild the gallery from a directory of photos. Unchanged files
+    (same mtime and size, or same content hash) reuse their stored encoding, deleted
+    files are dropped and new or edited files are encoded across a process pool.
+    Returns: summary dict with encoded, skipped, failed and removed counts
+    """
+    manifest_path = manifest_path_for(filepath)
+    stored_encodings, _ = load_embeddings(filepath, mmap=False)
+    previous = {} if full else _load_manifest(manifest_path, stored_encodings)
+
+    by_digest = {}
+    for entry in previous.values():
+        by_digest.setdefault(entry["sha256"], entry)
+
+    entries = {}
+    encodings = {}
+    pending = []
+    skipped = 0
+
+    for filename in sorted(os.listdir(directory)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        path = os.path.join(directory, filename)
+        stat = os.stat(path)
+        entry = previous.get(filename)
+
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            digest = entry["sha256"]
+        else:
+            digest = file_digest(path)
+            entry = by_digest.get(digest)
+
+        if entry is None or entry["status"] == "error":
+            pending.append(path)
+            entries[filename] = {"sha256": digest, "mtime": stat.st_mtime, "size": stat.st_size}
+            continue
+
+        skipped += 1
+        entries[filename] = {"sha256": digest, "mtime": stat.st_mtime, "size": stat.st_size, "status": entry["status"]}
+        if entry.get("row") is not None:
+            encodings[filename] = stored_encodings[entry["row"]]
+
+    removed = len(set(previous) - set(entries))
+
+    encoded = 0
+    failed = 0
+    for path, encoding, error, seconds in _encode_all(pending, workers):
+        filename = os.path.basename(path)
+        if encoding is not None:
+            encoded += 1
+            entries[filename]["status"] = "ok"
+            encodings[filename] = encoding
+            print(f"  encoded  {filename} ({seconds * 1000:.0f} ms)")
+        else:
+            failed += 1
+            entries[filename]["status"] = "error" if error else "no_face"
+            print(f"  failed   {filename} ({seconds * 1000:.0f} ms): {error or 'no face found'}")
+
+    names = []
+    rows = []
+    for filename, entry in entries.items():
+        if filename in encodings:
+            entry["row"] = len(rows)
+            rows.append(encodings[filename])
+            names.append(name_from_filename(filename))
+        else:
+            entry["row"] = None
+
+    save_embeddings(rows, names, filepath)
+    with open(manifest_path, "w") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": entries}, f, indent=1)
+
+    return {"encoded": encoded, "skipped": skipped, "failed": failed, "removed": removed, "total": len(rows)}
@@ -1,12 +1,25 @@
 # encode_faces.py
 
-from embeddings import load_known_faces, save_embeddings
+import argparse
+import time
+from embeddings import update_known_faces, DEFAULT_EMBEDDINGS_PATH
 
 def main():
-    print("📸 Encoding known faces from 'data/faces'...")
-    encodings, names = load_known_faces()
-    save_embeddings(encodings, names)
-    print("Encodings saved to 'data/embeddings/known_faces.pkl'.")
+    parser = argparse.ArgumentParser(description="Encode known faces into the embedding gallery.")
+    parser.add_argument("--faces-dir", default="data/faces")
+    parser.add_argument("--output", default=DEFAULT_EMBEDDINGS_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="encoding processes (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and re-encode every image")
+    args = parser.parse_args()
+
+    print(f"📸 Encoding known faces from '{args.faces_dir}'...")
+    start = time.perf_counter()
+    summary = update_known_faces(args.faces_dir, args.output, workers=args.workers, full=args.full)
+    print(
+        f"Encoded {summary['encoded']}, skipped {summary['skipped']}, failed {summary['failed']}, "
+        f"removed {summary['removed']} in {time.perf_counter() - start:.1f}s."
+    )
+    print(f"{summary['total']} encodings saved to '{args.output}'.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,116 @@
+import heapq
+import cv2
+import face_recognition
+import numpy as np
+from backend.face_recognition.detection import detect_faces
+
+
+def face_quality(rgb_image, location):
+    """
+    Score a detected face by sharpness (variance of the Laplacian) weighted by size.
+    Returns: float, higher is better
+    """
+    top, right, bottom, left = location
+    crop = rgb_image[top:bottom, left:right]
+    if crop.size == 0:
+        return 0.0
+    gray = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY)
+    sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+    return float(sharpness * np.sqrt((bottom - top) * (right - left)))
+
+
+def select_best_frames(video_path, config, max_frames=8, sample_every=5):
+    """
+    Pick the sharpest, largest single-face frames from a short enrollment clip.
+    Returns: list of (rgb_frame, face_location), best first
+    """
+    video = cv2.VideoCapture(video_path)
+    best = []
+    index = 0
+
+    try:
+        while True:
+            ret, frame = video.read()
+            if not ret:
+                break
+            index += 1
+            if (index - 1) % sample_every:
+                continue
+
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            locations = detect_faces(rgb_frame, config)
+            if len(locations) != 1:
+                continue
+
+            score = face_quality(rgb_frame, locations[0])
+            entry = (score, index, rgb_frame, locations[0])
+            if len(best) < max_frames:
+                heapq.heappush(best, entry)
+            elif score > best[0][0]:
+                heapq.heapreplace(best, entry)
+    finally:
+        video.release()
+
+    return [(rgb_frame, location) for _, _, rgb_frame, location in sorted(best, key=lambda e: -e[0])]
+
+
+def encode_samples(samples):
+    """
+    Encode (rgb_image, face_location) samples.
+    Returns: list of encodings
+    """
+    encodings = []
+    for rgb_image, location in samples:
+        encodings.extend(face_recognition.face_encodings(rgb_image, [location]))
+    return encodings
+
+
+def select_exemplars(candidates, max_exemplars, iterations=10):
+    """
+    Reduce candidate encodings to at most max_exemplars diverse ones by k-means
+    clustering and keeping the member nearest each cluster centre.
+    Returns: float32 matrix of exemplars
+    """
+    if len(candidates) <= max_exemplars:
+        return candidates
+
+    # Farthest-point seeding keeps the initial centres spread over the candidates.
+    centres = [candidates[0]]
+    nearest = np.linalg.norm(candidates - centres[0], axis=1)
+    for _ in range(1, max_exemplars):
+        centres.append(candidates[int(nearest.argmax())])
+        nearest = np.minimum(nearest, np.linalg.norm(candidates - centres[-1], axis=1))
+    centres = np.asarray(centres)
+
+    for _ in range(iterations):
+        labels = np.linalg.norm(candidates[:, None, :] - centres[None, :, :], axis=2).argmin(axis=1)
+        for k in range(max_exemplars):
+            if np.any(labels == k):
+                centres[k] = candidates[labels == k].mean(axis=0)
+
+    distances = np.linalg.norm(candidates[:, None, :] - centres[None, :, :], axis=2)
+    chosen = sorted(set(int(i) for i in distances.argmin(axis=0)))
+    return candidates[chosen]
+
+
+def build_prototype(encodings, previous=None, previous_samples=0, max_exemplars=4):
+    """
+    Fold new encodings into a person's compact prototype: a running centroid
+    followed by a bounded set of diverse exemplars.
+    Returns: (float32 matrix with the centroid in row 0, total sample count)
+    """
+    new = np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+    total = previous_samples + len(new)
+    if total == 1:
+        return new, total
+
+    if previous is not None and len(previous):
+        centroid = (previous[0] * previous_samples + new.sum(axis=0)) / total
+        # A single stored row is a legacy one-photo enrollment, so it is also an exemplar.
+        candidates = np.vstack([previous if len(previous) == 1 else previous[1:], new])
+    else:
+        centroid = new.mean(axis=0)
+        candidates = new
+
+    exemplars = select_exemplars(candidates, max_exemplars)
+    return np.vstack([centroid[None, :], exemplars]).astype(np.float32), total
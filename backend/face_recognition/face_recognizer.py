@@ -1,48 +1,232 @@
 # app/face_recognition/face_recognizer.py
 
+import argparse
+import threading
+import time
 import cv2
 import face_recognition
-from app.face_recognition.embeddings import load_embeddings
+import numpy as np
+from embeddings import load_embeddings
 
-def recognize_faces_live():
+
+class FrameGrabber(threading.Thread):
+    """
+    Reads frames on a background thread into a one-slot buffer. Live cameras
+    overwrite the slot so the consumer always gets the newest frame; video files
+    wait for the consumer so no frame is dropped.
+    """
+
+    def __init__(self, source, drop_frames=True):
+        super().__init__(daemon=True)
+        self.video = cv2.VideoCapture(source)
+        self.drop_frames = drop_frames
+        self.frame = None
+        self.frame_index = -1
+        self.finished = False
+        self._stopped = False
+        self._cond = threading.Condition()
+
+    def is_opened(self):
+        return self.video.isOpened()
+
+    def run(self):
+        index = 0
+        while not self._stopped:
+            ret, frame = self.video.read()
+            with self._cond:
+                if not ret:
+                    self.finished = True
+                    self._cond.notify_all()
+                    break
+                while not self.drop_frames and self.frame is not None and not self._stopped:
+                    self._cond.wait()
+                self.frame = frame
+                self.frame_index = index
+                self._cond.notify_all()
+            index += 1
+        self.video.release()
+
+    def read(self, timeout=1.0):
+        """
+        Take the newest frame, waiting for one if the buffer is empty.
+        Returns: (frame_index, frame) or (None, None) once the source is exhausted
+        """
+        with self._cond:
+            while self.frame is None and not self.finished:
+                if not self._cond.wait(timeout):
+                    return None, None
+            if self.frame is None:
+                return None, None
+            frame, index = self.frame, self.frame_index
+            self.frame = None
+            self._cond.notify_all()
+            return index, frame
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+
+class FaceTrack:
+    def __init__(self, box):
+        self.box = box
+        self.name = None
+        self.distance = None
+        self.missed = 0
+        self.age = 0
+
+
+def box_iou(a, b):
+    top, right, bottom, left = max(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])
+    inter = max(0, right - left) * max(0, bottom - top)
+    area_a = (a[1] - a[3]) * (a[2] - a[0])
+    area_b = (b[1] - b[3]) * (b[2] - b[0])
+    union = area_a + area_b - inter
+    return inter / union if union > 0 else 0.0
+
+
+class IoUTracker:
+    """
+    Carries identities between detection frames by overlapping boxes, so faces
+    only need encoding when they first appear or are due for re-identification.
+    """
+
+    def __init__(self, min_iou=0.3, max_missed=2, reidentify_every=10):
+        self.min_iou = min_iou
+        self.max_missed = max_missed
+        self.reidentify_every = reidentify_every
+        self.tracks = []
+
+    def update(self, boxes):
+        """
+        Associate detected boxes with existing tracks, starting new tracks for the rest.
+        Returns: list of tracks, one per box
+        """
+        assigned = [None] * len(boxes)
+        free = set(range(len(self.tracks)))
+        pairs = sorted(
+            ((box_iou(box, track.box), i, j) for i, box in enumerate(boxes) for j, track in enumerate(self.tracks)),
+            reverse=True
+        )
+        for iou, i, j in pairs:
+            if iou < self.min_iou:
+                break
+            if assigned[i] is not None or j not in free:
+                continue
+            track = self.tracks[j]
+            track.box = boxes[i]
+            track.missed = 0
+            track.age += 1
+            assigned[i] = track
+            free.discard(j)
+
+        for j in free:
+            self.tracks[j].missed += 1
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+
+        for i, box in enumerate(boxes):
+            if assigned[i] is None:
+                assigned[i] = FaceTrack(box)
+                self.tracks.append(assigned[i])
+        return assigned
+
+    def needs_identity(self, track):
+        return track.name is None or track.age % self.reidentify_every == 0
+
+
+def nearest_identities(known_encodings, known_names, face_encodings, tolerance=0.5):
+    """
+    Vectorized nearest-neighbour lookup of several encodings against the gallery.
+    Returns: list of (name, distance)
+    """
+    if not len(face_encodings):
+        return []
+    queries = np.asarray(face_encodings, dtype=np.float32)
+    distances = np.linalg.norm(queries[:, None, :] - known_encodings[None, :, :], axis=2)
+    best = distances.argmin(axis=1)
+    results = []
+    for i, j in enumerate(best):
+        distance = float(distances[i, j])
+        results.append((known_names[j] if distance <= tolerance else "Unknown", distance))
+    return results
+
+
+def scene_thumbnail(frame):
+    return cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (32, 24), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def recognize_faces_live(source=0, detect_every=5, scale=0.25, tolerance=0.5,
+                         scene_threshold=12.0, headless=False, max_frames=None):
+    """
+    Run live recognition with capture on its own thread, detection every
+    detect_every frames or on a scene change, and tracked identities in between.
+    Returns: stats dict with frame, detection and encoding counts and frame rate
+    """
     known_encodings, known_names = load_embeddings()
 
-    if not known_encodings:
+    if len(known_encodings) == 0:
         print("No known faces found. Please run encode_faces.py first.")
-        return
+        return None
 
-    video = cv2.VideoCapture(0)  # Open webcam
+    known_encodings = np.asarray(known_encodings, dtype=np.float32)
+    grabber = FrameGrabber(source, drop_frames=isinstance(source, int))
 
-    if not video.isOpened():
+    if not grabber.is_opened():
         print("Could not access the camera.")
-        return
+        return None
+
+    grabber.start()
+    tracker = IoUTracker()
+    upscale = 1.0 / scale
+    last_thumb = None
+    last_detection = None
+    stats = {'frames': 0, 'detections': 0, 'encodings': 0}
+    start = time.perf_counter()
 
-    print("Camera is on. Press 'q' to quit.")
+    if not headless:
+        print("Camera is on. Press 'q' to quit.")
 
-    while True:
-        ret, frame = video.read()
-        if not ret:
+    while max_frames is None or stats['frames'] < max_frames:
+        frame_index, frame = grabber.read()
+        if frame is None:
+            if grabber.finished:
+                break
             continue
+        stats['frames'] += 1
 
-        small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        thumb = scene_thumbnail(frame)
+        scene_changed = last_thumb is not None and np.abs(thumb - last_thumb).mean() > scene_threshold
+        due = last_detection is None or frame_index - last_detection >= detect_every
 
-        face_locations = face_recognition.face_locations(rgb_small_frame)
-        face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+        if due or scene_changed:
+            last_detection = frame_index
+            last_thumb = thumb
+            stats['detections'] += 1
 
-        for face_encoding, face_location in zip(face_encodings, face_locations):
-            matches = face_recognition.compare_faces(known_encodings, face_encoding, tolerance=0.5)
-            name = "Unknown"
+            small_frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale)
+            rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+            face_locations = face_recognition.face_locations(rgb_small_frame)
 
-            if True in matches:
-                match_index = matches.index(True)
-                name = known_names[match_index]
+            pending = [t for t in tracker.update(face_locations) if tracker.needs_identity(t)]
+            if pending:
+                encodings = face_recognition.face_encodings(rgb_small_frame, [t.box for t in pending])
+                stats['encodings'] += len(encodings)
+                for track, (name, distance) in zip(pending, nearest_identities(known_encodings, known_names, encodings, tolerance)):
+                    track.name = name
+                    track.distance = distance
 
-            top, right, bottom, left = [v * 4 for v in face_location]
+        if headless:
+            continue
+
+        for track in tracker.tracks:
+            if track.missed or track.name is None:
+                continue
+            top, right, bottom, left = [int(v * upscale) for v in track.box]
 
             # Draw rectangle and name
             cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
-            cv2.putText(frame, name, (left, top - 10),
+            cv2.putText(frame, track.name, (left, top - 10),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
 
         cv2.imshow("Memory Aid - Face Recognition", frame)
@@ -50,5 +234,32 @@ def recognize_faces_live():
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
-    video.release()
-    cv2.destroyAllWindows()
+    elapsed = time.perf_counter() - start
+    grabber.stop()
+    if not headless:
+        cv2.destroyAllWindows()
+
+    stats['seconds'] = elapsed
+    stats['fps'] = stats['frames'] / elapsed if elapsed else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live face recognition from a camera or video file.")
+    parser.add_argument("--source", default="0", help="camera index or path to a video file")
+    parser.add_argument("--detect-every", type=int, default=5)
+    parser.add_argument("--headless", action="store_true", help="no window; report throughput only")
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args()
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    stats = recognize_faces_live(source, detect_every=args.detect_every, headless=args.headless, max_frames=args.max_frames)
+    if stats:
+        print(
+            f"{stats['frames']} frames in {stats['seconds']:.1f}s ({stats['fps']:.1f} fps), "
+            f"{stats['detections']} detection passes, {stats['encodings']} face encodings."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+from backend.face_recognition.ann_index import create_index, save_index, load_index
+from backend.face_recognition.embedding_format import from_db_value
+
+MEMBER_FIELDS = ('id', 'patient_id', 'name', 'relationship', 'photo_url', 'notes', 'last_interaction')
+
+
+class FacilityFaceIndex:
+    """
+    Cross-patient face index for shared cameras. Every prototype row of every
+    family member in the facility is one vector in the underlying embedding
+    index; results are collapsed back to the owning member.
+    """
+
+    def __init__(self, index, path=None, autosave_interval=300.0):
+        self.index = index
+        self.path = path
+        self.autosave_interval = autosave_interval
+        self.members = {}
+        self.member_labels = {}
+        self.label_owner = {}
+        self.next_label = 0
+        self.dirty = False
+        self.last_saved = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, db, backend='auto', path=None, page_size=1000):
+        """
+        Load every enrolled family member in the facility into a new index.
+        Returns: FacilityFaceIndex
+        """
+        rows = []
+        start = 0
+        while True:
+            result = db.table('family_members').select(
+                ', '.join(MEMBER_FIELDS + ('face_embedding', 'face_encoding'))
+            ).order('id').range(start, start + page_size - 1).execute()
+            rows.extend(result.data or [])
+            if len(result.data or []) < page_size:
+                break
+            start += page_size
+
+        prototypes = [cls._prototype(row) for row in rows]
+        expected = sum(len(p) for p in prototypes if p is not None)
+        facility = cls(create_index(backend, expected_size=expected), path=path)
+
+        labels = []
+        vectors = []
+        for row, prototype in zip(rows, prototypes):
+            if prototype is None:
+                continue
+            labels.extend(facility._assign_labels(row, len(prototype)))
+            vectors.append(prototype)
+        if vectors:
+            facility.index.add(labels, np.vstack(vectors))
+        facility.dirty = True
+        return facility
+
+    @classmethod
+    def open(cls, db, path, backend='auto'):
+        """
+        Load a persisted index from path, or build one from the database.
+        Returns: FacilityFaceIndex
+        """
+        index_path = os.path.join(path, 'index.npz')
+        members_path = os.path.join(path, 'members.json')
+        if not (os.path.exists(index_path) and os.path.exists(members_path)):
+            facility = cls.build(db, backend=backend, path=path)
+            facility.save()
+            return facility
+
+        facility = cls(load_index(index_path), path=path)
+        with open(members_path) as f:
+            saved = json.load(f)
+        facility.members = saved['members']
+        facility.member_labels = saved['member_labels']
+        facility.label_owner = {label: member_id for member_id, labels in facility.member_labels.items() for label in labels}
+        facility.next_label = saved['next_label']
+        return facility
+
+    @staticmethod
+    def _prototype(row):
+        embedding = row.get('face_embedding')
+        prototype = from_db_value(embedding if embedding else row.get('face_encoding'))
+        return prototype if prototype is not None and len(prototype) else None
+
+    def _assign_labels(self, row, count):
+        member_id = str(row['id'])
+        labels = list(range(self.next_label, self.next_label + count))
+        self.next_label += count
+        self.members[member_id] = {field: row.get(field) for field in MEMBER_FIELDS}
+        self.member_labels[member_id] = labels
+        for label in labels:
+            self.label_owner[label] = member_id
+        return labels
+
+    def _drop_labels(self, member_id):
+        labels = self.member_labels.pop(member_id, [])
+        self.members.pop(member_id, None)
+        for label in labels:
+            self.label_owner.pop(label, None)
+        return labels
+
+    def upsert(self, row):
+        """
+        Add or replace a family member's prototype rows.
+        """
+        prototype = self._prototype(row)
+        with self._lock:
+            stale = self._drop_labels(str(row['id']))
+            if stale:
+                self.index.remove(stale)
+            if prototype is not None:
+                self.index.add(self._assign_labels(row, len(prototype)), prototype)
+            self.dirty = True
+        self.autosave()
+
+    def remove(self, member_id):
+        """
+        Drop a family member from the index.
+        """
+        with self._lock:
+            stale = self._drop_labels(str(member_id))
+            if stale:
+                self.index.remove(stale)
+                self.dirty = True
+        self.autosave()
+
+    def touch(self, member_id, last_interaction):
+        """
+        Update an indexed member's last interaction, so cue text composed from
+        search results (and the persisted members.json) does not go stale.
+        """
+        with self._lock:
+            member = self.members.get(str(member_id))
+            if member is None:
+                return
+            member['last_interaction'] = last_interaction
+            self.dirty = True
+        self.autosave()
+
+    def search(self, face_encodings, tolerance=0.6):
+        """
+        Find the nearest family member anywhere in the facility for each encoding.
+        Returns: list of (member dict or None, distance or None) per encoding
+        """
+        if not len(face_encodings):
+            return []
+        with self._lock:
+            # The nearest prototype row identifies the nearest member.
+            labels, distances = self.index.search(np.asarray(face_encodings, dtype=np.float32), k=1)
+            results = []
+            for label, distance in zip(labels[:, 0], distances[:, 0]):
+                owner = self.label_owner.get(int(label)) if label >= 0 else None
+                distance = float(distance) if owner else None
+                if owner is None or distance >= tolerance:
+                    results.append((None, distance))
+                else:
+                    results.append((dict(self.members[owner]), distance))
+            return results
+
+    def save(self):
+        """
+        Persist the index and member metadata under self.path.
+        """
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            save_index(self.index, os.path.join(self.path, 'index.npz'))
+            with open(os.path.join(self.path, 'members.json'), 'w') as f:
+                json.dump({
+                    'members': self.members,
+                    'member_labels': self.member_labels,
+                    'next_label': self.next_label
+                }, f)
+            self.dirty = False
+            self.last_saved = time.monotonic()
+
+    def autosave(self):
+        if self.dirty and time.monotonic() - self.last_saved >= self.autosave_interval:
+            self.save()
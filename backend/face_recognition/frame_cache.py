@@ -0,0 +1,117 @@
+import time
+import cv2
+import numpy as np
+from backend.cache import LRUCache
+
+
+def thumbnail(image_bytes):
+    """
+    1/8-scale grayscale decode of an encoded image. JPEG decodes this small
+    straight from the DCT coefficients, so no full-resolution bitmap is made.
+    Returns: uint8 array, or None if the bytes are not an image
+    """
+    return cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+
+
+def dhash(gray):
+    """
+    64-bit difference hash of a grayscale image or crop.
+    Returns: int
+    """
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def relative_boxes(locations, shape):
+    """
+    Face boxes as fractions of the image height and width, ordered left to
+    right, so they can be laid over a thumbnail of any size.
+    Returns: tuple of (top, right, bottom, left)
+    """
+    height, width = shape[:2]
+    return tuple(
+        (top / height, right / width, bottom / height, left / width)
+        for top, right, bottom, left in sorted(locations, key=lambda box: (box[3], box[0]))
+    )
+
+
+def crop_hashes(thumb, boxes):
+    """
+    Difference hash of the thumbnail under each relative box.
+    Returns: tuple of int, or None if a crop is too small to hash
+    """
+    height, width = thumb.shape[:2]
+    hashes = []
+    for top, right, bottom, left in boxes:
+        crop = thumb[int(top * height):int(round(bottom * height)), int(left * width):int(round(right * width))]
+        if crop.shape[0] < 8 or crop.shape[1] < 9:
+            return None
+        hashes.append(dhash(crop))
+    return tuple(hashes)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class FrameResultCache(LRUCache):
+    """
+    Short-lived cache of recognition results for near-identical frames from the
+    same camera, checked before the frame is fully decoded or run through the
+    face detector. An entry remembers where its faces were; a new frame
+    recognized with the same options reuses it when the whole thumbnail is
+    within max_frame_distance bits (a cheap prefilter) and the crop under every
+    remembered face box is within max_distance bits, so a different visitor
+    standing in the same spot does not inherit the previous name.
+    """
+
+    def __init__(self, maxsize=512, ttl=10.0, max_distance=6, max_frame_distance=12):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.max_distance = max_distance
+        self.max_frame_distance = max_frame_distance
+
+    def lookup(self, scope, options, thumb):
+        """
+        Find the most recent result in scope recognized with the same options
+        whose faces are still in place in the thumbnail.
+        Returns: cached result or None
+        """
+        now = time.monotonic()
+        frame = dhash(thumb)
+        with self._lock:
+            match = None
+            for key in reversed(self._entries):
+                key_scope, key_options, key_shape, key_frame, boxes, hashes = key
+                if key_scope != scope or key_options != options or key_shape != thumb.shape:
+                    continue
+                if hamming(key_frame, frame) > self.max_frame_distance:
+                    continue
+                current = crop_hashes(thumb, boxes)
+                if current is None or any(hamming(a, b) > self.max_distance for a, b in zip(hashes, current)):
+                    continue
+                if not self._expired(self._entries[key][1], now):
+                    match = key
+                    break
+
+            if match is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(match)
+            self.hits += 1
+            return self._entries[match][0]
+
+    def store(self, scope, options, thumb, locations, shape, result):
+        """
+        Remember a result with the face boxes it was computed from, given in
+        the coordinates of an image of the given shape. Frames whose faces are
+        too small to hash on the thumbnail are not cached.
+        """
+        boxes = relative_boxes(locations, shape)
+        hashes = crop_hashes(thumb, boxes)
+        if hashes is None:
+            return
+        self.put((scope, options, thumb.shape, dhash(thumb), boxes, hashes), result)
+
+    def invalidate(self, scope):
+        self.discard(lambda key: key[0] == scope)
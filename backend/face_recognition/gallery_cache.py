@@ -0,0 +1,194 @@
+import threading
+import time
+import numpy as np
+from backend.face_recognition.embedding_format import from_db_value
+
+
+class FaceGallery:
+    """
+    Enrolled face encodings for one patient, held as a contiguous float32 matrix
+    alongside the family member metadata. Each member owns a contiguous run of
+    prototype rows starting at row_starts[i].
+    """
+
+    def __init__(self, members, encodings, row_starts, loaded_at):
+        self.members = members
+        self.encodings = encodings
+        self.row_starts = row_starts
+        self.sq_norms = np.einsum('ij,ij->i', encodings, encodings)
+        self.loaded_at = loaded_at
+
+    def __len__(self):
+        return len(self.members)
+
+    def distances(self, face_encoding):
+        """
+        Distance from one encoding to each member's nearest prototype row.
+        Returns: 1-D float32 array with one entry per member
+        """
+        if not len(self.members):
+            return np.empty(0, dtype=np.float32)
+        return self.distance_matrix(face_encoding)[0]
+
+    def distance_matrix(self, face_encodings):
+        """
+        Distances from several encodings to each member's nearest prototype row.
+        Returns: float32 array of shape (faces, members)
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.encodings.shape[1])
+        sq = np.einsum('ij,ij->i', queries, queries)[:, None] + self.sq_norms[None, :]
+        sq -= 2.0 * queries @ self.encodings.T
+        np.maximum(sq, 0.0, out=sq)
+        if len(self.row_starts) != len(self.encodings):
+            sq = np.minimum.reduceat(sq, self.row_starts, axis=1)
+        return np.sqrt(sq)
+
+
+class FaceGalleryCache:
+    """
+    Resident per-patient cache of face galleries so recognition does not hit the
+    database and rebuild encodings on every request. Galleries load outside the
+    lock; a per-patient generation, bumped by invalidate(), keeps a load that
+    overlapped an invalidation from being cached.
+    """
+
+    def __init__(self, db_client, ttl=60.0):
+        self.db = db_client
+        self.ttl = ttl
+        self._galleries = {}
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def _generation(self, patient_id):
+        return self._epoch, self._generations.get(patient_id, 0)
+
+    def get(self, patient_id):
+        """
+        Get the gallery for a patient, reloading it when missing or expired.
+        Returns: FaceGallery
+        """
+        with self._lock:
+            gallery = self._galleries.get(patient_id)
+            if gallery is not None and time.monotonic() - gallery.loaded_at < self.ttl:
+                return gallery
+            generation = self._generation(patient_id)
+
+        gallery = self._load(patient_id)
+
+        with self._lock:
+            if self._generation(patient_id) == generation:
+                self._galleries[patient_id] = gallery
+        return gallery
+
+    def _load(self, patient_id):
+        result = self.db.table('family_members').select(
+            'id, name, relationship, face_embedding, face_encoding, photo_url, notes, last_interaction'
+        ).eq('patient_id', patient_id).execute()
+
+        members = []
+        prototypes = []
+        row_starts = []
+        row_count = 0
+        for person in result.data or []:
+            embedding = person.pop('face_embedding', None)
+            legacy_encoding = person.pop('face_encoding', None)
+            prototype = from_db_value(embedding if embedding else legacy_encoding)
+            if prototype is None or not len(prototype):
+                continue
+            members.append(person)
+            prototypes.append(prototype)
+            row_starts.append(row_count)
+            row_count += len(prototype)
+
+        if prototypes:
+            encodings = np.ascontiguousarray(np.vstack(prototypes), dtype=np.float32)
+        else:
+            encodings = np.empty((0, 128), dtype=np.float32)
+
+        return FaceGallery(members, encodings, np.asarray(row_starts, dtype=np.intp), time.monotonic())
+
+    def match(self, face_encoding, patient_id, tolerance=0.6, gallery=None):
+        """
+        Find the closest enrolled family member within tolerance, in gallery
+        if the caller already has it.
+        Returns: (member, distance) or (None, None)
+        """
+        if gallery is None:
+            gallery = self.get(patient_id)
+        if not len(gallery):
+            return None, None
+
+        distances = gallery.distances(face_encoding)
+        best = int(np.argmin(distances))
+        if distances[best] >= tolerance:
+            return None, None
+
+        return dict(gallery.members[best]), float(distances[best])
+
+    def match_many(self, face_encodings, patient_id, tolerance=0.6, one_to_one=True, gallery=None):
+        """
+        Match several face encodings against a patient's gallery in one pass,
+        using gallery if the caller already has it.
+        With one_to_one, each member is assigned to at most one face, closest pairs first.
+        Returns: list of (member, distance) per face, (None, distance) when unmatched
+        """
+        if not len(face_encodings):
+            return []
+
+        if gallery is None:
+            gallery = self.get(patient_id)
+        if not len(gallery):
+            return [(None, None) for _ in face_encodings]
+
+        distances = gallery.distance_matrix(face_encodings)
+        nearest = distances.min(axis=1)
+
+        if one_to_one:
+            assigned = {}
+            taken = set()
+            for flat in np.argsort(distances, axis=None):
+                face, member = divmod(int(flat), distances.shape[1])
+                if distances[face, member] >= tolerance:
+                    break
+                if face in assigned or member in taken:
+                    continue
+                assigned[face] = member
+                taken.add(member)
+        else:
+            best = distances.argmin(axis=1)
+            assigned = {face: int(best[face]) for face in range(len(best)) if nearest[face] < tolerance}
+
+        matches = []
+        for face in range(distances.shape[0]):
+            member = assigned.get(face)
+            if member is None:
+                matches.append((None, float(nearest[face])))
+            else:
+                matches.append((dict(gallery.members[member]), float(distances[face, member])))
+        return matches
+
+    def touch(self, patient_id, member_id, last_interaction):
+        """
+        Update a cached member's last interaction without reloading the gallery.
+        """
+        with self._lock:
+            gallery = self._galleries.get(patient_id)
+            if gallery is None:
+                return
+            for member in gallery.members:
+                if member['id'] == member_id:
+                    member['last_interaction'] = last_interaction
+                    break
+
+    def invalidate(self, patient_id=None):
+        """
+        Drop the cached gallery for a patient, or for every patient.
+        """
+        with self._lock:
+            if patient_id is None:
+                self._galleries.clear()
+                self._epoch += 1
+            else:
+                self._galleries.pop(patient_id, None)
+                self._generations[patient_id] = self._generations.get(patient_id, 0) + 1
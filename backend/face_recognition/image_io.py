@@ -0,0 +1,90 @@
+import base64
+import io
+import cv2
+import numpy as np
+from PIL import Image
+
+REDUCED_COLOR_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def image_dimensions(image_bytes):
+    """
+    Read width and height from the image header without decoding pixels.
+    Returns: (width, height) or None if the header is unreadable
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def reduction_factor(width, height, min_pixels):
+    """
+    Largest decoder reduction (1, 2, 4 or 8) that still leaves at least min_pixels.
+    Returns: int
+    """
+    factor = 1
+    for candidate in (2, 4, 8):
+        if (width // candidate) * (height // candidate) < min_pixels:
+            break
+        factor = candidate
+    return factor
+
+
+def decode_image(image_bytes, min_pixels=None, with_factor=False):
+    """
+    Decode compressed image bytes straight into an RGB array. When min_pixels is
+    given, JPEG decoding is scaled down in the decoder itself so the full-size
+    bitmap is never materialised; with_factor also returns that reduction so
+    coordinates found in the decoded image can be mapped back with
+    scale_locations.
+    Returns: RGB numpy array, or None if the bytes are not an image;
+    with_factor returns (array or None, reduction factor) instead
+    """
+    buffer = np.frombuffer(image_bytes, np.uint8)
+
+    factor = 1
+    if min_pixels:
+        size = image_dimensions(image_bytes)
+        if size:
+            factor = reduction_factor(size[0], size[1], min_pixels)
+
+    image = cv2.imdecode(buffer, REDUCED_COLOR_FLAGS[factor])
+    if image is not None:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+    return (image, factor) if with_factor else image
+
+
+def scale_locations(locations, factor):
+    """
+    Map (top, right, bottom, left) boxes found in an image decoded with a
+    reduction factor back to the original image's pixel coordinates.
+    Returns: list of (top, right, bottom, left)
+    """
+    if factor == 1:
+        return list(locations)
+    return [tuple(int(value * factor) for value in location) for location in locations]
+
+
+def data_url_bytes(image_data):
+    """
+    Extract the encoded image bytes from a base64 data URL or bare base64 string.
+    Returns: bytes
+    """
+    payload = image_data.split(',', 1)[1] if ',' in image_data else image_data
+    return base64.b64decode(payload)
+
+
+def decode_data_url(image_data, min_pixels=None, with_factor=False):
+    """
+    Decode a base64 data URL (or bare base64 string) into an RGB array.
+    Returns: RGB numpy array, or None if the payload is not an image
+    (see decode_image for with_factor)
+    """
+    return decode_image(data_url_bytes(image_data), min_pixels, with_factor)
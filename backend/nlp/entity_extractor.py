@@ -1,6 +1,17 @@
 import re
 from datetime import datetime, timedelta
 import spacy
+from backend.nlp.lexicon import scan
+
+TIME_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'(\d{1,2}:\d{2}\s*(?:AM|PM|am|pm))',
+        r'(\d{1,2}\s*(?:AM|PM|am|pm))',
+        r'at\s+(\d{1,2}(?::\d{2})?)',
+        r'(\d{1,2})\s*(?:o\'clock|oclock)'
+    )
+]
+DATE_PATTERN = re.compile(r'(\d{1,2}/\d{1,2}/\d{2,4})')
 
 class EntityExtractor:
     """
@@ -22,75 +33,62 @@ class EntityExtractor:
         Extract time expressions from text.
         Returns: time string or None
         """
-        time_patterns = [
-            r'(\d{1,2}:\d{2}\s*(?:AM|PM|am|pm))',
-            r'(\d{1,2}\s*(?:AM|PM|am|pm))',
-            r'at\s+(\d{1,2}(?::\d{2})?)',
-            r'(\d{1,2})\s*(?:o\'clock|oclock)'
-        ]
-
-        for pattern in time_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in TIME_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1)
 
-        relative_time = {
-            'morning': '09:00 AM',
-            'afternoon': '02:00 PM',
-            'evening': '06:00 PM',
-            'night': '08:00 PM',
-            'noon': '12:00 PM',
-            'midnight': '12:00 AM'
-        }
-
-        for key, value in relative_time.items():
-            if key in text.lower():
-                return value
-
-        return None
+        hit = scan(text).best('time_of_day')
+        return hit.value if hit else None
 
     def extract_date(self, text):
         """
         Extract date expressions from text.
         Returns: date string or None
         """
-        text_lower = text.lower()
+        return self.resolve_date(self.date_expression(text))
+
+    def date_expression(self, text):
+        """
+        The date mentioned in text, before it is tied to the current day.
+        Returns: day offset from today (int) for 'today'/'tomorrow'/'yesterday',
+        a literal date or weekday string, or None
+        """
+        hits = scan(text)
 
-        if 'today' in text_lower:
-            return datetime.now().strftime('%Y-%m-%d')
-        if 'tomorrow' in text_lower:
-            return (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-        if 'yesterday' in text_lower:
-            return (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        relative = hits.best('relative_date')
+        if relative:
+            return relative.value
 
-        date_pattern = r'(\d{1,2}/\d{1,2}/\d{2,4})'
-        match = re.search(date_pattern, text)
+        match = DATE_PATTERN.search(text)
         if match:
             return match.group(1)
 
-        weekdays = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        for day in weekdays:
-            if day in text_lower:
-                return day
+        weekday = hits.best('weekday')
+        return weekday.value if weekday else None
 
-        return None
+    def resolve_date(self, expression, now=None):
+        """
+        Turn a date_expression into the date string extract_date returns,
+        resolving day offsets against now.
+        Returns: date string or None
+        """
+        if isinstance(expression, int):
+            return ((now or datetime.now()) + timedelta(days=expression)).strftime('%Y-%m-%d')
+        return expression
 
     def extract_task(self, text):
         """
         Extract task or action from text.
         Returns: task string or None
         """
-        task_keywords = ['medication', 'medicine', 'pills', 'appointment', 'doctor',
-                         'meeting', 'call', 'exercise', 'eat', 'drink', 'take']
-
-        text_lower = text.lower()
-        for keyword in task_keywords:
-            if keyword in text_lower:
-                words = text.split()
-                for i, word in enumerate(words):
-                    if keyword in word.lower():
-                        task = ' '.join(words[max(0, i-2):min(len(words), i+3)])
-                        return task
+        hit = scan(text).best('task')
+        if hit:
+            # Index of the word the keyword starts, counted the way split() does.
+            before = text[:hit.start]
+            i = len(before.split()) - (1 if before and not before[-1].isspace() else 0)
+            words = text.split()
+            return ' '.join(words[max(0, i-2):min(len(words), i+3)])
 
         return text
 
@@ -111,27 +109,43 @@ class EntityExtractor:
         Extract objects mentioned in text.
         Returns: object name or None
         """
-        common_objects = ['keys', 'glasses', 'phone', 'wallet', 'pillbox',
-                         'medicine', 'remote', 'book', 'watch', 'bag']
-
-        text_lower = text.lower()
-        for obj in common_objects:
-            if obj in text_lower:
-                return obj
-
-        return None
+        hit = scan(text).best('object')
+        return hit.value if hit else None
 
     def extract_all(self, text):
         """
         Extract all entities from text.
         Returns: dictionary of entities
         """
-        entities = {
+        return self.resolve_entities(self.extract_static(text), text)
+
+    def extract_static(self, text):
+        """
+        The parts of extract_all that do not depend on when they are asked:
+        dates are kept as date_expression, so the result can be cached and
+        resolved later with resolve_entities.
+        Returns: dictionary of entities with 'date_expression' in place of 'date'
+        """
+        return {
             'time': self.extract_time(text),
-            'date': self.extract_date(text),
+            'date_expression': self.date_expression(text),
             'task': self.extract_task(text),
             'persons': self.extract_person(text),
-            'object': self.extract_object(text),
+            'object': self.extract_object(text)
+        }
+
+    def resolve_entities(self, static, text, now=None):
+        """
+        Build the extract_all dictionary from extract_static output, resolving
+        relative dates against now.
+        Returns: dictionary of entities
+        """
+        entities = {
+            'time': static['time'],
+            'date': self.resolve_date(static['date_expression'], now),
+            'task': static['task'],
+            'persons': list(static['persons']),
+            'object': static['object'],
             'raw_text': text
         }
 
@@ -1,27 +1,65 @@
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
+import logging
 import os
+import threading
+from collections import Counter
+from backend.nlp.lexicon import INTENT_RULES, scan
+from backend.nlp.quantized_intent import QUANTIZED_MODEL_PATH, QuantizedIntentModel
+
+INTENT_MODES = ('model', 'rules', 'cascade')
+
+logger = logging.getLogger(__name__)
 
 class IntentClassifier:
     """
     Classifies user intents using a lightweight transformer model.
     """
 
-    def __init__(self, model_name='distilbert-base-uncased', num_labels=7):
+    def __init__(self, model_name='distilbert-base-uncased', num_labels=7, quantized_path=QUANTIZED_MODEL_PATH,
+                 rule_threshold=0.75):
+        self.rule_threshold = rule_threshold
+        self.stage_counts = Counter()
+        self._stats_lock = threading.Lock()
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        tokenizer_name = model_name
+        self.max_length = 128
 
         self.model_path = 'models/intent_classifier'
-        if os.path.exists(self.model_path):
-            self.model = AutoModelForSequenceClassification.from_pretrained(self.model_path)
-        else:
-            self.model = AutoModelForSequenceClassification.from_pretrained(
-                model_name,
-                num_labels=num_labels
-            )
-
-        self.model.to(self.device)
-        self.model.eval()
+        self.quantized = False
+        if quantized_path and os.path.exists(quantized_path):
+            # int8 TorchScript export of the fine-tuned model (see quantized_intent.py),
+            # used with the tokenizer and max_length it was exported with.
+            try:
+                model = QuantizedIntentModel.load(quantized_path)
+                if model.is_stale(self.model_path):
+                    logger.warning(
+                        "Quantized intent model %s is older than %s; using the fp32 model. "
+                        "Re-export it with python -m backend.nlp.quantized_intent",
+                        quantized_path, self.model_path
+                    )
+                else:
+                    self.model = model
+                    tokenizer_name = model.tokenizer_name or model_name
+                    self.max_length = model.max_length
+                    self.device = torch.device('cpu')
+                    self.quantized = True
+            except Exception as e:
+                logger.warning("Could not load quantized intent model %s: %s", quantized_path, e)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+
+        if not self.quantized:
+            if os.path.exists(self.model_path):
+                self.model = AutoModelForSequenceClassification.from_pretrained(self.model_path)
+            else:
+                self.model = AutoModelForSequenceClassification.from_pretrained(
+                    model_name,
+                    num_labels=num_labels
+                )
+
+            self.model.to(self.device)
+            self.model.eval()
 
         self.intent_labels = [
             'set_reminder',
@@ -41,49 +79,138 @@ class IntentClassifier:
         if not text.strip():
             return 'small_talk'
 
-        text_lower = text.lower()
+        scores = self.rule_scores(text)
+        for intent, _ in INTENT_RULES:
+            if intent in scores:
+                return intent
 
-        if any(word in text_lower for word in ['help', 'emergency', 'urgent', 'problem', 'scared']):
-            return 'emergency_alert'
-
-        if any(word in text_lower for word in ['who is', 'who are', "who's", 'recognize']):
-            return 'who_is_this'
-
-        if any(word in text_lower for word in ['remind', 'reminder', 'schedule', 'appointment', 'medication']):
-            return 'set_reminder'
+        return 'small_talk'
 
-        if any(word in text_lower for word in ['where is', 'find', 'looking for', 'lost']):
-            return 'where_is_object'
+    def rule_scores(self, text):
+        """
+        Score every keyword rule against the text. Each distinct matched
+        phrase adds its word count, so 'what did i do' outweighs 'today'.
+        Returns: dict of intent -> score for intents with at least one match
+        """
+        scores = {}
+        for intent, phrase in {(hit.value, hit.phrase) for hit in scan(text).of('intent')}:
+            scores[intent] = scores.get(intent, 0) + len(phrase.split())
+        return scores
 
-        if any(word in text_lower for word in ['summary', 'what did i do', 'today', 'recap']):
-            return 'daily_summary'
+    def rule_decision(self, text):
+        """
+        Decide the intent from the keyword rules alone when they are
+        unambiguous: the best intent must hold at least rule_threshold of the
+        total matched score. Texts no rule matches, or where rules for
+        different intents conflict, are left to the model.
+        Returns: (intent, confidence) or None
+        """
+        if not text.strip():
+            return 'small_talk', 1.0
 
-        if any(word in text_lower for word in ['quiz', 'practice', 'train', 'remember']):
-            return 'memory_training'
-
-        return 'small_talk'
+        scores = self.rule_scores(text)
+        if not scores:
+            return None
+        intent = max(scores, key=scores.get)
+        share = scores[intent] / sum(scores.values())
+        if share < self.rule_threshold:
+            return None
+        return intent, share
 
     def predict_with_confidence(self, text):
         """
         Predict intent with confidence score using transformer model.
         Returns: (intent, confidence)
         """
-        try:
-            inputs = self.tokenizer(
-                text,
-                return_tensors='pt',
-                truncation=True,
-                max_length=128
-            ).to(self.device)
-
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                probs = torch.softmax(logits, dim=1)
-                confidence, predicted_idx = torch.max(probs, dim=1)
-
-            intent = self.intent_labels[predicted_idx.item()]
-            return intent, confidence.item()
-        except Exception as e:
-            print(f"Model prediction error: {e}, falling back to rule-based")
-            return self.predict_intent(text), 0.5
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts, batch_size=16):
+        """
+        Predict intents for many texts with one forward pass per batch_size
+        texts. Texts are sorted by length before batching and each batch is
+        padded only to its longest item, so short commands are not padded out
+        to max_length.
+        Returns: list of (intent, confidence), one per text, in input order
+        """
+        results = [None] * len(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            batch = [texts[i] for i in indices]
+            try:
+                inputs = self.tokenizer(
+                    batch,
+                    return_tensors='pt',
+                    padding='longest',
+                    truncation=True,
+                    max_length=self.max_length
+                ).to(self.device)
+
+                with torch.no_grad():
+                    outputs = self.model(**inputs)
+                    logits = outputs.logits
+                    probs = torch.softmax(logits, dim=1)
+                    confidences, predicted = torch.max(probs, dim=1)
+
+                for i, idx, confidence in zip(indices, predicted.tolist(), confidences.tolist()):
+                    results[i] = (self.intent_labels[idx], confidence)
+            except Exception as e:
+                print(f"Model prediction error: {e}, falling back to rule-based")
+                for i, text in zip(indices, batch):
+                    results[i] = (self.predict_intent(text), 0.5)
+        return results
+
+    def classify(self, text, mode='cascade', predict_model=None):
+        """
+        Classify one text in the given mode: 'model' always runs the
+        transformer, 'rules' never does, and 'cascade' runs it only when
+        rule_decision abstains. predict_model replaces predict_with_confidence
+        for the model stage (e.g. a micro-batcher).
+        Returns: (intent, confidence, stage) where stage is 'rules' or 'model'
+        """
+        predict_batch = (lambda batch: [predict_model(batch[0])]) if predict_model else None
+        return self.classify_batch([text], mode, predict_batch)[0]
+
+    def classify_batch(self, texts, mode='cascade', predict_batch=None):
+        """
+        classify for many texts; everything the rules cannot decide goes to
+        the model in one predict_batch call.
+        Returns: list of (intent, confidence, stage), one per text
+        """
+        if mode not in INTENT_MODES:
+            raise ValueError(f"mode must be one of {', '.join(INTENT_MODES)}")
+
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            decision = self.rule_decision(text) if mode != 'model' else None
+            if decision is None and mode == 'rules':
+                decision = self.predict_intent(text), 0.5
+            if decision is None:
+                pending.append(i)
+            else:
+                results[i] = decision + ('rules',)
+
+        if pending:
+            predictions = (predict_batch or self.predict_batch)([texts[i] for i in pending])
+            for i, (intent, confidence) in zip(pending, predictions):
+                results[i] = (intent, confidence, 'model')
+
+        with self._stats_lock:
+            self.stage_counts['rules'] += len(texts) - len(pending)
+            self.stage_counts['model'] += len(pending)
+        return results
+
+    def stage_stats(self):
+        """
+        Returns: dict with per-stage counts and the fraction of texts that
+        never reached the model
+        """
+        with self._stats_lock:
+            total = sum(self.stage_counts.values())
+            return {
+                'texts': total,
+                'rules': self.stage_counts['rules'],
+                'model': self.stage_counts['model'],
+                'rules_hit_rate': self.stage_counts['rules'] / total if total else 0.0
+            }
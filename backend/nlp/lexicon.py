@@ -0,0 +1,260 @@
+import functools
+import operator
+import re
+from collections import namedtuple
+
+# Keyword tables shared by intent rules, entity extraction and emergency
+# detection. Each table is an ordered list of (value, phrases); order is the
+# table's priority. Phrases match whole words only, case-insensitively. A
+# trailing '*' also matches longer forms of the last word, but almost every
+# stem prefixes some unrelated word ('pill*' -> pillow, 'practi*' ->
+# practical, 'fall*' -> fallacy), so the tables list inflections explicitly.
+INTENT_RULES = [
+    ('emergency_alert', ['help', 'emergency', 'urgent', 'problem', 'scared']),
+    ('who_is_this', ['who is', 'who are', "who's", 'recognize', 'recognise', 'recognizes', 'recognises',
+                     'recognized', 'recognised', 'recognizing', 'recognising', 'recognition']),
+    ('set_reminder', ['remind', 'reminds', 'reminded', 'reminding', 'reminder', 'reminders',
+                      'schedule', 'schedules', 'scheduled', 'scheduling',
+                      'appointment', 'appointments', 'medication', 'medications']),
+    ('where_is_object', ['where is', 'find', 'finds', 'finding', 'looking for', 'lost']),
+    ('daily_summary', ['summary', 'summaries', 'summarize', 'summarise', 'summarized', 'summarised',
+                       'what did i do', 'today', 'recap']),
+    ('memory_training', ['quiz', 'quizzes', 'quizzed', 'quizzing',
+                         'practice', 'practise', 'practices', 'practises', 'practiced', 'practised',
+                         'practicing', 'practising', 'train', 'trained', 'training',
+                         'remember', 'remembers', 'remembered', 'remembering']),
+]
+
+EMERGENCY_KEYWORDS = [
+    ('critical', ['help', 'emergency', 'urgent', 'ambulance', 'hospital', 'pain', 'painful',
+                  'hurt', 'hurts', 'hurting', 'fall', 'falls', 'fallen', 'falling']),
+    ('high', ['scared', 'afraid', 'confused', 'lost', 'dizzy', 'cant breathe', "can't breathe", 'chest']),
+    ('medium', ['worried', 'nervous', 'uncomfortable', 'unwell', 'sick']),
+]
+
+TIMES_OF_DAY = [
+    ('09:00 AM', ['morning']),
+    ('02:00 PM', ['afternoon']),
+    ('06:00 PM', ['evening']),
+    ('08:00 PM', ['night', 'tonight']),
+    ('12:00 PM', ['noon']),
+    ('12:00 AM', ['midnight']),
+]
+
+# Value is the offset in days from today.
+RELATIVE_DATES = [
+    (0, ['today']),
+    (1, ['tomorrow']),
+    (-1, ['yesterday']),
+]
+
+WEEKDAYS = [
+    (day, [day]) for day in ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+]
+
+TASK_KEYWORDS = [
+    ('medication', ['medication', 'medications']),
+    ('medicine', ['medicine', 'medicines']),
+    ('pills', ['pill', 'pills']),
+    ('appointment', ['appointment', 'appointments']),
+    ('doctor', ['doctor', 'doctors']),
+    ('meeting', ['meeting', 'meetings']),
+    ('call', ['call', 'calls', 'calling']),
+    ('exercise', ['exercise', 'exercises', 'exercised', 'exercising']),
+    ('eat', ['eat', 'eats', 'eating']),
+    ('drink', ['drink', 'drinks', 'drinking']),
+    ('take', ['take', 'takes', 'taking']),
+]
+
+OBJECTS = [
+    ('keys', ['key', 'keys']),
+    ('glasses', ['glasses']),
+    ('phone', ['phone', 'phones']),
+    ('wallet', ['wallet', 'wallets']),
+    ('pillbox', ['pillbox']),
+    ('medicine', ['medicine', 'medicines']),
+    ('remote', ['remote', 'remotes']),
+    ('book', ['book', 'books']),
+    ('watch', ['watch']),
+    ('bag', ['bag', 'bags']),
+]
+
+TABLES = {
+    'intent': INTENT_RULES,
+    'emergency': EMERGENCY_KEYWORDS,
+    'time_of_day': TIMES_OF_DAY,
+    'relative_date': RELATIVE_DATES,
+    'weekday': WEEKDAYS,
+    'task': TASK_KEYWORDS,
+    'object': OBJECTS,
+}
+
+# rank is the value's position in its table; lower ranks take priority.
+Hit = namedtuple('Hit', ['category', 'value', 'rank', 'phrase', 'start', 'end'])
+
+APOSTROPHES = "'\u2019"
+
+
+def normalize_phrase(text):
+    """
+    Lowercase, straighten apostrophes and collapse whitespace.
+    Returns: string
+    """
+    return ' '.join(text.lower().replace('\u2019', "'").split())
+
+
+def trie_pattern(phrases):
+    """
+    Regex matching any of the phrases, factored into a character trie so the
+    regex engine only follows branches that agree with the text so far.
+    Spaces match any whitespace run, apostrophes match straight or curly
+    ones, and a trailing '*' matches any further word characters.
+    Returns: pattern string
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def pattern(node):
+        branches = []
+        # Literal continuations before the stem wildcard, so the longest
+        # listed phrase is preferred.
+        for char in sorted(node, key=lambda c: (c == '*', c)):
+            if char == '':
+                continue
+            if char == '*':
+                branches.append(r'\w*')
+            elif char == ' ':
+                branches.append(r'\s+' + pattern(node[char]))
+            elif char in APOSTROPHES:
+                branches.append(f"[{APOSTROPHES}]" + pattern(node[char]))
+            else:
+                branches.append(re.escape(char) + pattern(node[char]))
+        if not branches:
+            return ''
+        optional = '' in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')' + ('?' if optional else '')
+
+    return pattern(trie)
+
+
+class ScanResult:
+    """
+    Every lexicon hit in one text, in text order, also grouped by category.
+    """
+
+    def __init__(self, hits):
+        self.hits = tuple(hits)
+        self.categories = {}
+        for hit in self.hits:
+            self.categories.setdefault(hit.category, []).append(hit)
+
+    def __iter__(self):
+        return iter(self.hits)
+
+    def of(self, category):
+        """
+        Returns: list of hits in the category, in text order
+        """
+        return list(self.categories.get(category, ()))
+
+    def first(self, category):
+        """
+        Returns: earliest hit in the category, or None
+        """
+        hits = self.categories.get(category)
+        return hits[0] if hits else None
+
+    def best(self, category):
+        """
+        The hit whose value comes first in the category's table, the earliest
+        such hit if that value occurs more than once; e.g. 'morning' over
+        'tonight' in 'tonight or tomorrow morning'.
+        Returns: hit or None
+        """
+        hits = self.categories.get(category)
+        return min(hits, key=operator.attrgetter('rank')) if hits else None
+
+    def values(self, category):
+        """
+        Returns: set of distinct values hit in the category
+        """
+        return {hit.value for hit in self.categories.get(category, ())}
+
+
+class Lexicon:
+    """
+    All keyword tables compiled into one regex, shaped as a character trie
+    and anchored on word boundaries, so a single pass over the text finds
+    every phrase of every table and 'hi' never fires inside 'this'. Where
+    phrases overlap the longest match wins. A phrase listed in several
+    tables yields one hit per table.
+    """
+
+    def __init__(self, tables):
+        entries = {}
+        for category, table in tables.items():
+            for rank, (value, phrases) in enumerate(table):
+                for phrase in phrases:
+                    entries.setdefault(normalize_phrase(phrase), []).append((category, value, rank))
+
+        self.phrases = list(entries)
+        self.entries = [entries[phrase] for phrase in self.phrases]
+        self.exact = {phrase: i for i, phrase in enumerate(self.phrases) if not phrase.endswith('*')}
+        self.stems = {phrase[:-1]: i for i, phrase in enumerate(self.phrases) if phrase.endswith('*')}
+        self.stem_lengths = sorted({len(stem) for stem in self.stems}, reverse=True)
+        pattern = r'(?<!\w)' + trie_pattern(self.phrases) + r'(?!\w)'
+        # Matching lowercased text case-sensitively is several times faster
+        # than re.IGNORECASE; the latter is kept for the rare text whose
+        # length changes when lowercased, where offsets would shift.
+        self.regex = re.compile(pattern)
+        self.regex_ignorecase = re.compile(pattern, re.IGNORECASE)
+
+    def _phrase_index(self, matched):
+        index = self.exact.get(matched)
+        if index is not None:
+            return index
+        key = normalize_phrase(matched)
+        index = self.exact.get(key)
+        if index is None:
+            for length in self.stem_lengths:
+                index = self.stems.get(key[:length])
+                if index is not None:
+                    break
+        return index
+
+    def scan(self, text):
+        """
+        Find every lexicon phrase in text in one pass.
+        Returns: ScanResult
+        """
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = self.regex.finditer(lowered)
+        else:
+            matches = self.regex_ignorecase.finditer(text)
+
+        hits = []
+        for match in matches:
+            index = self._phrase_index(match.group())
+            for category, value, rank in self.entries[index]:
+                hits.append(Hit(category, value, rank, self.phrases[index], match.start(), match.end()))
+        return ScanResult(hits)
+
+
+LEXICON = Lexicon(TABLES)
+
+
+@functools.lru_cache(maxsize=1024)
+def scan(text):
+    """
+    LEXICON.scan memoised on the text, so intent rules, entity extraction and
+    emergency detection looking at the same utterance share one scan.
+    Returns: ScanResult
+    """
+    return LEXICON.scan(text)
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+from collections import namedtuple
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+QUANTIZED_MODEL_PATH = 'models/intent_classifier_int8.pt'
+METADATA_FILE = 'intent_model.json'
+
+ClassifierOutput = namedtuple('ClassifierOutput', ['logits'])
+
+
+def source_mtime(model_dir):
+    """
+    Newest modification time of the files in a saved transformers model
+    directory, recorded at export to tell when the model was retrained.
+    Returns: float, or None if the directory does not exist
+    """
+    if not os.path.isdir(model_dir):
+        return None
+    times = [
+        os.path.getmtime(os.path.join(root, name))
+        for root, _, names in os.walk(model_dir) for name in names
+    ]
+    return max(times, default=os.path.getmtime(model_dir))
+
+
+def export_quantized(model_dir, out_path, tokenizer_name='distilbert-base-uncased', max_length=128):
+    """
+    Export a fine-tuned sequence classifier as a TorchScript module with its
+    Linear layers dynamically quantized to int8. The module is traced with
+    (input_ids, attention_mask) and works for any batch size and sequence
+    length up to max_length.
+    Returns: (path to the saved module, sample label agreement with the fp32 model)
+    """
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir, torchscript=True)
+    model.eval()
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    example = tokenizer(
+        ['remind me to take my pills', 'who is this'],
+        return_tensors='pt',
+        padding='longest'
+    )
+    with torch.no_grad():
+        traced = torch.jit.trace(
+            quantized,
+            (example['input_ids'], example['attention_mask']),
+            strict=False
+        )
+
+    # The trace must generalise beyond the example's shape.
+    check = tokenizer(
+        ['where did i leave my glasses this morning', 'help', 'what did i do today'],
+        return_tensors='pt',
+        padding='longest'
+    )
+    with torch.no_grad():
+        expected = model(check['input_ids'], check['attention_mask'])[0].argmax(dim=1)
+        actual = traced(check['input_ids'], check['attention_mask'])[0].argmax(dim=1)
+    agreement = (expected == actual).float().mean().item()
+
+    metadata = {
+        'tokenizer': tokenizer_name,
+        'max_length': max_length,
+        'num_labels': model.config.num_labels,
+        'source': os.path.abspath(model_dir),
+        'source_mtime': source_mtime(model_dir)
+    }
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    torch.jit.save(traced, out_path, _extra_files={METADATA_FILE: json.dumps(metadata)})
+    return out_path, agreement
+
+
+class QuantizedIntentModel:
+    """
+    Loader for a module written by export_quantized. Called like the
+    transformers model it replaces: keyword tokenizer outputs in, an object
+    with .logits out. Dynamic int8 kernels are CPU only.
+    """
+
+    def __init__(self, module, metadata, path=None):
+        self.module = module
+        self.metadata = metadata
+        self.path = path
+
+    @property
+    def tokenizer_name(self):
+        return self.metadata.get('tokenizer')
+
+    @property
+    def max_length(self):
+        return self.metadata.get('max_length', 128)
+
+    @classmethod
+    def load(cls, path):
+        extra_files = {METADATA_FILE: ''}
+        module = torch.jit.load(path, map_location='cpu', _extra_files=extra_files)
+        module.eval()
+        return cls(module, json.loads(extra_files[METADATA_FILE] or '{}'), path)
+
+    def is_stale(self, model_dir):
+        """
+        Whether the fp32 model in model_dir changed after this export was
+        made from it. Exports without a recorded source time are compared
+        by the artifact's own modification time.
+        Returns: bool
+        """
+        current = source_mtime(model_dir)
+        if current is None:
+            return False
+        exported = self.metadata.get('source_mtime')
+        if exported is None:
+            exported = os.path.getmtime(self.path) if self.path else None
+        return exported is not None and current > exported
+
+    def __call__(self, input_ids, attention_mask, **kwargs):
+        return ClassifierOutput(self.module(input_ids, attention_mask)[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export an int8-quantized TorchScript intent model")
+    parser.add_argument('--model-dir', default='models/intent_classifier')
+    parser.add_argument('--tokenizer', default='distilbert-base-uncased')
+    parser.add_argument('--out', default=QUANTIZED_MODEL_PATH)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model_dir):
+        parser.error(f"{args.model_dir} not found; train the intent classifier first")
+
+    path, agreement = export_quantized(args.model_dir, args.out, args.tokenizer)
+    print(f"Quantized intent model written to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    print(f"Sample label agreement with fp32 model: {agreement:.0%}")
+
+
+if __name__ == '__main__':
+    main()
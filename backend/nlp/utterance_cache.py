@@ -0,0 +1,72 @@
+import re
+from backend.cache import LRUCache
+
+# Words plus the characters that carry meaning inside times and dates
+# ('3:30', '4/12'), so 'Who is this?' and 'who is this' share an entry but
+# '3:30' and '330' do not.
+UTTERANCE_TOKEN = re.compile(r"[\w:/']+")
+
+
+def normalize_utterance(text):
+    """
+    Cache key form of an utterance: lowercased, straight apostrophes, other
+    punctuation dropped and whitespace collapsed.
+    Returns: string
+    """
+    return ' '.join(UTTERANCE_TOKEN.findall(text.lower().replace('\u2019', "'")))
+
+
+class UtteranceCache:
+    """
+    LRU caches of intent and entity results, so a patient asking the same
+    question again skips tokenization, the intent model and spaCy. Intents
+    are keyed by normalized utterance. Entities are keyed by the exact text,
+    since the task, time and person values are cut from it; they are cached
+    in their time-independent form (EntityExtractor.extract_static) and
+    relative dates are resolved on every lookup. Entries are shared by all
+    patients unless per_patient is set.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, per_patient=False):
+        self.per_patient = per_patient
+        self.intent_cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.entity_cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def _key(self, text, patient_id, *extra):
+        return (patient_id if self.per_patient else None, text) + extra
+
+    def classify(self, text, mode, classify, patient_id=None):
+        """
+        Cached intent classification; classify(text) runs on a miss.
+        Returns: ((intent, confidence, stage), cached)
+        """
+        key = self._key(normalize_utterance(text), patient_id, mode)
+        result = self.intent_cache.get(key)
+        if result is not None:
+            return result, True
+        result = classify(text)
+        self.intent_cache.put(key, result)
+        return result, False
+
+    def extract(self, text, extractor, patient_id=None):
+        """
+        Cached entity extraction with dates resolved against the current day.
+        Returns: (extract_all dictionary, cached)
+        """
+        key = self._key(text, patient_id)
+        static = self.entity_cache.get(key)
+        cached = static is not None
+        if not cached:
+            static = extractor.extract_static(text)
+            self.entity_cache.put(key, static)
+        return extractor.resolve_entities(static, text), cached
+
+    def stats(self):
+        """
+        Returns: dict with the scope and per-cache size, hit and eviction counters
+        """
+        return {
+            'scope': 'patient' if self.per_patient else 'global',
+            'intent': self.intent_cache.stats(),
+            'entities': self.entity_cache.stats()
+        }
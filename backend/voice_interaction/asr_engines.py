@@ -0,0 +1,221 @@
+import json
+import os
+import numpy as np
+import torch
+import whisper
+
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+# Phrasing of the everyday commands, used to restrict the cascade's Vosk
+# first pass. Anything outside it decodes as [unk] and is handed on to
+# Whisper. The standalone 'vosk' engine is open-vocabulary.
+COMMAND_GRAMMAR = [
+    'who is this', 'who is that', 'who are you', 'do i know you',
+    'where are my keys', 'where are my glasses', 'where is my phone', 'where is my wallet',
+    'where is my purse', 'where is my remote', 'where did i put my keys', 'i lost my keys',
+    'i lost my glasses', 'help me find my glasses', 'i am looking for my phone',
+    'help', 'help me', 'i need help', 'emergency', 'call my daughter', 'call my son',
+    'call the nurse', 'i am scared', 'i fell', 'i have fallen',
+    'what did i do today', 'give me a summary', 'daily summary', 'recap my day',
+    'what time is it', 'what day is it', 'what is the date today',
+    'did i take my medication', 'did i take my pills', 'remind me to take my medication',
+    'remind me to take my pills', 'what are my reminders', 'do i have an appointment today',
+    'quiz me', 'let us practice', 'memory practice', 'help me remember',
+    'hello', 'good morning', 'good afternoon', 'good night', 'thank you', 'how are you',
+    'yes', 'no', 'stop', 'repeat that', 'say that again',
+]
+
+# Engine cache key of the grammar-restricted Vosk recognizer the cascade
+# uses, kept apart from the open-vocabulary 'vosk' engine.
+COMMAND_ENGINE = 'vosk_commands'
+
+WHISPER_COMPRESSION_LIMIT = 2.4
+WHISPER_LOGPROB_LIMIT = -1.0
+
+
+class WhisperEngine:
+    """
+    OpenAI Whisper transcription, with a batched decode path for short clips.
+    """
+
+    name = 'whisper'
+
+    def __init__(self, model_size='base', language=None):
+        self.model = whisper.load_model(model_size)
+        self.language = language
+        self.fp16 = self.model.device.type != 'cpu'
+
+    def transcribe(self, audio, partial=False):
+        """
+        Transcribe a file path or 16 kHz float32 samples. Partial passes decode
+        greedily without temperature fallback to keep them cheap.
+        Returns: (transcript, confidence)
+        """
+        options = {'language': self.language, 'fp16': self.fp16, 'condition_on_previous_text': False}
+        if partial:
+            options['temperature'] = 0.0
+        result = self.model.transcribe(audio, **options)
+        segments = result.get('segments') or []
+        confidence = float(np.exp(np.mean([s['avg_logprob'] for s in segments]))) if segments else 0.0
+        return result['text'].strip(), confidence
+
+    def transcribe_batch(self, audios):
+        """
+        Clips up to 30 s are stacked into a single mel batch and decoded
+        greedily; longer clips, and any whose batched decode looks degenerate,
+        go through the regular long-form transcribe.
+        Returns: list of (transcript, confidence)
+        """
+        results = [None] * len(audios)
+        short = [i for i, audio in enumerate(audios) if len(audio) <= whisper.audio.N_SAMPLES]
+
+        if short:
+            mels = torch.stack([
+                whisper.log_mel_spectrogram(
+                    whisper.pad_or_trim(torch.from_numpy(np.asarray(audios[i], dtype=np.float32))),
+                    n_mels=self.model.dims.n_mels
+                )
+                for i in short
+            ]).to(self.model.device)
+            options = whisper.DecodingOptions(language=self.language, fp16=self.fp16, without_timestamps=True)
+            with torch.no_grad():
+                decoded = whisper.decode(self.model, mels, options)
+            for i, result in zip(short, decoded):
+                if result.compression_ratio <= WHISPER_COMPRESSION_LIMIT and result.avg_logprob >= WHISPER_LOGPROB_LIMIT:
+                    results[i] = (result.text.strip(), float(np.exp(result.avg_logprob)))
+
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = self.transcribe(audios[i])
+        return results
+
+
+class VoskEngine:
+    """
+    Kaldi-based offline recognizer through the optional vosk package. With a
+    grammar, decoding is restricted to those phrases, which makes it fast and
+    lets the per-word confidences act as an out-of-grammar detector.
+    """
+
+    name = 'vosk'
+
+    def __init__(self, model_path, grammar=None, sample_rate=16000, model=None):
+        if vosk is None:
+            raise ImportError("vosk is not installed; use the 'whisper' ASR engine")
+        if model is None:
+            if not os.path.isdir(model_path):
+                raise FileNotFoundError(f"Vosk model not found at {model_path}")
+            vosk.SetLogLevel(-1)
+            model = vosk.Model(model_path)
+        self.model_path = model_path
+        self.model = model
+        self.sample_rate = sample_rate
+        self.grammar = json.dumps(list(grammar) + ['[unk]']) if grammar else None
+
+    def with_grammar(self, grammar):
+        """
+        Another engine over the same loaded model with a different grammar
+        (None for open vocabulary).
+        Returns: VoskEngine
+        """
+        return VoskEngine(self.model_path, grammar, self.sample_rate, model=self.model)
+
+    def _recognizer(self):
+        if self.grammar:
+            recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate, self.grammar)
+        else:
+            recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
+        recognizer.SetWords(True)
+        return recognizer
+
+    def transcribe(self, audio, partial=False):
+        """
+        Transcribe 16 kHz float32 samples.
+        Returns: (transcript, confidence), where out-of-grammar speech scores 0
+        """
+        pcm = (np.clip(np.asarray(audio, dtype=np.float32), -1.0, 1.0) * 32767).astype('<i2').tobytes()
+        recognizer = self._recognizer()
+        recognizer.AcceptWaveform(pcm)
+        result = json.loads(recognizer.FinalResult())
+
+        words = result.get('result') or []
+        text = result.get('text', '').strip()
+        if not words or '[unk]' in text:
+            return text.replace('[unk]', '').strip(), 0.0
+        return text, float(min(word['conf'] for word in words))
+
+    def transcribe_batch(self, audios):
+        return [self.transcribe(audio) for audio in audios]
+
+
+class CascadeEngine:
+    """
+    Try a cheap engine first and only pay for the accurate one when the cheap
+    result's confidence is below min_confidence.
+    """
+
+    name = 'cascade'
+
+    def __init__(self, fast, accurate, min_confidence=0.75):
+        self.fast = fast
+        self.accurate = accurate
+        self.min_confidence = min_confidence
+        self.accepted = 0
+        self.escalated = 0
+
+    def transcribe(self, audio, partial=False):
+        return self.transcribe_batch([audio])[0]
+
+    def transcribe_batch(self, audios):
+        """
+        Returns: list of (transcript, confidence)
+        """
+        results = self.fast.transcribe_batch(audios)
+        retry = [i for i, (text, confidence) in enumerate(results) if not text or confidence < self.min_confidence]
+        if retry:
+            for i, result in zip(retry, self.accurate.transcribe_batch([audios[i] for i in retry])):
+                results[i] = result
+        self.accepted += len(audios) - len(retry)
+        self.escalated += len(retry)
+        return results
+
+    def stats(self):
+        total = self.accepted + self.escalated
+        return {
+            'accepted_fast': self.accepted,
+            'escalated': self.escalated,
+            'escalation_rate': self.escalated / total if total else 0.0
+        }
+
+
+def create_engine(name='whisper', whisper_model='base', language=None, vosk_model_path=None,
+                  min_confidence=0.75, engines=None):
+    """
+    Build an ASR engine by name ('whisper', 'vosk' or 'cascade'). 'vosk' is
+    open-vocabulary; only the cascade's first pass is restricted to
+    COMMAND_GRAMMAR. Already constructed engines passed in engines (keyed by
+    name, with the cascade's first pass under COMMAND_ENGINE) are reused, and
+    Vosk engines share one loaded model.
+    Returns: engine instance
+    """
+    engines = engines or {}
+    loaded_vosk = engines.get('vosk') or engines.get(COMMAND_ENGINE)
+    if name == 'whisper':
+        return WhisperEngine(whisper_model, language)
+    if name == 'vosk':
+        if loaded_vosk is not None:
+            return loaded_vosk.with_grammar(None)
+        return VoskEngine(vosk_model_path)
+    if name == 'cascade':
+        fast = engines.get(COMMAND_ENGINE)
+        if fast is None:
+            if loaded_vosk is not None:
+                fast = loaded_vosk.with_grammar(COMMAND_GRAMMAR)
+            else:
+                fast = VoskEngine(vosk_model_path, grammar=COMMAND_GRAMMAR)
+        accurate = engines.get('whisper') or WhisperEngine(whisper_model, language)
+        return CascadeEngine(fast, accurate, min_confidence)
+    raise ValueError(f"Unknown ASR engine: {name}")
@@ -0,0 +1,110 @@
+import io
+import os
+import subprocess
+import tempfile
+import uuid
+import wave
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def pcm16_to_float(pcm_bytes, channels=1):
+    """
+    Convert little-endian 16-bit PCM to mono float32 in [-1, 1].
+    Returns: float32 numpy array
+    """
+    samples = np.frombuffer(pcm_bytes, dtype='<i2')
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples.astype(np.float32) / 32768.0
+
+
+def resample(samples, source_rate, target_rate=SAMPLE_RATE):
+    """
+    Linear-interpolation resampling, adequate for speech recognition input.
+    Returns: float32 numpy array
+    """
+    if source_rate == target_rate or not len(samples):
+        return samples
+    duration = len(samples) / source_rate
+    target = np.linspace(0, duration, int(round(duration * target_rate)), endpoint=False)
+    source = np.arange(len(samples)) / source_rate
+    return np.interp(target, source, samples).astype(np.float32)
+
+
+class PcmStream:
+    """
+    Incremental decoder for raw little-endian 16-bit PCM arriving in chunks
+    whose boundaries need not fall on whole sample frames.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, channels=1):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.remainder = b''
+
+    def decode(self, pcm_bytes):
+        """
+        Returns: 16 kHz mono float32 samples for every complete frame received,
+        carrying a trailing partial frame over to the next chunk
+        """
+        pcm_bytes = self.remainder + pcm_bytes
+        usable = len(pcm_bytes) - len(pcm_bytes) % (2 * self.channels)
+        self.remainder = pcm_bytes[usable:]
+        return resample(pcm16_to_float(pcm_bytes[:usable], self.channels), self.sample_rate)
+
+
+def _decode_wav(audio_bytes):
+    try:
+        with wave.open(io.BytesIO(audio_bytes), 'rb') as wf:
+            if wf.getsampwidth() != 2 or wf.getcomptype() != 'NONE':
+                return None
+            pcm = wf.readframes(wf.getnframes())
+            return resample(pcm16_to_float(pcm, wf.getnchannels()), wf.getframerate())
+    except (wave.Error, EOFError):
+        return None
+
+
+def _ffmpeg(input_args, stdin=None):
+    cmd = ['ffmpeg', '-nostdin', '-threads', '0', *input_args,
+           '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(SAMPLE_RATE), '-']
+    return subprocess.run(cmd, input=stdin, capture_output=True, check=True).stdout
+
+
+def decode_audio_bytes(audio_bytes, suffix=''):
+    """
+    Decode an uploaded audio file in memory into 16 kHz mono float32, the format
+    Whisper and the emotion analyzer both consume. 16-bit PCM WAV is parsed
+    directly; anything else is piped through ffmpeg.
+    Returns: float32 numpy array
+    """
+    samples = _decode_wav(audio_bytes)
+    if samples is not None:
+        return samples
+
+    try:
+        pcm = _ffmpeg(['-i', 'pipe:0'], stdin=audio_bytes)
+    except subprocess.CalledProcessError:
+        # Containers with the index at the end (e.g. some .m4a) need a seekable input.
+        with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+            tmp.write(audio_bytes)
+            tmp.flush()
+            try:
+                pcm = _ffmpeg(['-i', tmp.name])
+            except subprocess.CalledProcessError as e:
+                raise ValueError(f"Could not decode audio: {e.stderr.decode(errors='ignore').strip()}") from e
+    return pcm16_to_float(pcm)
+
+
+def retain_audio(audio_bytes, directory, filename=''):
+    """
+    Store an upload under a collision-free name, keeping its extension.
+    Returns: path to the saved file
+    """
+    os.makedirs(directory, exist_ok=True)
+    suffix = os.path.splitext(filename or '')[1] or '.wav'
+    path = os.path.join(directory, f"{uuid.uuid4().hex}{suffix}")
+    with open(path, 'wb') as f:
+        f.write(audio_bytes)
+    return path
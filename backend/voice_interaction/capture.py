@@ -0,0 +1,157 @@
+import time
+import numpy as np
+from backend.voice_interaction.audio_io import SAMPLE_RATE, decode_audio_bytes, pcm16_to_float
+from backend.voice_interaction.vad import VoiceActivitySegmenter
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+
+class RingBuffer:
+    """
+    Preallocated float32 ring buffer addressed by absolute sample position.
+    """
+
+    def __init__(self, capacity):
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.capacity = capacity
+        self.written = 0
+
+    def write(self, samples):
+        samples = samples[-self.capacity:]
+        n = len(samples)
+        pos = self.written % self.capacity
+        first = min(n, self.capacity - pos)
+        self.buffer[pos:pos + first] = samples[:first]
+        self.buffer[:n - first] = samples[first:]
+        self.written += n
+
+    def read(self, start, end):
+        """
+        Copy out samples [start, end) by absolute position.
+        Returns: float32 numpy array
+        """
+        start = max(start, self.written - self.capacity, 0)
+        end = min(end, self.written)
+        if end <= start:
+            return np.empty(0, dtype=np.float32)
+        begin = start % self.capacity
+        length = end - start
+        if begin + length <= self.capacity:
+            return self.buffer[begin:begin + length].copy()
+        return np.concatenate([self.buffer[begin:], self.buffer[:begin + length - self.capacity]])
+
+
+class MicrophoneSource:
+    """
+    16 kHz mono microphone input through PyAudio.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, chunk=480):
+        if pyaudio is None:
+            raise ImportError("pyaudio is not installed; use WavFileSource for recorded input")
+        self.chunk = chunk
+        self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=sample_rate,
+            input=True,
+            frames_per_buffer=chunk
+        )
+
+    def read(self):
+        return pcm16_to_float(self.stream.read(self.chunk, exception_on_overflow=False))
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+        self.audio.terminate()
+
+
+class WavFileSource:
+    """
+    Plays a recorded audio file as if it were the microphone, optionally at
+    capture speed, so endpointing can be exercised without PyAudio.
+    """
+
+    def __init__(self, path, chunk=480, realtime=False):
+        with open(path, 'rb') as f:
+            self.samples = decode_audio_bytes(f.read())
+        self.chunk = chunk
+        self.realtime = realtime
+        self.position = 0
+        self.started = time.perf_counter()
+
+    def read(self):
+        if self.realtime:
+            due = self.started + self.position / SAMPLE_RATE
+            time.sleep(max(0.0, due - time.perf_counter()))
+        samples = self.samples[self.position:self.position + self.chunk]
+        self.position += len(samples)
+        return samples
+
+    def close(self):
+        pass
+
+
+def record_utterance(source, max_duration=10.0, listen_timeout=10.0, pre_roll=0.3,
+                     trailing_silence=0.6, min_speech=0.09):
+    """
+    Read from source until one utterance has been captured: recording starts
+    at speech onset (keeping pre_roll seconds before it) and stops after
+    trailing_silence seconds of silence or max_duration seconds of speech.
+    Returns: (float32 samples or None if nobody spoke, stats dict)
+    """
+    vad = VoiceActivitySegmenter(sample_rate=SAMPLE_RATE)
+    frame_seconds = source.chunk / SAMPLE_RATE
+    start_frames = max(1, round(min_speech / frame_seconds))
+    end_frames = max(1, round(trailing_silence / frame_seconds))
+    pre_roll_samples = int(pre_roll * SAMPLE_RATE)
+    ring = RingBuffer(int((max_duration + pre_roll) * SAMPLE_RATE) + source.chunk)
+
+    onset = None
+    voiced_run = silent_run = 0
+    last_voiced = 0
+    started = time.perf_counter()
+
+    while True:
+        samples = source.read()
+        if not len(samples):
+            break
+        ring.write(samples)
+        voiced = vad.is_speech(samples)
+
+        if onset is None:
+            voiced_run = voiced_run + 1 if voiced else 0
+            if voiced_run >= start_frames:
+                onset = max(0, ring.written - voiced_run * len(samples) - pre_roll_samples)
+                last_voiced = ring.written
+            elif ring.written >= listen_timeout * SAMPLE_RATE:
+                break
+            continue
+
+        if voiced:
+            silent_run = 0
+            last_voiced = ring.written
+        else:
+            silent_run += 1
+        if silent_run >= end_frames or ring.written - onset >= (max_duration + pre_roll) * SAMPLE_RATE:
+            break
+
+    stats = {
+        'listened': ring.written / SAMPLE_RATE,
+        'elapsed': time.perf_counter() - started,
+        'onset': None if onset is None else onset / SAMPLE_RATE,
+        'duration': 0.0
+    }
+    if onset is None:
+        return None, stats
+
+    # Keep a little of the trailing silence so the last word is not clipped.
+    end = min(ring.written, last_voiced + int(0.1 * SAMPLE_RATE))
+    audio = ring.read(onset, end)
+    stats['duration'] = len(audio) / SAMPLE_RATE
+    return audio, stats
@@ -0,0 +1,101 @@
+import threading
+import time
+import uuid
+from backend.voice_interaction.audio_io import SAMPLE_RATE, PcmStream
+from backend.voice_interaction.vad import VoiceActivitySegmenter
+
+
+class StreamingTranscriber:
+    """
+    One streaming transcription session. PCM chunks are segmented with voice
+    activity detection; the utterance in progress is re-transcribed every
+    partial_interval seconds of new audio, and each closed segment produces a
+    final transcript.
+    """
+
+    def __init__(self, transcribe, sample_rate=SAMPLE_RATE, channels=1, partial_interval=1.0,
+                 context=None, **vad_options):
+        self.transcribe = transcribe
+        self.context = context or {}
+        self.pcm = PcmStream(sample_rate, channels)
+        self.partial_samples = int(partial_interval * SAMPLE_RATE)
+        self.segmenter = VoiceActivitySegmenter(sample_rate=SAMPLE_RATE, **vad_options)
+        self.partial = ''
+        self.partial_at = 0
+        self.received = 0
+        self.last_active = time.monotonic()
+        self._lock = threading.Lock()
+
+    def feed(self, pcm_bytes):
+        """
+        Process a chunk of raw PCM.
+        Returns: dict with 'partial' (str) and 'finals' (list of (transcript, audio))
+        """
+        with self._lock:
+            samples = self.pcm.decode(pcm_bytes)
+            self.last_active = time.monotonic()
+            self.received += len(samples)
+            finals = [self._finalize(segment) for segment in self.segmenter.push(samples)]
+
+            active = self.segmenter.active_audio()
+            if active is not None and len(active) - self.partial_at >= self.partial_samples:
+                self.partial = self.transcribe(active, partial=True)
+                self.partial_at = len(active)
+
+            return {'partial': self.partial, 'finals': [f for f in finals if f[0]]}
+
+    def finish(self):
+        """
+        Close the stream and transcribe any open utterance.
+        Returns: list of (transcript, audio)
+        """
+        with self._lock:
+            segment = self.segmenter.flush()
+            if segment is None:
+                return []
+            final = self._finalize(segment)
+            return [final] if final[0] else []
+
+    def _finalize(self, segment):
+        self.partial = ''
+        self.partial_at = 0
+        return self.transcribe(segment, partial=False), segment
+
+
+class StreamingSessions:
+    """
+    Registry of open streaming sessions built by factory; idle sessions (by
+    their last_active time) expire after ttl seconds.
+    """
+
+    def __init__(self, factory, ttl=120.0):
+        self.factory = factory
+        self.ttl = ttl
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def start(self, **options):
+        """
+        Open a new session, passing options to the factory.
+        Returns: session id
+        """
+        self.expire()
+        session_id = uuid.uuid4().hex
+        session = self.factory(**options)
+        with self._lock:
+            self.sessions[session_id] = session
+        return session_id
+
+    def get(self, session_id):
+        with self._lock:
+            return self.sessions.get(session_id)
+
+    def close(self, session_id):
+        with self._lock:
+            return self.sessions.pop(session_id, None)
+
+    def expire(self):
+        now = time.monotonic()
+        with self._lock:
+            for session_id in [s for s, session in self.sessions.items() if now - session.last_active > self.ttl]:
+                del self.sessions[session_id]
@@ -0,0 +1,126 @@
+from collections import deque
+import numpy as np
+
+
+def frame_energy_db(frame):
+    """
+    RMS level of a float32 frame in dBFS.
+    Returns: float
+    """
+    rms = np.sqrt(np.mean(np.square(frame, dtype=np.float64)))
+    return 20.0 * np.log10(max(rms, 1e-10))
+
+
+class VoiceActivitySegmenter:
+    """
+    Energy-based voice activity detector that cuts a stream of 16 kHz float32
+    samples into speech segments. The noise floor is tracked during silence so
+    the threshold adapts to the room; a short pre-roll keeps word onsets and a
+    hangover keeps brief pauses inside one utterance.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, threshold_db=-45.0, margin_db=10.0,
+                 min_speech_ms=90, max_silence_ms=450, pre_roll_ms=240, max_segment_s=15.0):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.start_frames = max(1, min_speech_ms // frame_ms)
+        self.end_frames = max(1, max_silence_ms // frame_ms)
+        self.max_frames = int(max_segment_s * 1000 / frame_ms)
+        self.noise_floor_db = None
+        self.pre_roll = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+        self.pending = np.empty(0, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        self.in_speech = False
+        self.voiced_run = 0
+        self.silent_run = 0
+        self.frames = []
+        self.pre_roll.clear()
+
+    @property
+    def threshold(self):
+        if self.noise_floor_db is None:
+            return self.threshold_db
+        return max(self.threshold_db, self.noise_floor_db + self.margin_db)
+
+    def is_speech(self, frame):
+        """
+        Classify one frame and update the noise floor on silence.
+        Returns: bool
+        """
+        level = frame_energy_db(frame)
+        voiced = level > self.threshold
+        if not voiced:
+            if self.noise_floor_db is None:
+                self.noise_floor_db = level
+            else:
+                self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * level
+        return voiced
+
+    def push(self, samples):
+        """
+        Feed float32 samples of any length.
+        Returns: list of completed speech segments (float32 arrays)
+        """
+        if len(self.pending):
+            samples = np.concatenate([self.pending, samples])
+        usable = len(samples) - len(samples) % self.frame_size
+        self.pending = samples[usable:].copy()
+
+        segments = []
+        for start in range(0, usable, self.frame_size):
+            segment = self._push_frame(samples[start:start + self.frame_size])
+            if segment is not None:
+                segments.append(segment)
+        return segments
+
+    def _push_frame(self, frame):
+        voiced = self.is_speech(frame)
+
+        if not self.in_speech:
+            self.pre_roll.append(frame)
+            self.voiced_run = self.voiced_run + 1 if voiced else 0
+            if self.voiced_run >= self.start_frames:
+                self.in_speech = True
+                self.silent_run = 0
+                self.frames = list(self.pre_roll)
+                self.pre_roll.clear()
+            return None
+
+        self.frames.append(frame)
+        self.silent_run = 0 if voiced else self.silent_run + 1
+        if self.silent_run >= self.end_frames or len(self.frames) >= self.max_frames:
+            return self._close()
+        return None
+
+    def _close(self):
+        # Drop the trailing hangover silence, keeping a little tail.
+        keep = len(self.frames) - max(0, self.silent_run - 3)
+        segment = np.concatenate(self.frames[:keep])
+        self.reset()
+        return segment
+
+    def active_audio(self):
+        """
+        Audio of the utterance currently in progress.
+        Returns: float32 array, or None when no speech is active
+        """
+        if not self.in_speech or not self.frames:
+            return None
+        return np.concatenate(self.frames)
+
+    def flush(self):
+        """
+        End of stream: close any open utterance.
+        Returns: final segment or None
+        """
+        if self.in_speech and len(self.pending):
+            self.frames.append(self.pending)
+        self.pending = np.empty(0, dtype=np.float32)
+        if not self.in_speech:
+            self.reset()
+            return None
+        return self._close()
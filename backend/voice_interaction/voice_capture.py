@@ -2,18 +2,49 @@ import pyaudio
 import wave
 import os
 from datetime import datetime
-import whisper
+import threading
+from backend.voice_interaction.asr_engines import COMMAND_ENGINE, create_engine
+from backend.voice_interaction.audio_io import decode_audio_bytes
+from backend.voice_interaction.capture import MicrophoneSource, record_utterance
 
 class VoiceCapture:
     """
-    Captures audio from microphone and converts to text using Whisper.
+    Captures audio from microphone and converts it to text with a pluggable
+    ASR engine: Whisper, Vosk, or a Vosk-first cascade that falls back to
+    Whisper on low confidence.
     """
 
-    def __init__(self, model_size='base'):
-        self.model = whisper.load_model(model_size)
+    def __init__(self, model_size='base', language=None, engine='whisper', vosk_model_path=None,
+                 min_confidence=0.75):
+        self.engine_config = {
+            'whisper_model': model_size,
+            'language': language,
+            'vosk_model_path': vosk_model_path,
+            'min_confidence': min_confidence
+        }
+        self.default_engine = engine
+        self.engines = {}
+        self._engine_lock = threading.Lock()
+        self.get_engine(engine)
         self.audio_dir = 'data/audio'
         os.makedirs(self.audio_dir, exist_ok=True)
 
+    def get_engine(self, name=None):
+        """
+        Engine by name, loaded on first use and shared afterwards. The
+        cascade's grammar-restricted Vosk pass is cached under COMMAND_ENGINE,
+        never as the open-vocabulary 'vosk' engine.
+        Returns: ASR engine
+        """
+        name = name or self.default_engine
+        with self._engine_lock:
+            if name not in self.engines:
+                self.engines[name] = create_engine(name, engines=self.engines, **self.engine_config)
+                if name == 'cascade':
+                    self.engines.setdefault(COMMAND_ENGINE, self.engines[name].fast)
+                    self.engines.setdefault('whisper', self.engines[name].accurate)
+            return self.engines[name]
+
     def record_audio(self, duration=5, sample_rate=16000, channels=1, chunk=1024):
         """
         Record audio from microphone for specified duration.
@@ -54,19 +85,85 @@ class VoiceCapture:
 
         return audio_path
 
-    def transcribe_audio(self, audio_path):
+    def listen(self, source=None, max_duration=10.0, listen_timeout=10.0, pre_roll=0.3, trailing_silence=0.6):
+        """
+        Record one utterance, starting at speech onset and stopping after
+        trailing silence, without touching disk. Reads the microphone unless
+        another source (e.g. a WavFileSource) is given.
+        Returns: 16 kHz float32 samples, or None if nobody spoke
+        """
+        owned = source is None
+        source = source or MicrophoneSource()
+        try:
+            audio, _ = record_utterance(
+                source,
+                max_duration=max_duration,
+                listen_timeout=listen_timeout,
+                pre_roll=pre_roll,
+                trailing_silence=trailing_silence
+            )
+            return audio
+        finally:
+            if owned:
+                source.close()
+
+    def listen_and_transcribe(self, source=None, **options):
+        """
+        Endpointed workflow: capture one utterance and transcribe it in memory.
+        Returns: (transcript, audio samples)
+        """
+        audio = self.listen(source, **options)
+        if audio is None:
+            return "", None
+        return self.transcribe_array(audio), audio
+
+    def transcribe_audio(self, audio_path, engine=None):
+        """
+        Convert audio file to text.
+        Returns: transcript string
+        """
+        try:
+            with open(audio_path, 'rb') as f:
+                audio = decode_audio_bytes(f.read(), os.path.splitext(audio_path)[1])
+        except Exception as e:
+            print(f"Transcription error: {e}")
+            return ""
+        return self.transcribe_array(audio, engine=engine)
+
+    def transcribe_array(self, audio, partial=False, engine=None):
         """
-        Convert audio file to text using Whisper.
+        Transcribe 16 kHz float32 samples already in memory.
         Returns: transcript string
         """
         try:
-            result = self.model.transcribe(audio_path)
-            transcript = result['text'].strip()
-            return transcript
+            return self.get_engine(engine).transcribe(audio, partial=partial)[0]
         except Exception as e:
             print(f"Transcription error: {e}")
             return ""
 
+    def transcribe_batch(self, audios, engines=None):
+        """
+        Transcribe several 16 kHz float32 clips, grouping them by engine so each
+        engine sees one batch. A group whose engine fails to load or decode
+        gets empty transcripts without affecting the other groups.
+        Returns: list of transcript strings, one per clip
+        """
+        engines = engines or [None] * len(audios)
+        transcripts = [None] * len(audios)
+        groups = {}
+        for i, name in enumerate(engines):
+            groups.setdefault(name or self.default_engine, []).append(i)
+
+        for name, indices in groups.items():
+            try:
+                results = self.get_engine(name).transcribe_batch([audios[i] for i in indices])
+            except Exception as e:
+                print(f"Transcription error ({name}): {e}")
+                results = [("", 0.0)] * len(indices)
+            for i, (text, _) in zip(indices, results):
+                transcripts[i] = text
+        return transcripts
+
     def capture_and_transcribe(self, duration=5):
         """
         Complete workflow: record audio and transcribe it.
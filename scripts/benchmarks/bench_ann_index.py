@@ -0,0 +1,81 @@
+"""
+Recall versus latency of the facility embedding index backends on synthetic
+128-d face encodings. Vectors are drawn around per-identity centres the way
+enrolled prototypes cluster, and queries are noisy re-captures of stored ones.
+
+Usage: python scripts/benchmarks/bench_ann_index.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from backend.face_recognition.ann_index import create_index, hnswlib
+
+
+def synthetic_gallery(size, rows_per_identity=5, seed=0):
+    rng = np.random.default_rng(seed)
+    identities = -(-size // rows_per_identity)
+    centres = rng.normal(0, 0.08, size=(identities, 128)).astype(np.float32)
+    vectors = np.repeat(centres, rows_per_identity, axis=0)[:size]
+    vectors += rng.normal(0, 0.02, size=vectors.shape).astype(np.float32)
+    return vectors
+
+
+def queries_for(vectors, count, seed=1):
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), count, replace=False)
+    return vectors[picks] + rng.normal(0, 0.02, size=(count, vectors.shape[1])).astype(np.float32)
+
+
+def run(label, index, queries, truth):
+    start = time.perf_counter()
+    found = np.concatenate([index.search(q, k=1)[0][:, 0] for q in queries])
+    per_query = (time.perf_counter() - start) / len(queries)
+    recall = float((found == truth).mean())
+    print(f"  {label:<22} recall@1 {recall:6.3f}  {per_query * 1e3:8.3f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        vectors = synthetic_gallery(size)
+        queries = queries_for(vectors, args.queries)
+        print(f"{size} vectors")
+
+        brute = create_index('brute', capacity=size)
+        start = time.perf_counter()
+        brute.add(range(size), vectors)
+        print(f"  brute build {time.perf_counter() - start:.2f}s")
+        truth = brute.search(queries, k=1)[0][:, 0]
+        run('brute', brute, queries, truth)
+
+        ivf = create_index('ivf', expected_size=size)
+        start = time.perf_counter()
+        ivf.add(range(size), vectors)
+        print(f"  ivf build {time.perf_counter() - start:.2f}s (nlist {len(ivf.centroids)})")
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            run(f'ivf nprobe={nprobe}', ivf, queries, truth)
+
+        if hnswlib is not None:
+            hnsw = create_index('hnsw', expected_size=size)
+            start = time.perf_counter()
+            hnsw.add(range(size), vectors)
+            print(f"  hnsw build {time.perf_counter() - start:.2f}s")
+            for ef in (16, 64, 256):
+                hnsw.index.set_ef(ef)
+                run(f'hnsw ef={ef}', hnsw, queries, truth)
+        else:
+            print("  hnsw skipped (hnswlib not installed)")
+
+
+if __name__ == '__main__':
+    main()
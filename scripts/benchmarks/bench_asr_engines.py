@@ -0,0 +1,133 @@
+"""
+Compare the Whisper, Vosk and cascade ASR engines on a local set of short
+commands: wall-clock latency per clip, process CPU time, word error rate and,
+for the cascade, how often it had to fall back to Whisper.
+
+The sample set is a directory of WAV files plus a transcripts.tsv manifest
+(one "<file>\t<reference text>" per line). Recordings of real patients cannot
+be shipped with the repo, so --synthesize builds a stand-in set by speaking
+the command grammar through the local TTS voice.
+
+Usage:
+    python scripts/benchmarks/bench_asr_engines.py --samples data/asr_samples --synthesize
+    python scripts/benchmarks/bench_asr_engines.py --samples data/asr_samples \\
+        --engines whisper vosk cascade --vosk-model models/vosk-model-small-en-us-0.15
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from backend.voice_interaction.asr_engines import COMMAND_ENGINE, COMMAND_GRAMMAR, CascadeEngine, create_engine
+from backend.voice_interaction.audio_io import decode_audio_bytes
+
+MANIFEST = 'transcripts.tsv'
+EXTRA_PHRASES = [
+    'remind me to call my sister at four o clock',
+    'where did i leave the blue notebook',
+    'who is the man standing next to the window',
+]
+
+
+def synthesize(directory):
+    from backend.voice_interaction.tts_output import TTSOutput
+    tts = TTSOutput()
+    tts.audio_dir = directory
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, MANIFEST), 'w') as manifest:
+        for i, phrase in enumerate(COMMAND_GRAMMAR + EXTRA_PHRASES):
+            filename = f"sample_{i:03d}.wav"
+            tts.save_to_file(phrase, filename)
+            manifest.write(f"{filename}\t{phrase}\n")
+
+
+def load_samples(directory):
+    samples = []
+    with open(os.path.join(directory, MANIFEST)) as manifest:
+        for line in manifest:
+            if not line.strip():
+                continue
+            filename, reference = line.rstrip('\n').split('\t', 1)
+            with open(os.path.join(directory, filename), 'rb') as f:
+                audio = decode_audio_bytes(f.read(), os.path.splitext(filename)[1])
+            samples.append((filename, reference, audio))
+    return samples
+
+
+def normalize(text):
+    return re.sub(r"[^a-z' ]+", ' ', text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """Levenshtein distance over words."""
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (r != h))
+    return row[-1], len(ref)
+
+
+def run(engine, samples):
+    latencies = []
+    errors = words = 0
+    cpu_start = time.process_time()
+    for _, reference, audio in samples:
+        start = time.perf_counter()
+        text, _ = engine.transcribe(audio)
+        latencies.append(time.perf_counter() - start)
+        e, n = word_errors(reference, text)
+        errors += e
+        words += n
+    cpu = time.process_time() - cpu_start
+    return latencies, cpu, errors / max(words, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', default='data/asr_samples')
+    parser.add_argument('--synthesize', action='store_true', help='(re)build the sample set with TTS')
+    parser.add_argument('--engines', nargs='+', default=['whisper', 'vosk', 'cascade'])
+    parser.add_argument('--whisper-model', default='base')
+    parser.add_argument('--vosk-model', default='models/vosk-model-small-en-us-0.15')
+    parser.add_argument('--min-confidence', type=float, default=0.75)
+    args = parser.parse_args()
+
+    if args.synthesize:
+        synthesize(args.samples)
+    samples = load_samples(args.samples)
+    audio_seconds = sum(len(audio) for _, _, audio in samples) / 16000
+    print(f"{len(samples)} clips, {audio_seconds:.1f} s of audio\n")
+
+    engines = {}
+    print(f"{'engine':<10}{'p50 ms':>10}{'p95 ms':>10}{'cpu s':>10}{'RTF':>8}{'WER':>8}")
+    for name in args.engines:
+        engine = create_engine(
+            name,
+            whisper_model=args.whisper_model,
+            language='en',
+            vosk_model_path=args.vosk_model,
+            min_confidence=args.min_confidence,
+            engines=engines
+        )
+        engines.setdefault(name, engine)
+        if isinstance(engine, CascadeEngine):
+            engines.setdefault(COMMAND_ENGINE, engine.fast)
+            engines.setdefault('whisper', engine.accurate)
+        engine.transcribe(samples[0][2])  # warm-up
+        if isinstance(engine, CascadeEngine):
+            engine.accepted = engine.escalated = 0
+
+        latencies, cpu, wer = run(engine, samples)
+        p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+        print(f"{name:<10}{p50:>10.0f}{p95:>10.0f}{cpu:>10.2f}{sum(latencies) / audio_seconds:>8.2f}{wer:>8.1%}")
+        if hasattr(engine, 'stats'):
+            print(f"{'':<10}{engine.stats()}")
+
+
+if __name__ == '__main__':
+    main()
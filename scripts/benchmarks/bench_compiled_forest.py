@@ -0,0 +1,127 @@
+"""
+Parity check and benchmark of the compiled emotion model against the joblib
+RandomForestClassifier + StandardScaler pair it was exported from.
+
+Parity: labels and probabilities must be bit-identical on random rows and on
+rows sitting exactly on (and one float32 step either side of) split
+thresholds. The script exits non-zero on any mismatch.
+
+Benchmark: cold-start load time in a fresh interpreter, and single-row
+predict latency.
+
+Usage:
+    python scripts/benchmarks/bench_compiled_forest.py                # synthetic 100-tree model
+    python scripts/benchmarks/bench_compiled_forest.py --model ser_model.pkl --scaler ser_scaler.pkl
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, ROOT)
+from backend.emotion_recognition.compiled_forest import CompiledForest, export_model
+from backend.emotion_recognition.train_model import EMOTIONS
+
+
+def synthetic_model(n_features=15, n_rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features)) * rng.uniform(0.1, 100, n_features)
+    y = (X[:, 0] > 0).astype(int) + 2 * (X[:, 1] + 0.5 * rng.normal(size=n_rows) > 0)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=100, random_state=seed).fit(scaler.transform(X), y)
+    return model, scaler, X
+
+
+def boundary_rows(model, n_features, rng, count=2000):
+    """Scaled rows with one feature placed on, or one float32 ulp around, a split threshold."""
+    splits = [
+        (f, t)
+        for estimator in model.estimators_
+        for f, t in zip(estimator.tree_.feature, estimator.tree_.threshold)
+        if f >= 0
+    ]
+    rows = rng.normal(size=(count, n_features)).astype(np.float32)
+    for row in rows:
+        f, t = splits[rng.integers(len(splits))]
+        value = np.float32(t)
+        row[f] = (value, np.nextafter(value, np.float32(-np.inf)), np.nextafter(value, np.float32(np.inf)))[rng.integers(3)]
+    return rows.astype(np.float64)
+
+
+def cold_start(code):
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, cwd=ROOT)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model')
+    parser.add_argument('--scaler')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    workdir = tempfile.mkdtemp()
+    if args.model:
+        model, scaler = joblib.load(args.model), joblib.load(args.scaler)
+        X = rng.normal(size=(5000, model.n_features_in_)) * scaler.scale_ + scaler.mean_
+    else:
+        model, scaler, X = synthetic_model()
+    model_path = os.path.join(workdir, 'ser_model.pkl')
+    scaler_path = os.path.join(workdir, 'ser_scaler.pkl')
+    compiled_path = os.path.join(workdir, 'ser_model.forest')
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+    export_model(model, scaler, compiled_path, EMOTIONS)
+    compiled = CompiledForest.load(compiled_path)
+
+    # Parity
+    scaled = scaler.transform(X)
+    failures = 0
+    if not np.array_equal(scaled, compiled.scaler.transform(X)):
+        print("FAIL: scaled features differ")
+        failures += 1
+    for name, rows in (('random rows', scaled), ('threshold rows', boundary_rows(model, X.shape[1], rng))):
+        same_proba = np.array_equal(model.predict_proba(rows), compiled.predict_proba(rows))
+        same_labels = np.array_equal(model.predict(rows), compiled.predict(rows))
+        print(f"{name:<16} {len(rows)} rows: probabilities {'identical' if same_proba else 'DIFFER'}, "
+              f"labels {'identical' if same_labels else 'DIFFER'}")
+        failures += (not same_proba) + (not same_labels)
+
+    # Cold start
+    joblib_load = cold_start(f"import joblib; joblib.load({model_path!r}); joblib.load({scaler_path!r})")
+    compiled_load = cold_start(
+        "from backend.emotion_recognition.compiled_forest import CompiledForest; "
+        f"CompiledForest.load({compiled_path!r})"
+    )
+    print(f"\ncold start (fresh interpreter): joblib {joblib_load * 1000:.0f} ms, compiled {compiled_load * 1000:.0f} ms")
+    print(f"file size: joblib {os.path.getsize(model_path) + os.path.getsize(scaler_path)} B, "
+          f"compiled {os.path.getsize(compiled_path)} B")
+
+    # Single-row latency
+    row = X[:1]
+    for name, predict in (
+        ('joblib', lambda: model.predict(scaler.transform(row))),
+        ('compiled', lambda: compiled.predict(compiled.scaler.transform(row))),
+    ):
+        predict()
+        start = time.perf_counter()
+        for _ in range(500):
+            predict()
+        print(f"single-row predict, {name:<8}: {(time.perf_counter() - start) / 500 * 1e6:8.0f} us")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
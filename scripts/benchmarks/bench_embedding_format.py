@@ -0,0 +1,85 @@
+"""
+Compare size and parse time of face embedding storage formats: the legacy jsonb
+list and pickle file against the binary format in float32 and float16.
+
+Usage: python scripts/benchmarks/bench_embedding_format.py [--rows 5000]
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from backend.face_recognition.embedding_format import (
+    from_db_value, to_db_value, save_embedding_file, open_embedding_file
+)
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_column(encodings, repeat):
+    print("Per-row database column (one 128-d encoding)")
+    vector = encodings[0]
+    legacy = json.dumps(vector.astype(np.float64).tolist())
+    candidates = [
+        ('jsonb list', legacy, lambda: from_db_value(json.loads(legacy))),
+        ('bytea float32', to_db_value(vector), None),
+        ('bytea float16', to_db_value(vector, dtype='float16'), None),
+    ]
+    for label, value, parse in candidates:
+        parse = parse or (lambda value=value: from_db_value(value))
+        seconds = timed(parse, repeat)
+        wire = len(value)
+        stored = len(value) if label == 'jsonb list' else (len(value) - 2) // 2
+        print(f"  {label:<15} stored {stored:>6} B  wire {wire:>6} B  parse {seconds * 1e6:8.1f} us")
+
+
+def bench_file(encodings, names, repeat):
+    print(f"Gallery file ({len(names)} encodings)")
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl_path = os.path.join(tmp, 'known_faces.pkl')
+        with open(pkl_path, 'wb') as f:
+            pickle.dump(([e for e in encodings.astype(np.float64)], names), f)
+
+        def load_pickle():
+            with open(pkl_path, 'rb') as f:
+                loaded, _ = pickle.load(f)
+            return np.asarray(loaded, dtype=np.float32)
+
+        rows = [('pickle', pkl_path, load_pickle)]
+        for dtype in ('float32', 'float16'):
+            path = os.path.join(tmp, f'known_faces_{dtype}.emb')
+            save_embedding_file(path, encodings, metadata={'names': names}, dtype=dtype)
+            rows.append((f'{dtype} read', path, lambda path=path: open_embedding_file(path, mmap=False)))
+            rows.append((f'{dtype} memmap', path, lambda path=path: open_embedding_file(path, mmap=True)))
+
+        for label, path, load in rows:
+            seconds = timed(load, repeat)
+            print(f"  {label:<15} {os.path.getsize(path):>10} B  open {seconds * 1e3:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    encodings = rng.normal(0, 0.1, size=(args.rows, 128)).astype(np.float32)
+    names = [f'person_{i}' for i in range(args.rows)]
+
+    bench_column(encodings, args.repeat * 50)
+    bench_file(encodings, names, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
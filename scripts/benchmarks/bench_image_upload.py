@@ -0,0 +1,118 @@
+"""
+Compare the base64-in-JSON upload path against the raw-bytes path with
+reduced-resolution decoding, on a synthetic phone-sized JPEG. Each path runs in
+a fresh process so peak RSS is measured independently.
+
+Also checks that a box found in the reduced decode, mapped back with
+scale_locations, lands on the same pixels as in the full-resolution decode
+(within one reduction step); the script exits non-zero if it does not.
+
+Usage: python scripts/benchmarks/bench_image_upload.py [--width 4032 --height 3024]
+"""
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from backend.face_recognition.image_io import decode_image, scale_locations
+
+
+def marker_box(width, height):
+    """(top, right, bottom, left) of the green marker drawn by make_jpeg."""
+    return height * 3 // 10, width * 6 // 10 + 1, height * 5 // 10 + 7, width * 4 // 10 - 3
+
+
+def make_jpeg(width, height):
+    rng = np.random.default_rng(0)
+    ramp = np.linspace(0, 215, width, dtype=np.float32)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[...] = ramp[None, :, None]
+    image += rng.integers(0, 40, size=(height, width, 1), dtype=np.uint8)
+    top, right, bottom, left = marker_box(width, height)
+    image[top:bottom, left:right] = (0, 255, 0)  # BGR green
+    return cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def find_marker(rgb_image):
+    """Bounding box of the green marker as (top, right, bottom, left)."""
+    green = (rgb_image[..., 1].astype(np.int16) - rgb_image[..., 0]) > 128
+    rows, cols = np.nonzero(green)
+    return rows.min(), cols.max() + 1, rows.max() + 1, cols.min()
+
+
+def check_locations(payload, min_pixels):
+    """
+    Compare the marker box located in the reduced decode and scaled back with
+    the one located in the full-resolution decode.
+    Returns: True if every edge agrees within the reduction factor
+    """
+    full = find_marker(decode_image(payload))
+    reduced, factor = decode_image(payload, min_pixels, with_factor=True)
+    mapped = scale_locations([find_marker(reduced)], factor)[0]
+    ok = all(abs(a - b) <= factor for a, b in zip(mapped, full))
+    print(f"  box check (factor {factor}): full {tuple(map(int, full))}, "
+          f"mapped {tuple(map(int, mapped))} -> {'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def legacy_path(body):
+    data = json.loads(body)
+    image_bytes = base64.b64decode(data['image'].split(',')[1])
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def raw_path(body, min_pixels):
+    return decode_image(body, min_pixels)
+
+
+def run(label, payload, min_pixels, repeat, queue):
+    if label == 'base64 json':
+        body = json.dumps({'patient_id': 'p1', 'image': 'data:image/jpeg;base64,' + base64.b64encode(payload).decode()})
+        fn = lambda: legacy_path(body)
+    else:
+        body = payload
+        fn = lambda: raw_path(body, min_pixels)
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for _ in range(repeat):
+        image = fn()
+    seconds = (time.perf_counter() - start) / repeat
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((label, seconds, (peak - baseline) / 1024.0, image.shape))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--width', type=int, default=4032)
+    parser.add_argument('--height', type=int, default=3024)
+    parser.add_argument('--decode-pixels', type=int, default=1600 * 1200)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    payload = make_jpeg(args.width, args.height)
+    print(f"JPEG {args.width}x{args.height}, {len(payload) / 1e6:.1f} MB")
+
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    for label, min_pixels in (('base64 json', None), ('raw full', None), ('raw reduced', args.decode_pixels)):
+        proc = ctx.Process(target=run, args=(label, payload, min_pixels, args.repeat, queue))
+        proc.start()
+        label, seconds, peak_mb, shape = queue.get()
+        proc.join()
+        print(f"  {label:<12} {seconds * 1000:8.1f} ms  peak +{peak_mb:7.1f} MB  decoded {shape[1]}x{shape[0]}")
+
+    sys.exit(0 if check_locations(payload, args.decode_pixels) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Throughput of the intent classifier one command at a time versus batched:
+direct predict_batch calls at several batch sizes, and concurrent callers
+going through the same DynamicBatcher front end the API uses.
+
+Usage:
+    python scripts/benchmarks/bench_intent_batching.py
+    python scripts/benchmarks/bench_intent_batching.py --requests 512 --threads 32 --wait-ms 5
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from backend.batching import DynamicBatcher
+from backend.nlp.intent_classifier import IntentClassifier
+
+COMMANDS = [
+    'remind me to take my medication at eight',
+    'who is this',
+    'help me please',
+    'where are my glasses',
+    'what did i do today',
+    'can we practice some names',
+    'good morning how are you',
+    'i lost my keys somewhere in the kitchen',
+    'schedule a doctor appointment for next tuesday afternoon',
+    'who is the woman standing next to the window',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=256)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--wait-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    classifier = IntentClassifier()
+    texts = [COMMANDS[i % len(COMMANDS)] for i in range(args.requests)]
+    classifier.predict_batch(texts[:args.batch_size])
+
+    start = time.perf_counter()
+    sequential = [classifier.predict_with_confidence(text) for text in texts]
+    baseline = time.perf_counter() - start
+    print(f"one at a time          : {args.requests / baseline:8.1f} texts/s")
+
+    for batch_size in (4, 8, 16, 32):
+        start = time.perf_counter()
+        batched = classifier.predict_batch(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        agree = sum(a[0] == b[0] for a, b in zip(sequential, batched))
+        print(f"predict_batch({batch_size:>2})      : {args.requests / elapsed:8.1f} texts/s "
+              f"({baseline / elapsed:.1f}x, {agree}/{len(texts)} labels agree)")
+
+    batcher = DynamicBatcher(
+        classifier.predict_batch,
+        max_batch_size=args.batch_size,
+        max_wait=args.wait_ms / 1000,
+        name='bench-intent-batcher'
+    )
+    latencies = []
+
+    def call(text):
+        started = time.perf_counter()
+        result = batcher(text)
+        latencies.append(time.perf_counter() - started)
+        return result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        list(pool.map(call, texts))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    stats = batcher.stats()
+    print(f"batcher, {args.threads:>2} threads   : {args.requests / elapsed:8.1f} texts/s "
+          f"({baseline / elapsed:.1f}x), mean batch {stats['mean_batch_size']:.1f}, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
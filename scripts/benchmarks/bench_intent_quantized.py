@@ -0,0 +1,123 @@
+"""
+Parity check and benchmark of the int8 TorchScript intent model against the
+full-precision transformers model it was exported from.
+
+Parity: label agreement on a set of patient-style commands; the script exits
+non-zero when agreement falls below --min-agreement.
+
+Benchmark: single-command latency, and cold-start time and peak RSS of a
+fresh interpreter that constructs an IntentClassifier and classifies one
+command.
+
+Usage:
+    python -m backend.nlp.quantized_intent
+    python scripts/benchmarks/bench_intent_quantized.py
+    python scripts/benchmarks/bench_intent_quantized.py --quantized models/intent_classifier_int8.pt --min-agreement 0.98
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, ROOT)
+from backend.nlp.intent_classifier import IntentClassifier
+from backend.nlp.quantized_intent import QUANTIZED_MODEL_PATH
+
+COMMANDS = [
+    'remind me to take my medication at eight',
+    'set a reminder for my doctor appointment on friday',
+    'schedule a call with my daughter tomorrow',
+    'who is this',
+    'who is the man standing by the door',
+    'do you recognize her',
+    'help me please',
+    'i fell and i cannot get up',
+    'i am scared, something is wrong',
+    'where are my glasses',
+    'i lost my keys somewhere in the kitchen',
+    'where did i put the remote',
+    'what did i do today',
+    'give me a recap of my day',
+    'can we practice some names',
+    'quiz me on my family',
+    'good morning how are you',
+    'tell me something nice',
+    'what is the weather like',
+    'thank you',
+]
+
+COLD_START = """
+import json, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, '.')
+from backend.nlp.intent_classifier import IntentClassifier
+classifier = IntentClassifier(quantized_path=sys.argv[1] or None)
+classifier.predict_with_confidence('remind me to take my pills')
+print(json.dumps({
+    'seconds': time.perf_counter() - start,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'quantized': classifier.quantized
+}))
+"""
+
+
+def cold_start(quantized_path):
+    output = subprocess.run(
+        [sys.executable, '-c', COLD_START, quantized_path or ''],
+        check=True, cwd=ROOT, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def latency(classifier, texts, rounds=5):
+    classifier.predict_with_confidence(texts[0])
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            classifier.predict_with_confidence(text)
+    return (time.perf_counter() - start) / (rounds * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quantized', default=QUANTIZED_MODEL_PATH)
+    parser.add_argument('--min-agreement', type=float, default=0.95)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.quantized):
+        parser.error(f"{args.quantized} not found; run python -m backend.nlp.quantized_intent first")
+
+    full = IntentClassifier(quantized_path=None)
+    quantized = IntentClassifier(quantized_path=args.quantized)
+    if not quantized.quantized:
+        parser.error(f"{args.quantized} could not be loaded")
+
+    # Parity
+    expected = full.predict_batch(COMMANDS)
+    actual = quantized.predict_batch(COMMANDS)
+    agree = sum(a[0] == b[0] for a, b in zip(expected, actual))
+    max_delta = max(abs(a[1] - b[1]) for a, b in zip(expected, actual) if a[0] == b[0]) if agree else 0.0
+    print(f"label agreement: {agree}/{len(COMMANDS)} ({agree / len(COMMANDS):.1%}), "
+          f"max confidence delta on agreeing labels {max_delta:.4f}")
+    for text, a, b in zip(COMMANDS, expected, actual):
+        if a[0] != b[0]:
+            print(f"  differs: {text!r}: fp32 {a[0]} ({a[1]:.2f}) vs int8 {b[0]} ({b[1]:.2f})")
+
+    # Latency
+    for name, classifier in (('fp32', full), ('int8', quantized)):
+        print(f"single-command latency, {name}: {latency(classifier, COMMANDS) * 1000:7.2f} ms")
+
+    # Cold start and memory, each in a fresh interpreter
+    for name, path in (('fp32', None), ('int8', args.quantized)):
+        result = cold_start(path)
+        print(f"cold start, {name}: {result['seconds']:.2f} s, peak RSS {result['rss_mb']:.0f} MB")
+    print(f"model size: int8 {os.path.getsize(args.quantized) / 1e6:.1f} MB")
+
+    sys.exit(0 if agree / len(COMMANDS) >= args.min_agreement else 1)
+
+
+if __name__ == '__main__':
+    main()
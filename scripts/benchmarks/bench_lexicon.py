@@ -0,0 +1,199 @@
+"""
+Benchmark the shared lexicon scan against the per-component substring scans
+it replaced, over a synthetic transcript corpus: keyword rules for intent,
+time/date/task/object extraction and emergency detection for every
+utterance.
+
+Reports throughput of both paths and every field where they disagree, with
+examples. End to end the two are within a few tens of percent of each other:
+the keyword lookup is a small part of each component next to the time
+regexes and Python call overhead. The gain is in the lookup itself, shown
+separately over the current tables: one scan finds every phrase, on word
+boundaries, faster than plain substring tests of all phrases and far faster
+than testing each phrase with its own word-boundary regex, and its cost
+barely grows as phrases are added.
+
+Disagreements are expected
+- where a keyword only occurred inside another word ('eat' in 'great',
+  'call' in 'recall', 'pill' in 'pillow', 'practice' vs 'practical');
+- for intent, where several rules match: the substring scan took the first
+  rule in table order, predict_intent weighs the matched phrases.
+Time, date, task and object still pick by table priority, as before.
+
+Usage:
+    python scripts/benchmarks/bench_lexicon.py
+    python scripts/benchmarks/bench_lexicon.py --utterances 50000 --examples 5
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from backend.actions.emergency_handler import EmergencyHandler
+from backend.nlp.entity_extractor import EntityExtractor
+from backend.nlp.intent_classifier import IntentClassifier
+from backend.nlp.lexicon import LEXICON, TABLES, scan
+
+FILLER = (
+    'i the my a to is it and you me can please now could we that of in on for with this there what '
+    'great recall helpful homesick tonight thinking something anything others hello hi window kitchen '
+    'bedroom daughter son nurse garden breakfast dinner lunch television music walk chair table pillow '
+    'practical finder'
+).split()
+
+
+def legacy_intent(text):
+    text_lower = text.lower()
+    rules = [
+        ('emergency_alert', ['help', 'emergency', 'urgent', 'problem', 'scared']),
+        ('who_is_this', ['who is', 'who are', "who's", 'recognize']),
+        ('set_reminder', ['remind', 'reminder', 'schedule', 'appointment', 'medication']),
+        ('where_is_object', ['where is', 'find', 'looking for', 'lost']),
+        ('daily_summary', ['summary', 'what did i do', 'today', 'recap']),
+        ('memory_training', ['quiz', 'practice', 'train', 'remember']),
+    ]
+    for intent, words in rules:
+        if any(word in text_lower for word in words):
+            return intent
+    return 'small_talk'
+
+
+def legacy_time(text):
+    import re
+    for pattern in [r'(\d{1,2}:\d{2}\s*(?:AM|PM|am|pm))', r'(\d{1,2}\s*(?:AM|PM|am|pm))',
+                    r'at\s+(\d{1,2}(?::\d{2})?)', r'(\d{1,2})\s*(?:o\'clock|oclock)']:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(1)
+    for key, value in {'morning': '09:00 AM', 'afternoon': '02:00 PM', 'evening': '06:00 PM',
+                       'night': '08:00 PM', 'noon': '12:00 PM', 'midnight': '12:00 AM'}.items():
+        if key in text.lower():
+            return value
+    return None
+
+
+def legacy_object(text):
+    text_lower = text.lower()
+    for obj in ['keys', 'glasses', 'phone', 'wallet', 'pillbox', 'medicine', 'remote', 'book', 'watch', 'bag']:
+        if obj in text_lower:
+            return obj
+    return None
+
+
+def legacy_task(text):
+    text_lower = text.lower()
+    for keyword in ['medication', 'medicine', 'pills', 'appointment', 'doctor',
+                    'meeting', 'call', 'exercise', 'eat', 'drink', 'take']:
+        if keyword in text_lower:
+            words = text.split()
+            for i, word in enumerate(words):
+                if keyword in word.lower():
+                    return ' '.join(words[max(0, i-2):min(len(words), i+3)])
+    return text
+
+
+def legacy_emergency(text):
+    text_lower = text.lower()
+    for severity, keywords in {
+        'critical': ['help', 'emergency', 'urgent', 'ambulance', 'hospital', 'pain', 'hurt', 'fallen', 'fall'],
+        'high': ['scared', 'afraid', 'confused', 'lost', 'dizzy', 'cant breathe', 'chest'],
+        'medium': ['worried', 'nervous', 'uncomfortable', 'unwell', 'sick']
+    }.items():
+        if any(keyword in text_lower for keyword in keywords):
+            return True, severity
+    return False, None
+
+
+def corpus(count, seed=0):
+    rng = random.Random(seed)
+    phrases = [phrase for table in TABLES.values() for _, entries in table for phrase in entries]
+    utterances = []
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(4, 14))
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(phrases))
+        if rng.random() < 0.2:
+            words.append(f"at {rng.randint(1, 12)}{rng.choice(['', ' pm', ':30 am'])}")
+        text = ' '.join(words)
+        utterances.append(text.capitalize() if rng.random() < 0.5 else text)
+    return utterances
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--utterances', type=int, default=20000)
+    parser.add_argument('--examples', type=int, default=3)
+    args = parser.parse_args()
+
+    texts = corpus(args.utterances)
+    classifier = IntentClassifier.__new__(IntentClassifier)  # rules only, no model needed
+    extractor = EntityExtractor(use_spacy=False)
+    emergency = EmergencyHandler(None, {})
+
+    start = time.perf_counter()
+    legacy = [
+        (legacy_intent(t), legacy_time(t), legacy_task(t), legacy_object(t), legacy_emergency(t))
+        for t in texts
+    ]
+    legacy_time_s = time.perf_counter() - start
+
+    scan.cache_clear()
+    start = time.perf_counter()
+    current = [
+        (classifier.predict_intent(t), extractor.extract_time(t), extractor.extract_task(t),
+         extractor.extract_object(t), emergency.detect_emergency(t, 'neutral'))
+        for t in texts
+    ]
+    current_time_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for t in texts:
+        LEXICON.scan(t)
+    scan_time_s = time.perf_counter() - start
+
+    # Keyword lookup alone, over every phrase of the current tables.
+    phrases = [phrase for phrase in LEXICON.phrases if not phrase.endswith('*')]
+    start = time.perf_counter()
+    for t in texts:
+        lowered = t.lower()
+        [phrase for phrase in phrases if phrase in lowered]
+    substring_all_s = time.perf_counter() - start
+
+    bounded = [re.compile(r'(?<!\w)' + re.escape(phrase) + r'(?!\w)') for phrase in phrases]
+    start = time.perf_counter()
+    for t in texts:
+        lowered = t.lower()
+        [pattern for pattern in bounded if pattern.search(lowered)]
+    bounded_all_s = time.perf_counter() - start
+
+    print(f"{len(texts)} utterances, {len(LEXICON.phrases)} lexicon phrases")
+    print(f"substring scans : {len(texts) / legacy_time_s:10.0f} utterances/s")
+    print(f"shared lexicon  : {len(texts) / current_time_s:10.0f} utterances/s "
+          f"({legacy_time_s / current_time_s:.1f}x)")
+    print(f"\nkeyword lookup over all {len(phrases)} phrases:")
+    print(f"  substring tests       : {len(texts) / substring_all_s:10.0f} utterances/s (matches inside words)")
+    print(f"  word-boundary regexes: {len(texts) / bounded_all_s:9.0f} utterances/s (one regex per phrase)")
+    print(f"  lexicon scan          : {len(texts) / scan_time_s:10.0f} utterances/s (one pass, word boundaries)")
+
+    fields = ('intent', 'time', 'task', 'object', 'emergency')
+    differences = Counter()
+    examples = defaultdict(list)
+    for text, old, new in zip(texts, legacy, current):
+        for field, a, b in zip(fields, old, new):
+            if a != b:
+                differences[field] += 1
+                if len(examples[field]) < args.examples:
+                    examples[field].append((text, a, b))
+    print("\ndisagreements with the substring scans:")
+    for field in fields:
+        print(f"  {field:<10} {differences[field]:6d} ({differences[field] / len(texts):.1%})")
+        for text, a, b in examples[field]:
+            print(f"      {text!r}: {a!r} -> {b!r}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Replay recorded WAV files through the endpointed capture path in place of the
+microphone and report where speech was detected, how much audio was kept, and
+how soon capture ended compared with the fixed 5 second recording.
+
+Usage: python scripts/benchmarks/bench_vad_capture.py clip1.wav [clip2.wav ...] [--realtime]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from backend.voice_interaction.capture import WavFileSource, record_utterance
+
+FIXED_DURATION = 5.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('wavs', nargs='+')
+    parser.add_argument('--realtime', action='store_true', help='pace playback at capture speed')
+    parser.add_argument('--pre-roll', type=float, default=0.3)
+    parser.add_argument('--trailing-silence', type=float, default=0.6)
+    args = parser.parse_args()
+
+    print(f"{'file':<32}{'onset s':>9}{'kept s':>9}{'listened s':>12}{'vs fixed':>10}")
+    for path in args.wavs:
+        audio, stats = record_utterance(
+            WavFileSource(path, realtime=args.realtime),
+            pre_roll=args.pre_roll,
+            trailing_silence=args.trailing_silence
+        )
+        onset = '-' if stats['onset'] is None else f"{stats['onset']:.2f}"
+        saved = FIXED_DURATION - stats['listened']
+        print(f"{os.path.basename(path):<32}{onset:>9}{stats['duration']:>9.2f}{stats['listened']:>12.2f}{saved:>+10.2f}")
+
+
+if __name__ == '__main__':
+    main()
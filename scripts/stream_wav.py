@@ -0,0 +1,116 @@
+"""
+Stream a WAV file to the streaming transcription endpoint in small PCM chunks,
+as the tablet microphone would, and print partial and final results with the
+time they arrived.
+
+Usage:
+    python scripts/stream_wav.py command.wav --patient-id <uuid> [--realtime]
+    python scripts/stream_wav.py command.wav --local     # no server, Whisper in-process
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.request
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def read_wav(path):
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise SystemExit(f"{path}: only 16-bit PCM WAV files are supported")
+        return wf.readframes(wf.getnframes()), wf.getframerate(), wf.getnchannels()
+
+
+def post(url, body=None, json_body=None):
+    headers = {'Content-Type': 'application/octet-stream'}
+    if json_body is not None:
+        body = json.dumps(json_body).encode()
+        headers = {'Content-Type': 'application/json'}
+    request = urllib.request.Request(url, data=body or b'', headers=headers, method='POST')
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def chunks(pcm, rate, channels, chunk_ms):
+    step = int(rate * chunk_ms / 1000) * 2 * channels
+    for start in range(0, len(pcm), step):
+        yield start / (2 * channels * rate), pcm[start:start + step]
+
+
+def stream_http(args, pcm, rate, channels):
+    base = args.url.rstrip('/')
+    session_id = post(f'{base}/api/voice/stream', json_body={
+        'patient_id': args.patient_id,
+        'sample_rate': rate,
+        'channels': channels
+    })['session_id']
+
+    started = time.perf_counter()
+    last_partial = ''
+    for audio_time, chunk in chunks(pcm, rate, channels, args.chunk_ms):
+        if args.realtime:
+            time.sleep(max(0.0, started + audio_time - time.perf_counter()))
+        update = post(f'{base}/api/voice/stream/{session_id}/chunk', body=chunk)
+        elapsed = time.perf_counter() - started
+        if update['partial'] and update['partial'] != last_partial:
+            last_partial = update['partial']
+            print(f"[{elapsed:6.2f}s | audio {audio_time:5.2f}s] partial: {last_partial}")
+        for result in update['results']:
+            print(f"[{elapsed:6.2f}s | audio {audio_time:5.2f}s] final: {result['transcript']!r} "
+                  f"-> {result['intent']}: {result['response']}")
+
+    for result in post(f'{base}/api/voice/stream/{session_id}/finish')['results']:
+        elapsed = time.perf_counter() - started
+        print(f"[{elapsed:6.2f}s | end of stream] final: {result['transcript']!r} "
+              f"-> {result['intent']}: {result['response']}")
+
+
+def stream_local(args, pcm, rate, channels):
+    from backend.voice_interaction.voice_capture import VoiceCapture
+    from backend.voice_interaction.streaming import StreamingTranscriber
+
+    voice_capture = VoiceCapture(model_size=args.model, language=args.language)
+    session = StreamingTranscriber(voice_capture.transcribe_array, sample_rate=rate, channels=channels)
+
+    started = time.perf_counter()
+    last_partial = ''
+    for audio_time, chunk in chunks(pcm, rate, channels, args.chunk_ms):
+        if args.realtime:
+            time.sleep(max(0.0, started + audio_time - time.perf_counter()))
+        update = session.feed(chunk)
+        elapsed = time.perf_counter() - started
+        if update['partial'] and update['partial'] != last_partial:
+            last_partial = update['partial']
+            print(f"[{elapsed:6.2f}s | audio {audio_time:5.2f}s] partial: {last_partial}")
+        for transcript, _ in update['finals']:
+            print(f"[{elapsed:6.2f}s | audio {audio_time:5.2f}s] final: {transcript!r}")
+
+    for transcript, _ in session.finish():
+        print(f"[{time.perf_counter() - started:6.2f}s | end of stream] final: {transcript!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('wav', help='16-bit PCM WAV file')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--patient-id')
+    parser.add_argument('--chunk-ms', type=int, default=100)
+    parser.add_argument('--realtime', action='store_true', help='pace chunks at capture speed')
+    parser.add_argument('--local', action='store_true', help='run the transcriber in-process')
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--language', default='en')
+    args = parser.parse_args()
+
+    pcm, rate, channels = read_wav(args.wav)
+    if args.local:
+        stream_local(args, pcm, rate, channels)
+    else:
+        stream_http(args, pcm, rate, channels)
+
+
+if __name__ == '__main__':
+    main()